@@ -0,0 +1,473 @@
+"""
+Headless benchmark: boots HorrorGame into an offscreen buffer, loads every
+wing through GameScreen and walks the player along a scripted route.
+
+    python bench.py                      # all wings, compare to baseline
+    python bench.py --software           # no GPU needed (tinydisplay)
+    python bench.py --write-baseline     # store this run as the baseline
+    python bench.py --sim-only           # tasks and simulation, no rendering
+    python bench.py --stress 200x200     # add a generated wing (lib/mapgen.py)
+    python bench.py --mutate 200         # time set_tile and check it against a rebuild
+    python bench.py --leak-cycles 5      # enter/exit the game 5 times, check nothing is left
+    python bench.py --sight 5000         # time batched line of sight, check it against raycasts
+
+Writes a JSON report (build time, frame-time distribution, node count,
+draw calls and memory per wing) and exits 1 when any metric regresses
+past the baseline by more than --threshold.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+
+
+DEFAULT_FRAMES = 600
+FRAME_DT = 1.0 / 60.0           # fixed sim step so the route is identical every run
+DEFAULT_THRESHOLD = 0.15        # allowed relative regression
+BASELINE_PATH = "data/bench/baseline.json"
+REPORT_PATH = "data/bench/latest.json"
+
+# Route: (frames, held input, heading change per frame in degrees),
+# repeated until the frame budget is spent.
+ROUTE = (
+    (90, ("forward",), 0.0),
+    (30, (), 3.0),
+    (60, ("forward", "left"), 0.0),
+    (30, (), -6.0),
+    (90, ("forward",), 0.5),
+    (45, ("back", "right"), 0.0),
+)
+
+# Metrics compared against the baseline, with an absolute slack so tiny
+# values don't trip the relative threshold on noise.
+CHECKED = {
+    "build_ms": 5.0,
+    "frame_p95_ms": 0.5,
+    "frame_p99_ms": 1.0,
+    "nodes": 0,
+    "draw_calls": 0,
+    "memory_mb": 8.0,
+}
+
+INPUT_SOURCE = "bench"
+INPUTS = ("forward", "back", "left", "right")
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        import resource
+        # ru_maxrss is KiB on Linux, bytes on macOS; peak rather than current
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def spawn_point(map_data):
+    """
+    Wings reached by stairs have no "X"; start on the first stair or floor tile.
+    """
+    from panda3d.core import Vec3
+    from lib.constants import TILE_SIZE, PLAYER_EYE_HEIGHT
+
+    for wanted in ("X", "<", ">", "."):
+        for y, row in enumerate(map_data):
+            x = row.find(wanted)
+            if x >= 0:
+                return Vec3((x + 0.5) * TILE_SIZE, (y + 0.5) * TILE_SIZE, PLAYER_EYE_HEIGHT)
+    raise ValueError("map has no walkable tile")
+
+
+# ---------------------------------------------------------------------------
+# RUN
+# ---------------------------------------------------------------------------
+
+def boot(software: bool, render: bool = True):
+    import main
+    from panda3d.core import loadPrcFileData
+
+    loadPrcFileData("bench", """
+    window-type offscreen
+    win-size 1280 720
+    audio-library-name null
+    sync-video false
+    """)
+    if software:
+        loadPrcFileData("bench-software", "load-display p3tinydisplay")
+
+    return main.HorrorGame(splash=False, render=render)
+
+
+def drive(base, player, frames):
+    from direct.showbase.InputStateGlobal import inputState
+
+    times = []
+    step = 0
+    while len(times) < frames:
+        count, keys, turn = ROUTE[step % len(ROUTE)]
+        step += 1
+        for name in INPUTS:
+            inputState.set(name, name in keys, inputSource=INPUT_SOURCE)
+        for _ in range(min(count, frames - len(times))):
+            player.node.setH(player.node.getH() + turn)
+            t0 = time.perf_counter()
+            base.taskMgr.step()
+            times.append((time.perf_counter() - t0) * 1000.0)
+
+    for name in INPUTS:
+        inputState.set(name, False, inputSource=INPUT_SOURCE)
+    return times
+
+
+def mutate_tiles(screen, count, seed):
+    """
+    Toggles `count` random wall/floor tiles inside the loaded chunks through
+    GameScreen.set_tile, then compares every loaded chunk with a full
+    rebuild. Returns (per-call ms, sorted; chunks that differ).
+    """
+    import random
+
+    grid = screen.grid
+    streamer = screen.streamer
+    cs = streamer.chunk_size
+    candidates = [
+        (x, y)
+        for cx, cy in streamer.loaded
+        for y in range(cy * cs, min(grid.height, (cy + 1) * cs))
+        for x in range(cx * cs, min(grid.width, (cx + 1) * cs))
+        if grid.char(x, y) in "#."
+    ]
+    rng = random.Random(seed)
+    times = []
+    for x, y in rng.sample(candidates, min(count, len(candidates))):
+        t0 = time.perf_counter()
+        screen.set_tile(x, y, "." if grid.char(x, y) == "#" else "#")
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return sorted(times), streamer.verify()
+
+
+def sight_queries(screen, count, seed):
+    """
+    Asks SightService about `count` random pairs of open tiles, half of
+    them near each other, and checks every answer against a single
+    TileGrid.raycast. Returns (batch ms, reference ms, pairs that differ).
+    """
+    import random
+    from lib.sight import check_against_reference, reference_visible
+
+    grid = screen.grid
+    sight = screen.sight
+    rng = random.Random(seed)
+    tiles = [(i % grid.width, i // grid.width) for i, s in enumerate(grid.solid) if not s]
+    pairs = []
+    while len(pairs) < count:
+        ax, ay = rng.choice(tiles)
+        if len(pairs) % 2:
+            bx, by = ax + rng.randint(-8, 8), ay + rng.randint(-8, 8)
+        else:
+            bx, by = rng.choice(tiles)
+        if grid.in_bounds(bx, by):
+            pairs.append((ax, ay, bx, by))
+
+    # Settle a room rebuild left pending by --mutate before timing
+    sight.query([])
+    sight.begin_frame()
+    t0 = time.perf_counter()
+    sight.query(pairs)
+    batch_ms = (time.perf_counter() - t0) * 1000.0
+
+    t0 = time.perf_counter()
+    for ax, ay, bx, by in pairs:
+        reference_visible(grid, (ax, ay), (bx, by))
+    reference_ms = (time.perf_counter() - t0) * 1000.0
+
+    sight.begin_frame()
+    mismatched = check_against_reference(sight, pairs)
+    return batch_ms, reference_ms, mismatched + swing_doors(screen, rng)
+
+
+def swing_doors(screen, rng, per_door=20):
+    """
+    Opens every door, then closes them again, stepping frames and checking
+    pairs of tiles around the doors against raycasts on every frame, so
+    answers cached before a door turns passable (or solid) are caught.
+    Returns the (frame, pair) queries that differ.
+    """
+    from lib.doors import DOOR_SWING_TIME
+    from lib.sight import check_against_reference
+
+    base = screen.base
+    grid = screen.grid
+    doors = screen.doors
+    pairs = []
+    for x, y in doors.doors:
+        for _ in range(per_door):
+            ax, ay = x + rng.randint(-5, 5), y + rng.randint(-5, 5)
+            bx, by = x + rng.randint(-5, 5), y + rng.randint(-5, 5)
+            if grid.in_bounds(ax, ay) and grid.in_bounds(bx, by):
+                pairs.append((ax, ay, bx, by))
+
+    frames = int(DOOR_SWING_TIME / FRAME_DT) + 5
+    mismatched = []
+    for opening in (True, False):
+        for (x, y), door in list(doors.doors.items()):
+            if door.is_open != opening:
+                # Swing from the tile beside the door, not standing in it
+                fx = (x + (0.5 if door.along_x else -0.5)) * grid.tile_size
+                fy = (y + (-0.5 if door.along_x else 0.5)) * grid.tile_size
+                doors.toggle((x, y), fx, fy, 0.0)
+        for frame in range(frames):
+            base.taskMgr.step()
+            mismatched += [(frame,) + p for p in check_against_reference(screen.sight, pairs)]
+    return mismatched
+
+
+def bench_wing(base, wing, frames, mutate=0, seed=0, sight=0):
+    from panda3d.core import SceneGraphAnalyzer
+    from lib.memory import account
+    from lib.maps import MAP_DATA
+    from lib.profiling import percentile
+    from screens.game import GameScreen
+
+    mem_before = rss_mb()
+    base.player_start = spawn_point(MAP_DATA[wing])
+
+    screen = GameScreen(base, base.screens, save_data={"wing": wing})
+    t0 = time.perf_counter()
+    for _ in screen.prepare():
+        pass
+    build_ms = (time.perf_counter() - t0) * 1000.0
+
+    t0 = time.perf_counter()
+    base.screens.change(screen)
+    enter_ms = (time.perf_counter() - t0) * 1000.0
+
+    # Let textures upload before timing the route
+    for _ in range(3):
+        base.taskMgr.step()
+
+    times = sorted(drive(base, screen.player, frames))
+
+    analyzer = SceneGraphAnalyzer()
+    analyzer.addNode(base.render.node())
+
+    result = {
+        "build_ms": build_ms,
+        "enter_ms": enter_ms,
+        "frames": len(times),
+        "frame_p50_ms": percentile(times, 0.50),
+        "frame_p95_ms": percentile(times, 0.95),
+        "frame_p99_ms": percentile(times, 0.99),
+        "frame_max_ms": times[-1],
+        "frame_mean_ms": sum(times) / len(times),
+        "nodes": base.render.countNumDescendants(),
+        # Without a PStats server the Geom count is the draw-call upper bound
+        "draw_calls": analyzer.getNumGeoms(),
+        "vertices": analyzer.getNumVertices(),
+        "memory_mb": rss_mb(),
+        "memory_delta_mb": rss_mb() - mem_before,
+        # Attributed CPU/GPU bytes per wing, prop and texture (lib/memory.py)
+        "memory_accounted": account(base)["totals"],
+    }
+
+    field = base.presence.field
+    if field is not None and field.ticks:
+        result["presence_ticks"] = field.ticks
+        result["presence_tick_ms"] = field.tick_ms_total / field.ticks
+        result["presence_tick_max_ms"] = field.tick_ms_max
+
+    if mutate:
+        times, mismatched = mutate_tiles(screen, mutate, seed)
+        result["set_tile_p50_ms"] = percentile(times, 0.50)
+        result["set_tile_max_ms"] = times[-1] if times else 0.0
+        result["set_tile_mismatched"] = [list(c) for c in mismatched]
+
+    if sight:
+        batch_ms, reference_ms, mismatched = sight_queries(screen, sight, seed)
+        result["sight_batch_ms"] = batch_ms
+        result["sight_reference_ms"] = reference_ms
+        result["sight_mismatched"] = [list(p) for p in mismatched]
+
+    screen.exit()
+    base.screens.current = None
+    return result
+
+
+def leak_check(base, wing, cycles):
+    """
+    Enters the wing from the title screen and returns to it `cycles` times.
+    Returns the resource counts that didn't come back to baseline.
+    """
+    from lib.maps import MAP_DATA
+    from lib.resources import check_cycles
+    from screens.game import GameScreen
+    from screens.title import TitleScreen
+
+    base.player_start = spawn_point(MAP_DATA[wing])
+    return check_cycles(
+        base,
+        lambda: GameScreen(base, base.screens, save_data={"wing": wing}),
+        lambda: base.screens.screen("title", TitleScreen),
+        cycles,
+    )
+
+
+def run(args):
+    from lib.maps import MAP_DATA
+    from direct.showbase.ShowBaseGlobal import globalClock
+    from panda3d.core import ClockObject
+
+    base = boot(args.software, render=not args.sim_only)
+
+    from lib.mapgen import MapSpec, parse_size, register_map
+    stress = [
+        register_map(MapSpec(*parse_size(size), seed=args.seed, layout=args.layout))
+        for size in args.stress
+    ]
+
+    # Non-real-time clock: every frame advances exactly FRAME_DT of game time,
+    # wall-clock frame cost is measured separately.
+    globalClock.setMode(ClockObject.MNonRealTime)
+    globalClock.setFrameRate(1.0 / FRAME_DT)
+
+    wings = (args.wings or [w for w in MAP_DATA if w not in stress]) + stress
+    report = {
+        "created": time.time(),
+        "frames": args.frames,
+        "software": args.software,
+        "sim_only": args.sim_only,
+        "pipe": base.pipe.getInterfaceName() if base.pipe else None,
+        "wings": {},
+    }
+    for wing in wings:
+        report["wings"][wing] = result = bench_wing(base, wing, args.frames, args.mutate, args.seed, args.sight)
+        print(
+            f"{wing:<12} build {result['build_ms']:7.1f} ms  "
+            f"p50 {result['frame_p50_ms']:6.2f}  p95 {result['frame_p95_ms']:6.2f}  "
+            f"p99 {result['frame_p99_ms']:6.2f} ms  nodes {result['nodes']:6d}  "
+            f"draws {result['draw_calls']:5d}  mem {result['memory_mb']:7.1f} MB"
+        )
+        if "presence_tick_ms" in result:
+            print(
+                f"{'':<12} presence tick {result['presence_tick_ms']:6.3f} ms  "
+                f"max {result['presence_tick_max_ms']:6.3f} ms  ({result['presence_ticks']} ticks)"
+            )
+        if args.mutate:
+            print(
+                f"{'':<12} set_tile p50 {result['set_tile_p50_ms']:6.2f}  "
+                f"max {result['set_tile_max_ms']:6.2f} ms  "
+                f"mismatched chunks {len(result['set_tile_mismatched'])}"
+            )
+        if args.sight:
+            print(
+                f"{'':<12} sight {args.sight} queries {result['sight_batch_ms']:7.2f} ms  "
+                f"raycasts {result['sight_reference_ms']:7.2f} ms  "
+                f"mismatched {len(result['sight_mismatched'])}"
+            )
+        if args.leak_cycles:
+            result["leaks"] = leak_check(base, wing, args.leak_cycles)
+            print(f"{'':<12} {args.leak_cycles} enter/exit cycles: "
+                  f"{'; '.join(result['leaks']) or 'no leaks'}")
+
+    base.destroy()
+    return report
+
+
+# ---------------------------------------------------------------------------
+# BASELINE
+# ---------------------------------------------------------------------------
+
+def compare(report, baseline, threshold):
+    """
+    Returns a list of human-readable regressions (empty when clean).
+    """
+    failures = []
+    for wing, base_metrics in baseline.get("wings", {}).items():
+        metrics = report["wings"].get(wing)
+        if metrics is None:
+            continue
+        for name, slack in CHECKED.items():
+            old = base_metrics.get(name)
+            new = metrics.get(name)
+            if old is None or new is None:
+                continue
+            limit = old * (1.0 + threshold) + slack
+            if new > limit:
+                failures.append(f"{wing}.{name}: {new:.2f} > {limit:.2f} (baseline {old:.2f})")
+    return failures
+
+
+def write_json(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help="frames per wing")
+    parser.add_argument("--wings", nargs="*", help="wings to run (default: all of MAP_DATA)")
+    parser.add_argument("--software", action="store_true", help="use the software renderer")
+    parser.add_argument("--sim-only", action="store_true", help="don't render; time tasks and simulation only")
+    parser.add_argument("--stress", action="append", default=[], metavar="WxH",
+                        help="also run a generated map of this size (repeatable)")
+    parser.add_argument("--layout", default="grid", help="layout for --stress maps")
+    parser.add_argument("--seed", type=int, default=0, help="seed for --stress maps")
+    parser.add_argument("--mutate", type=int, default=0, metavar="N",
+                        help="after the route, change N tiles and verify against a rebuild")
+    parser.add_argument("--sight", type=int, default=0, metavar="N",
+                        help="batch N line-of-sight queries per wing and verify them against raycasts")
+    parser.add_argument("--leak-cycles", type=int, default=0, metavar="N",
+                        help="enter and leave each wing N times; fail if nodes, lights, tasks or events leak")
+    parser.add_argument("--out", default=REPORT_PATH, help="report path")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--write-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    write_json(args.out, report)
+    print(f"Report: {args.out}")
+
+    mismatched = [w for w, r in report["wings"].items() if r.get("set_tile_mismatched")]
+    if mismatched:
+        print(f"MISMATCH set_tile differs from a full rebuild in: {', '.join(mismatched)}")
+        return 1
+
+    mismatched = [w for w, r in report["wings"].items() if r.get("sight_mismatched")]
+    if mismatched:
+        print(f"MISMATCH line of sight differs from raycasts in: {', '.join(mismatched)}")
+        return 1
+
+    leaking = [w for w, r in report["wings"].items() if r.get("leaks")]
+    if leaking:
+        print(f"LEAK screen resources not released in: {', '.join(leaking)}")
+        return 1
+
+    if args.write_baseline:
+        write_json(args.baseline, report)
+        print(f"Baseline written: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --write-baseline to create one")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    failures = compare(report, baseline, args.threshold)
+    for line in failures:
+        print(f"REGRESSION {line}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,394 @@
 # Audio.py
+from panda3d.core import AudioManager as PandaAudioManager, AudioSound, Point3
+
+from lib.startup import TRACER
+
+
+SFX_DIR = "assets/sound/sfx"
+
+# Music states, checked in order: (state, track, volume, enter_level, exit_level).
+# A state is entered when presence rises above enter_level and left when it
+# falls below exit_level; the gap is hysteresis so the music doesn't flap.
+MUSIC_STATES = (
+    ("danger", "assets/sound/music/warped.mp3", 0.5, 70.0, 60.0),
+    ("calm", "assets/sound/music/title.mp3", 0.2, 0.0, 0.0),
+)
+PREROLL_MARGIN = 10.0       # start buffering the next track this far before its threshold
+CROSSFADE_TIME = 3.0
+
+VOICE_COUNT = 16            # max simultaneously playing 3D voices
+MAX_AUDIBLE_DISTANCE = 30.0 # beyond this a 3D sound is culled outright
+MIN_DISTANCE = 1.5          # full volume inside this radius
+AUDIBLE_THRESHOLD = 0.02    # estimated gain below which a voice is culled
+
+
+# ------------------------------------------------------------
+# SFX CACHE
+# ------------------------------------------------------------
+class SfxCache:
+    """
+    Short sounds are decoded once (SM_sample) and kept referenced; voices
+    ask the manager for new handles, which share the cached sample data.
+    """
+    def __init__(self, manager):
+        self.manager = manager
+        self._sources = {}
+
+    def preload(self, path):
+        if path not in self._sources:
+            with TRACER.span("asset", path):
+                self._sources[path] = self.manager.getSound(path, True, PandaAudioManager.SM_sample)
+        return self._sources[path]
+
+    def instance(self, path):
+        self.preload(path)
+        return self.manager.getSound(path, True, PandaAudioManager.SM_sample)
+
+    def clear(self):
+        for path in self._sources:
+            self.manager.uncacheSound(path)
+        self._sources.clear()
+
+
+# ------------------------------------------------------------
+# 3D VOICE POOL
+# ------------------------------------------------------------
+class Voice:
+    __slots__ = ("sound", "path", "pos", "priority", "volume", "loop", "gain", "virtual",
+                 "occlusion", "heard_at")
+
+    def __init__(self):
+        self.sound = None
+        self.path = None
+        self.pos = Point3(0, 0, 0)
+        self.priority = 0
+        self.volume = 1.0
+        self.loop = False
+        self.gain = 0.0
+        self.virtual = False
+        # Door attenuation and where the listener hears it from
+        # (lib/propagation.py), as last applied to sound; 1.0 and pos when
+        # heard directly
+        self.occlusion = 1.0
+        self.heard_at = self.pos
+
+    @property
+    def free(self):
+        return self.sound is None
+
+    def score(self):
+        # Priority dominates; within a priority, the quieter voice loses
+        return self.priority + self.gain
+
+    def release(self):
+        if self.sound is not None:
+            self.sound.stop()
+        self.sound = None
+        self.path = None
+        self.virtual = False
+
+
+def distance_gain(distance, min_distance=MIN_DISTANCE, max_distance=MAX_AUDIBLE_DISTANCE):
+    """
+    Rough inverse-distance estimate of what the listener hears; used only
+    for culling and stealing decisions, the mixer does the real rolloff.
+    """
+    if distance >= max_distance:
+        return 0.0
+    if distance <= min_distance:
+        return 1.0
+    return min_distance / distance
+
+
+class VoicePool:
+    """
+    Fixed number of 3D voices. When all are busy, a new sound steals the
+    voice with the lowest priority/audibility score if it outranks it.
+    Looping voices that drift out of earshot go virtual (stopped, but
+    remembered) and resume when they come back in range. With a
+    propagation service attached, sounds in other rooms are heard through
+    the doors instead of through the walls.
+    """
+    def __init__(self, manager, cache, size=VOICE_COUNT):
+        self.manager = manager
+        self.cache = cache
+        self.voices = [Voice() for _ in range(size)]
+        self.listener = Point3(0, 0, 0)
+        # lib.propagation.SoundPropagation of the current wing, or None
+        self.propagation = None
+
+        self.stats = {"played": 0, "stolen": 0, "culled": 0, "rejected": 0}
+
+    def _hear(self, pos, volume):
+        """
+        (estimated gain, occlusion, position to play at) for a sound at pos.
+        """
+        occlusion, heard_at = 1.0, pos
+        if self.propagation is not None:
+            occlusion, heard_at = self.propagation.resolve(self.listener, pos)
+        gain = volume * occlusion * distance_gain((heard_at - self.listener).length())
+        return gain, occlusion, heard_at
+
+    def play(self, path, pos, priority=0, volume=1.0, loop=False):
+        pos = Point3(pos)
+        gain, occlusion, heard_at = self._hear(pos, volume)
+        if gain < AUDIBLE_THRESHOLD and not loop:
+            self.stats["culled"] += 1
+            return None
+
+        voice = next((v for v in self.voices if v.free), None)
+        if voice is None:
+            victim = min(self.voices, key=Voice.score)
+            if victim.score() >= priority + gain:
+                self.stats["rejected"] += 1
+                return None
+            victim.release()
+            voice = victim
+            self.stats["stolen"] += 1
+
+        voice.path = path
+        voice.pos = pos
+        voice.priority = priority
+        voice.volume = volume
+        voice.loop = loop
+        voice.gain = gain
+        voice.occlusion = occlusion
+        voice.heard_at = heard_at
+        voice.sound = self.cache.instance(path)
+        voice.sound.setLoop(loop)
+        voice.sound.setVolume(volume * occlusion)
+        voice.sound.set3dMinDistance(MIN_DISTANCE)
+        voice.sound.set3dMaxDistance(MAX_AUDIBLE_DISTANCE)
+        voice.sound.set3dAttributes(heard_at.x, heard_at.y, heard_at.z, 0, 0, 0)
+
+        if gain < AUDIBLE_THRESHOLD:
+            voice.virtual = True
+        else:
+            voice.sound.play()
+        self.stats["played"] += 1
+        return voice
+
+    def update(self, listener):
+        self.listener = Point3(listener)
+        if self.propagation is not None:
+            self.propagation.update(self.listener)
+
+        for voice in self.voices:
+            if voice.free:
+                continue
+
+            if not voice.virtual and voice.sound.status() != AudioSound.PLAYING:
+                voice.release()
+                continue
+
+            voice.gain, occlusion, heard_at = self._hear(voice.pos, voice.volume)
+            audible = voice.gain >= AUDIBLE_THRESHOLD
+            # Compared with what the sound last had, so a route that changed
+            # while the voice was silent is applied when it comes back
+            if audible and occlusion != voice.occlusion:
+                voice.occlusion = occlusion
+                voice.sound.setVolume(voice.volume * occlusion)
+            if audible and heard_at != voice.heard_at:
+                voice.heard_at = heard_at
+                voice.sound.set3dAttributes(heard_at.x, heard_at.y, heard_at.z, 0, 0, 0)
+
+            if voice.virtual and audible:
+                voice.virtual = False
+                voice.sound.play()
+            elif not voice.virtual and not audible:
+                if voice.loop:
+                    voice.virtual = True
+                    voice.sound.stop()
+                else:
+                    voice.release()
+                    self.stats["culled"] += 1
+
+    def active_count(self):
+        return sum(1 for v in self.voices if not v.free and not v.virtual)
+
+    def stop_all(self):
+        for voice in self.voices:
+            voice.release()
+
+
+# ------------------------------------------------------------
+# ADAPTIVE MUSIC
+# ------------------------------------------------------------
+class MusicTrack:
+    def __init__(self, manager, state, path, volume):
+        self.state = state
+        self.path = path
+        self.volume = volume
+        self.level = 0.0
+        self.fade = None
+
+        # Opening a stream only reads the header, so every track is opened
+        # up front and switching never waits on the decoder.
+        with TRACER.span("asset", path + " (stream)"):
+            self.sound = manager.getSound(path, False, PandaAudioManager.SM_stream)
+        self.sound.setLoop(True)
+        self.sound.setVolume(0.0)
+
+    def set_level(self, level):
+        self.level = level
+        self.sound.setVolume(level * self.volume)
+
+    def playing(self):
+        return self.sound.status() == AudioSound.PLAYING
+
+    def preroll(self):
+        """
+        Starts the stream silently so it is already buffered when its
+        crossfade begins.
+        """
+        if not self.playing():
+            self.set_level(0.0)
+            self.sound.play()
+
+    def _fade_done(self):
+        self.fade = None
+
+    def fade_to(self, level, duration):
+        from direct.interval.IntervalGlobal import Func, LerpFunctionInterval, Sequence
+
+        if self.fade:
+            self.fade.pause()
+
+        steps = [LerpFunctionInterval(self.set_level, duration, fromData=self.level, toData=level)]
+        if level <= 0.0:
+            steps.append(Func(self.sound.stop))
+        steps.append(Func(self._fade_done))
+        self.fade = Sequence(*steps, name=f"musicFade-{self.state}")
+        self.fade.start()
+
+
+class MusicDirector:
+    """
+    Picks a music state from the presence level and crossfades between
+    the tracks with intervals. A track the music could switch to next is
+    pre-rolled (silently playing) once presence gets within PREROLL_MARGIN
+    of the threshold that would switch to it.
+    """
+    def __init__(self, manager, states=MUSIC_STATES, crossfade=CROSSFADE_TIME):
+        self.states = states
+        self.crossfade = crossfade
+        self.tracks = {
+            state: MusicTrack(manager, state, path, volume)
+            for state, path, volume, _, _ in states
+        }
+
+        self.current = states[-1][0]
+        track = self.tracks[self.current]
+        track.sound.play()
+        track.set_level(1.0)
+
+    def ready(self):
+        return all(t.sound.status() != AudioSound.BAD for t in self.tracks.values())
+
+    def _target_state(self, level):
+        for state, _, _, enter_level, exit_level in self.states:
+            threshold = exit_level if state == self.current else enter_level
+            if level >= threshold:
+                return state
+        return self.states[-1][0]
+
+    def _preroll(self, level):
+        # States presence would pick if it moved PREROLL_MARGIN either way,
+        # with the current state's hysteresis
+        near = {
+            self._target_state(level - PREROLL_MARGIN),
+            self._target_state(level + PREROLL_MARGIN),
+        }
+        for state, track in self.tracks.items():
+            if state == self.current or track.fade:
+                continue
+            if state in near:
+                if not track.playing():
+                    track.preroll()
+            elif track.playing() and track.level <= 0.0:
+                track.sound.stop()
+
+    def set_state(self, state):
+        if state == self.current:
+            return
+        self.tracks[state].preroll()
+        self.tracks[state].fade_to(1.0, self.crossfade)
+        self.tracks[self.current].fade_to(0.0, self.crossfade)
+        self.current = state
+
+    def update(self, level):
+        self.set_state(self._target_state(level))
+        self._preroll(level)
+
+    def stop(self):
+        for track in self.tracks.values():
+            if track.fade:
+                track.fade.pause()
+            track.sound.stop()
+
+
+# ------------------------------------------------------------
+# AUDIO MANAGER
+# ------------------------------------------------------------
 class AudioManager:
     def __init__(self, base):
         self.base = base
-        self.ambient = base.loader.loadSfx("assets/sound/music/title.mp3")
-        self.ambient.setLoop(True)
-        self.ambient.setVolume(0.2)
-        self.ambient.play()
+
+        # Music streams from disk and follows the presence level
+        self.music = MusicDirector(base.musicManager)
+
+        sfx_manager = base.sfxManagerList[0]
+        # Hard ceiling in the mixer too, for 2D one-shots outside the pool
+        sfx_manager.setConcurrentSoundLimit(VOICE_COUNT + 4)
+        self.sfx = SfxCache(sfx_manager)
+        self.voices = VoicePool(sfx_manager, self.sfx)
+
+    def ready(self):
+        return self.music.ready()
+
+    # ------------------------------------------------------------
+    # SFX
+    # ------------------------------------------------------------
+    def preload(self, paths):
+        for path in paths:
+            self.sfx.preload(path)
+
+    def play_3d(self, path, pos, priority=0, volume=1.0, loop=False):
+        return self.voices.play(path, pos, priority, volume, loop)
+
+    def set_propagation(self, propagation):
+        """
+        Routes 3D sounds through the wing's rooms and doors (None: direct).
+        """
+        self.voices.propagation = propagation
+
+    def play_2d(self, path, volume=1.0):
+        sound = self.sfx.instance(path)
+        sound.setVolume(volume)
+        sound.play()
+        return sound
+
+    # ------------------------------------------------------------
+    # UPDATE
+    # ------------------------------------------------------------
+    def _update_listener(self):
+        cam = self.base.camera
+        if cam is None or cam.isEmpty():
+            return None
+
+        render = self.base.render
+        pos = cam.getPos(render)
+        quat = cam.getQuat(render)
+        fwd = quat.getForward()
+        up = quat.getUp()
+        self.base.sfxManagerList[0].audio3dSetListenerAttributes(
+            pos.x, pos.y, pos.z, 0, 0, 0, fwd.x, fwd.y, fwd.z, up.x, up.y, up.z
+        )
+        return pos
 
     def update(self, dt, presence):
-        self.ambient.setVolume(0.5 if presence.is_dangerous() else 0.2)
+        self.music.update(presence.level)
+
+        listener = self._update_listener()
+        if listener is not None:
+            self.voices.update(listener)
@@ -6,7 +6,7 @@ from typing import List, Optional, Tuple
 
 from panda3d.core import NodePath
 
-from lib.objects import PropRegistry, spawn_prop
+from lib.objects import shared_registry, spawn_prop
 
 
 @dataclass(frozen=True)
@@ -25,7 +25,7 @@ class PropManager:
         """
         self.base = base
         self.parent = parent
-        self.registry = PropRegistry(base.loader, props_root=props_root)
+        self.registry = shared_registry(base.loader, props_root=props_root)
 
     def spawn(self, prop_id: str, pos: Tuple[float, float, float], hpr=(0.0, 0.0, 0.0), name: Optional[str] = None) -> NodePath:
         return spawn_prop(
@@ -1,26 +1,29 @@
-from panda3d.core import (
-    Vec3,
-    CollisionNode,
-    CollisionCapsule,
-    CollisionTraverser,
-    CollisionHandlerPusher,
-    CollisionRay,
-    CollisionHandlerQueue,
-    TextNode,
-)
+import math
+
+from panda3d.core import Point3, Vec3, TextNode
 from direct.gui.OnscreenText import OnscreenText
 from direct.showbase.InputStateGlobal import inputState
 from lib.constants import PLAYER_EYE_HEIGHT, TILE_SIZE
+from lib.grid import PLAYER_RADIUS
+from lib.autosave import CHECKPOINT_EVENT
+from lib.Presence import DOOR_NOISE
+from lib.profiling import PROFILER
 
 
 class Player:
-    def __init__(self, base, save_data=None):
+    def __init__(self, base, grid, doors, resources, save_data=None):
         self.base = base
+        self.grid = grid
+        # lib.doors.DoorSystem of the wing
+        self.doors = doors
+        # lib.resources.ResourceScope of the owning screen; everything the
+        # player adds to the scene or the event system is released with it
+        self.resources = resources
 
         # ------------------------------------------------------------
         # PLAYER NODE
         # ------------------------------------------------------------
-        self.node = base.render.attachNewNode("player")
+        self.node = resources.node(base.render.attachNewNode("player"))
         self.node.setPos(0, 0, 0)
 
         # ------------------------------------------------------------
@@ -28,6 +31,8 @@ class Player:
         # ------------------------------------------------------------
         self.camera = base.camera
         self.camera.reparentTo(self.node)
+        # Released before the node, so the camera survives it
+        resources.add(lambda: self.camera.reparentTo(base.render))
         self.camera.setPos(0, 0, PLAYER_EYE_HEIGHT)
         self.camera.setHpr(0, 0, 0)
 
@@ -37,101 +42,88 @@ class Player:
         self.speed = 8.0
         self.pitch = 0.0
 
-        # ------------------------------------------------------------
-        # COLLISION
-        # ------------------------------------------------------------
-        self._setup_collision()
+        # Simulated position at the last two fixed steps; the node is
+        # placed between them each rendered frame.
+        self.pos = Point3(0, 0, 0)
+        self.prev_pos = Point3(0, 0, 0)
 
-        # ------------------------------------------------------------
-        # DOOR RAY
-        # ------------------------------------------------------------
-        self._setup_door_ray()
+        # Collision is a swept footprint against self.grid (see _movement)
+        self.radius = PLAYER_RADIUS
 
         # ------------------------------------------------------------
         # UI MESSAGE (STATUS FEEDBACK)
         # ------------------------------------------------------------
-        self.message = OnscreenText(
+        self.message = resources.gui(OnscreenText(
             text="",
             pos=(0, -0.85),
             scale=0.055,
             fg=(1, 0.2, 0.2, 1),  # red = denied
             align=TextNode.ACenter,
             mayChange=True,
-        )
+        ))
 
         self._bind_inputs()
 
     # ------------------------------------------------------------
-    # COLLISION
+    # INPUT
     # ------------------------------------------------------------
-    def _setup_collision(self):
-        cnode = CollisionNode("playerCollider")
-        cnode.addSolid(
-            CollisionCapsule(
-                Vec3(0, 0, 0.5),
-                Vec3(0, 0, PLAYER_EYE_HEIGHT),
-                0.35,
-            )
-        )
-        cnode.setFromCollideMask(0x1)
-        cnode.setIntoCollideMask(0)
-
-        self.collider_np = self.node.attachNewNode(cnode)
+    def _bind_inputs(self):
+        for name, key in (
+            ("forward", "w"),
+            ("back", "s"),
+            ("left", "a"),
+            ("right", "d"),
+            ("forward2", "arrow_up"),
+            ("back2", "arrow_down"),
+            ("left2", "arrow_left"),
+            ("right2", "arrow_right"),
+        ):
+            self.resources.watch(inputState.watchWithModifiers(name, key))
 
-        self.pusher = CollisionHandlerPusher()
-        self.pusher.addCollider(self.collider_np, self.node)
+        # SPACE = interact is latched by base.input as the "use" flag
 
-        self.traverser = CollisionTraverser("playerTraverser")
-        self.traverser.addCollider(self.collider_np, self.pusher)
+        self.resources.accept("mouse1", self.base.capture_mouse)
+        self.resources.accept("m", self.base.release_mouse)
 
     # ------------------------------------------------------------
-    # DOOR RAY
+    # UPDATE
     # ------------------------------------------------------------
-    def _setup_door_ray(self):
-        self.door_ray = CollisionRay()
-        self.door_ray.setOrigin(0, 0, PLAYER_EYE_HEIGHT * 0.9)
-        self.door_ray.setDirection(0, 1, 0)
+    def simulate(self, dt):
+        """
+        One fixed simulation step: movement and collision at the
+        simulated position.
+        """
+        frame = self.base.input.frame
 
-        ray_node = CollisionNode("doorRay")
-        ray_node.addSolid(self.door_ray)
-        ray_node.setFromCollideMask(0x1)
-        ray_node.setIntoCollideMask(0)
+        self.prev_pos = Point3(self.pos)
+        with PROFILER.scope("Player._movement"):
+            self._movement(dt, frame)
 
-        self.door_ray_np = self.camera.attachNewNode(ray_node)
+    def update(self, dt, alpha=1.0):
+        """
+        Per rendered frame: mouse look and interaction, then place the node
+        alpha of the way from the previous to the current step.
+        """
+        # Everything the player reacts to comes from the frame's InputFrame
+        # so recorded sessions replay exactly.
+        frame = self.base.input.frame
 
-        self.door_queue = CollisionHandlerQueue()
-        self.door_traverser = CollisionTraverser("doorTraverser")
-        self.door_traverser.addCollider(self.door_ray_np, self.door_queue)
+        if frame.mouse_dx or frame.mouse_dy:
+            with PROFILER.scope("Player._mouse_look"):
+                self._mouse_look(frame.mouse_dx, frame.mouse_dy)
 
-    # ------------------------------------------------------------
-    # INPUT
-    # ------------------------------------------------------------
-    def _bind_inputs(self):
-        inputState.watchWithModifiers("forward", "w")
-        inputState.watchWithModifiers("back", "s")
-        inputState.watchWithModifiers("left", "a")
-        inputState.watchWithModifiers("right", "d")
+        if frame.is_set("use"):
+            self._try_use_door()
 
-        inputState.watchWithModifiers("forward2", "arrow_up")
-        inputState.watchWithModifiers("back2", "arrow_down")
-        inputState.watchWithModifiers("left2", "arrow_left")
-        inputState.watchWithModifiers("right2", "arrow_right")
-
-        # SPACE = interact
-        self.base.accept("space", self._try_use_door)
-
-        self.base.accept("mouse1", self.base.capture_mouse)
-        self.base.accept("m", self.base.release_mouse)
-
-    # ------------------------------------------------------------
-    # UPDATE
-    # ------------------------------------------------------------
-    def update(self, dt):
-        if self.base.mouse_captured:
-            self._mouse_look()
+        self.node.setPos(self.prev_pos + (self.pos - self.prev_pos) * alpha)
 
-        self._movement(dt)
-        self.traverser.traverse(self.base.render)
+    def snap(self):
+        """
+        Takes the node's current position as the simulated one, with
+        nothing to interpolate from (spawn, load, teleport).
+        """
+        self.pos = self.node.getPos()
+        self.prev_pos = Point3(self.pos)
 
     # ------------------------------------------------------------
     # MESSAGE HANDLING
@@ -139,7 +131,7 @@ class Player:
     def _show_message(self, text, duration=2.0):
         self.message.setText(text)
         self.base.taskMgr.remove("clearMessage")
-        self.base.taskMgr.doMethodLater(
+        self.resources.do_later(
             duration,
             lambda t: self.message.setText(""),
             "clearMessage",
@@ -149,68 +141,34 @@ class Player:
     # DOOR INTERACTION
     # ------------------------------------------------------------
     def _try_use_door(self):
-        self.door_traverser.traverse(self.base.render)
-        if self.door_queue.getNumEntries() == 0:
-            return
-
-        self.door_queue.sortEntries()
-        entry = self.door_queue.getEntry(0)
-        np = entry.getIntoNodePath()
-
-        # Walk up to the wall tile node that owns the door tags
-        while np and not np.hasTag("door"):
-            np = np.getParent()
-
-        if not np:
+        # First solid tile (or open door) in the view direction; only
+        # doors respond
+        h = math.radians(self.node.getH())
+        with PROFILER.scope("Collision.door_ray"):
+            tile = self.grid.raycast(self.pos.x, self.pos.y, -math.sin(h), math.cos(h),
+                                     also=self.doors.open_tiles)
+
+        door = self.doors.get(tile)
+        if door is None:
             return
 
         # Locked door feedback
-        if np.getTag("door_unlocked") != "1":
+        if not door.unlocked:
             self._show_message("LOCKED — ACCESS DENIED")
             return
 
-        # --------------------------------------------------------
-        # TELEPORT THROUGH UNLOCKED DOOR
-        # --------------------------------------------------------
-        door_pos = np.getPos(self.base.render)
-        cx = door_pos.x + TILE_SIZE * 0.5
-        cy = door_pos.y + TILE_SIZE * 0.5
-
-        player_pos = self.node.getPos(self.base.render)
-        dx = player_pos.x - cx
-        dy = player_pos.y - cy
-
-        hop = TILE_SIZE * 0.65
-
-        if abs(dx) > abs(dy):
-            new_pos = Vec3(cx - hop if dx > 0 else cx + hop, cy, player_pos.z)
-        else:
-            new_pos = Vec3(cx, cy - hop if dy > 0 else cy + hop, player_pos.z)
-
-        self.node.setPos(self.base.render, new_pos)
-        self.traverser.traverse(self.base.render)
+        was_open = door.is_open
+        now_open = self.doors.toggle(tile, self.pos.x, self.pos.y, self.radius)
+        if now_open != was_open:
+            x, y = tile
+            self.base.presence.noise((x + 0.5) * TILE_SIZE, (y + 0.5) * TILE_SIZE, DOOR_NOISE)
+        if now_open and not was_open:
+            self.base.messenger.send(CHECKPOINT_EVENT, ["door"])
 
     # ------------------------------------------------------------
     # MOUSE LOOK
     # ------------------------------------------------------------
-    def _mouse_look(self):
-        if not self.base.mouseWatcherNode.hasMouse():
-            return
-
-        win = self.base.win
-        if not win:
-            return
-
-        cx = win.getXSize() // 2
-        cy = win.getYSize() // 2
-
-        md = win.getPointer(0)
-        dx = md.getX() - cx
-        dy = md.getY() - cy
-
-        # Recenter immediately
-        win.movePointer(0, cx, cy)
-
+    def _mouse_look(self, dx, dy):
         sensitivity = 0.15
         max_pitch = 75.0
 
@@ -226,19 +184,30 @@ class Player:
     # ------------------------------------------------------------
     # MOVEMENT
     # ------------------------------------------------------------
-    def _movement(self, dt):
+    def _movement(self, dt, frame):
         direction = Vec3(0, 0, 0)
 
-        if inputState.isSet("forward") or inputState.isSet("forward2"):
+        if frame.is_set("forward") or frame.is_set("forward2"):
             direction.y += 1
-        if inputState.isSet("back") or inputState.isSet("back2"):
+        if frame.is_set("back") or frame.is_set("back2"):
             direction.y -= 1
-        if inputState.isSet("left") or inputState.isSet("left2"):
+        if frame.is_set("left") or frame.is_set("left2"):
             direction.x -= 1
-        if inputState.isSet("right") or inputState.isSet("right2"):
+        if frame.is_set("right") or frame.is_set("right2"):
             direction.x += 1
 
-        if direction.lengthSquared() > 0:
-            direction.normalize()
-            self.node.setPos(self.node, direction * self.speed * dt)
+        if direction.lengthSquared() == 0:
+            return
+
+        # Heading only; pitch must not move the player off the floor
+        direction.normalize()
+        step = direction * self.speed * dt
+        h = math.radians(self.node.getH())
+        sin_h, cos_h = math.sin(h), math.cos(h)
+        dx = step.x * cos_h - step.y * sin_h
+        dy = step.x * sin_h + step.y * cos_h
+
+        with PROFILER.scope("Collision.player"):
+            x, y, _, _ = self.grid.move(self.pos.x, self.pos.y, dx, dy, self.radius)
+        self.pos = Point3(x, y, self.pos.z)
 
@@ -1,11 +1,56 @@
 # Presence.py
+
+# Emitted into the presence field (lib/presence_field.py), per second
+ENTITY_EMISSION = 40.0          # at the entity, at level 100
+STEP_NOISE = 3.0                # at the player while moving
+DOOR_NOISE = 2.0                # once, at a door that opens or closes
+
+
 class PresenceSystem:
-    def __init__(self):
+    """
+    level is the global threat, rising over the session. While a wing is
+    attached, field spreads presence from the entity and the player's noise
+    through the wing's open tiles; audio and AI read it with sample().
+    """
+    def __init__(self, tick_rate=None):
         self.level = 0.0
+        self.tick_rate = tick_rate
+        self.field = None
+        # World (x, y) the presence emanates from, or None
+        self.entity = None
+
+    def attach(self, grid):
+        from lib.presence_field import PRESENCE_TICK_RATE, PresenceField
+
+        self.field = PresenceField(grid, self.tick_rate or PRESENCE_TICK_RATE)
+        return self.field
+
+    def detach(self):
+        self.field = None
+        self.entity = None
 
     def update(self, dt, player):
         self.level += dt * 0.5
         self.level = min(self.level, 100.0)
 
+        field = self.field
+        if field is None:
+            return
+        if self.entity is not None:
+            field.emit(self.entity[0], self.entity[1], ENTITY_EMISSION * self.level / 100.0 * dt)
+        if player.pos != player.prev_pos:
+            field.emit(player.pos.x, player.pos.y, STEP_NOISE * dt)
+        field.update(dt)
+
+    def noise(self, x, y, amount):
+        if self.field is not None:
+            self.field.emit(x, y, amount)
+
+    def sample(self, x, y):
+        """
+        Local presence at world (x, y); 0 with no wing attached.
+        """
+        return self.field.sample(x, y) if self.field is not None else 0.0
+
     def is_dangerous(self):
         return self.level > 70.0
@@ -1,6 +1,7 @@
 from direct.gui.OnscreenImage import OnscreenImage
 from panda3d.core import TransparencyAttrib, Vec4
 from direct.interval.LerpInterval import LerpColorScaleInterval
+from direct.interval.IntervalGlobal import Func, Sequence
 
 
 class ScreenFader:
@@ -14,6 +15,10 @@ class ScreenFader:
             scale=(1, 1, 1),
         )
         self.overlay.setTransparency(TransparencyAttrib.MAlpha)
+        # Draw over everything in render2d/aspect2d
+        self.overlay.setBin("fixed", 100)
+        self.overlay.setDepthTest(False)
+        self.overlay.setDepthWrite(False)
         self.overlay.setColorScale(0, 0, 0, 0)
         self.overlay.hide()
 
@@ -28,9 +33,12 @@ class ScreenFader:
 
     def fade_in(self, duration=0.4):
         self.overlay.show()
-        return LerpColorScaleInterval(
-            self.overlay,
-            duration,
-            Vec4(0, 0, 0, 0),
-            Vec4(0, 0, 0, 1),
+        return Sequence(
+            LerpColorScaleInterval(
+                self.overlay,
+                duration,
+                Vec4(0, 0, 0, 0),
+                Vec4(0, 0, 0, 1),
+            ),
+            Func(self.overlay.hide),
         )
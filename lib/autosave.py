@@ -0,0 +1,133 @@
+# lib/autosave.py
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from direct.showbase.DirectObject import DirectObject
+
+from lib.profiling import PROFILER
+from lib.saves import FLAG_ZLIB, new_save_data, save_path
+
+
+# ---------------------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------------------
+
+AUTOSAVE_SLOT = "autosave"
+AUTOSAVE_INTERVAL = 120.0       # seconds between timed autosaves
+CHECKPOINT_COOLDOWN = 10.0      # min seconds between checkpoint autosaves
+
+# Fired with a reason string (e.g. "door") when the player reaches a checkpoint
+CHECKPOINT_EVENT = "checkpoint"
+
+
+# ---------------------------------------------------------------------------
+# SNAPSHOT
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class GameSnapshot:
+    """
+    Immutable copy of the savable game state. Door and prop state are
+    shared tuples that the game replaces (never mutates) on change, so
+    taking a snapshot only copies a handful of scalars.
+    """
+    wing: str
+    play_time: float
+    timestamp: float
+    presence: float
+    player_pos: Tuple[float, float, float]
+    player_h: float
+    player_pitch: float
+    doors: Tuple[Tuple[int, int, bool], ...]
+    props: Tuple[Tuple[str, Tuple[float, float, float], Tuple[float, float, float], int], ...]
+
+    def to_save_data(self) -> Dict[str, Any]:
+        data = new_save_data(self.wing)
+        data["play_time"] = self.play_time
+        data["timestamp"] = self.timestamp
+        data["presence"] = self.presence
+        data["player"] = {
+            "pos": list(self.player_pos),
+            "h": self.player_h,
+            "pitch": self.player_pitch,
+        }
+        data["doors"] = [list(d) for d in self.doors]
+        data["props"] = [
+            {"id": prop_id, "pos": list(pos), "hpr": list(hpr), "state": state}
+            for prop_id, pos, hpr, state in self.props
+        ]
+        return data
+
+
+# ---------------------------------------------------------------------------
+# SERVICE
+# ---------------------------------------------------------------------------
+
+class AutosaveService(DirectObject):
+    """
+    Takes a snapshot on the main thread every `interval` seconds, or on a
+    checkpoint event, and hands it to base.saves; serialization,
+    compression and disk I/O all happen on the writer thread.
+
+    `game` is anything with a snapshot() -> GameSnapshot method.
+    """
+    def __init__(self, base, game, interval: float = AUTOSAVE_INTERVAL,
+                 slot: str = AUTOSAVE_SLOT, checkpoint_cooldown: float = CHECKPOINT_COOLDOWN):
+        super().__init__()
+        self.base = base
+        self.game = game
+        self.interval = interval
+        self.slot = slot
+        self.checkpoint_cooldown = checkpoint_cooldown
+
+        self.timer = 0.0
+        self.since_save = 0.0
+        self._pending: Optional[str] = None
+
+        # Main-thread snapshot cost, in milliseconds
+        self.last_snapshot_ms = 0.0
+        self.max_snapshot_ms = 0.0
+        self.total_snapshot_ms = 0.0
+        self.saves = 0
+        self.last_reason: Optional[str] = None
+
+        self.accept(CHECKPOINT_EVENT, self.request)
+
+    def request(self, reason: str = "manual") -> None:
+        if self.since_save >= self.checkpoint_cooldown:
+            self._pending = reason
+
+    def update(self, dt: float) -> None:
+        self.timer += dt
+        self.since_save += dt
+
+        if self._pending is None and self.interval > 0 and self.timer >= self.interval:
+            self._pending = "interval"
+
+        if self._pending is not None:
+            self.save_now(self._pending)
+
+    def save_now(self, reason: str = "manual") -> GameSnapshot:
+        t0 = time.perf_counter()
+        with PROFILER.scope("AutosaveService.snapshot"):
+            snapshot = self.game.snapshot()
+        ms = (time.perf_counter() - t0) * 1000.0
+
+        self.last_snapshot_ms = ms
+        self.max_snapshot_ms = max(self.max_snapshot_ms, ms)
+        self.total_snapshot_ms += ms
+        self.saves += 1
+        self.last_reason = reason
+
+        self.base.saves.submit(save_path(self.slot), snapshot, flags=FLAG_ZLIB)
+
+        self.timer = 0.0
+        self.since_save = 0.0
+        self._pending = None
+        return snapshot
+
+    def destroy(self) -> None:
+        self.ignoreAll()
@@ -0,0 +1,358 @@
+# lib/bake.py
+"""
+Offline wing baker.
+
+    python -m lib.bake                  # bake stale wings, one process per core
+    python -m lib.bake --force -j 2     # rebake everything on two workers
+    python -m lib.bake --stress 1000x1000 --stress 500x500
+
+Each wing in MAP_DATA compiles in its own worker process to
+BAKE_DIR/v<BAKE_VERSION>/<wing>/:
+
+    grid.bin      tile chars + solidity (TileGrid)
+    geometry.bin  culled, merged chunk meshes (lib/chunks.py)
+    rooms.json    room/portal graph (lib/rooms.py), rooms.bin its tile map
+    nav.bin       distance fields to the start and stairs
+
+manifest.json next to the wing directories records each wing's source
+hash; a wing is only rebaked when its rows (or the bake version) change.
+At runtime load_baked() hands the geometry to ChunkStreamer and
+load_baked_rooms() the room graph to sound propagation when they are
+still current.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+# Bump when the baked formats or anything that shapes them changes
+BAKE_VERSION = 2
+BAKE_DIR = "build/wings"
+MANIFEST = "manifest.json"
+
+GEOMETRY_MAGIC = b"PBGM"
+GRID_MAGIC = b"PBGR"
+NAV_MAGIC = b"PBNV"
+
+_GEOM_HEADER = struct.Struct("<4sHHI")      # magic, version, chunk size, chunk count
+_CHUNK_HEADER = struct.Struct("<iiH")       # cx, cy, part count
+_PART_HEADER = struct.Struct("<HII")        # key length, float count, index count
+_GRID_HEADER = struct.Struct("<4sHII")      # magic, version, width, height
+_NAV_HEADER = struct.Struct("<4sHH")        # magic, version, field count
+_NAV_FIELD = struct.Struct("<HI")           # name length, value count
+
+
+def version_dir(root: str = BAKE_DIR) -> str:
+    return os.path.join(root, f"v{BAKE_VERSION}")
+
+
+def source_hash(rows: Sequence[str], texture_prefix: str = "") -> str:
+    from lib.chunks import CHUNK_SIZE
+
+    h = hashlib.sha1()
+    h.update(f"{BAKE_VERSION}:{CHUNK_SIZE}:{texture_prefix}\n".encode("utf-8"))
+    h.update("\n".join(rows).encode("ascii"))
+    return h.hexdigest()
+
+
+def _write(path: str, raw: bytes) -> None:
+    from lib.saves import atomic_write
+    atomic_write(path, raw)
+
+
+# ---------------------------------------------------------------------------
+# ENCODING
+# ---------------------------------------------------------------------------
+
+def encode_geometry(chunk_size: int, meshes: Dict[Tuple[int, int], Dict[str, Tuple[array, array]]]) -> bytes:
+    out = [_GEOM_HEADER.pack(GEOMETRY_MAGIC, BAKE_VERSION, chunk_size, len(meshes))]
+    for (cx, cy), mesh in sorted(meshes.items()):
+        out.append(_CHUNK_HEADER.pack(cx, cy, len(mesh)))
+        for key, (vertices, indices) in sorted(mesh.items()):
+            raw_key = key.encode("utf-8")
+            out.append(_PART_HEADER.pack(len(raw_key), len(vertices), len(indices)))
+            out.append(raw_key)
+            out.append(vertices.tobytes())
+            out.append(indices.tobytes())
+    return b"".join(out)
+
+
+class BakedGeometry:
+    """
+    Index over geometry.bin; chunk meshes are materialized on request.
+    """
+    def __init__(self, raw: bytes):
+        magic, version, self.chunk_size, count = _GEOM_HEADER.unpack_from(raw)
+        if magic != GEOMETRY_MAGIC or version != BAKE_VERSION:
+            raise ValueError("not a current geometry bake")
+
+        self._raw = memoryview(raw)
+        self._chunks: Dict[Tuple[int, int], List[Tuple[str, int, int, int]]] = {}
+        offset = _GEOM_HEADER.size
+        for _ in range(count):
+            cx, cy, parts = _CHUNK_HEADER.unpack_from(raw, offset)
+            offset += _CHUNK_HEADER.size
+            entries = []
+            for _ in range(parts):
+                key_len, floats, ints = _PART_HEADER.unpack_from(raw, offset)
+                offset += _PART_HEADER.size
+                key = bytes(raw[offset:offset + key_len]).decode("utf-8")
+                offset += key_len
+                entries.append((key, offset, floats, ints))
+                offset += (floats + ints) * 4
+            self._chunks[(cx, cy)] = entries
+
+    def __contains__(self, chunk) -> bool:
+        return chunk in self._chunks
+
+    def mesh(self, chunk: Tuple[int, int]) -> Optional[Dict[str, Tuple[array, array]]]:
+        entries = self._chunks.get(chunk)
+        if entries is None:
+            return None
+        mesh = {}
+        for key, offset, floats, ints in entries:
+            vertices = array("f")
+            vertices.frombytes(self._raw[offset:offset + floats * 4])
+            indices = array("I")
+            indices.frombytes(self._raw[offset + floats * 4:offset + (floats + ints) * 4])
+            mesh[key] = (vertices, indices)
+        return mesh
+
+
+def encode_grid(grid) -> bytes:
+    return _GRID_HEADER.pack(GRID_MAGIC, BAKE_VERSION, grid.width, grid.height) + bytes(grid.chars) + bytes(grid.solid)
+
+
+def encode_nav(fields: Dict[str, array]) -> bytes:
+    out = [_NAV_HEADER.pack(NAV_MAGIC, BAKE_VERSION, len(fields))]
+    for name, values in sorted(fields.items()):
+        raw_name = name.encode("utf-8")
+        out.append(_NAV_FIELD.pack(len(raw_name), len(values)))
+        out.append(raw_name)
+        out.append(values.tobytes())
+    return b"".join(out)
+
+
+def decode_nav(raw: bytes) -> Dict[str, array]:
+    magic, version, count = _NAV_HEADER.unpack_from(raw)
+    if magic != NAV_MAGIC or version != BAKE_VERSION:
+        raise ValueError("not a current nav bake")
+    fields = {}
+    offset = _NAV_HEADER.size
+    for _ in range(count):
+        name_len, n = _NAV_FIELD.unpack_from(raw, offset)
+        offset += _NAV_FIELD.size
+        name = raw[offset:offset + name_len].decode("utf-8")
+        offset += name_len
+        values = array("H")
+        values.frombytes(raw[offset:offset + n * 2])
+        offset += n * 2
+        fields[name] = values
+    return fields
+
+
+# ---------------------------------------------------------------------------
+# WORKER
+# ---------------------------------------------------------------------------
+
+def bake_wing(wing: str, rows: List[str], texture_prefix: Optional[str], out_dir: str) -> Dict[str, Any]:
+    """
+    Runs in a worker process. Writes the wing's artifacts to out_dir and
+    returns its manifest entry.
+    """
+    from lib.chunks import CHUNK_SIZE, mesh_chunk
+    from lib.grid import TileGrid
+    from lib.rooms import build_rooms, distance_field, nav_targets
+    from lib.textures import WING_TEXTURE_PREFIX
+
+    if texture_prefix:
+        WING_TEXTURE_PREFIX[wing] = texture_prefix
+
+    t0 = time.perf_counter()
+    timings = {}
+    os.makedirs(out_dir, exist_ok=True)
+
+    grid = TileGrid(rows)
+    files = {"grid.bin": encode_grid(grid)}
+    timings["grid_ms"] = (time.perf_counter() - t0) * 1000.0
+
+    t = time.perf_counter()
+    chunks_x = -(-grid.width // CHUNK_SIZE)
+    chunks_y = -(-grid.height // CHUNK_SIZE)
+    meshes = {
+        (cx, cy): mesh_chunk(grid, (cx, cy), wing)
+        for cy in range(chunks_y) for cx in range(chunks_x)
+    }
+    files["geometry.bin"] = encode_geometry(CHUNK_SIZE, meshes)
+    timings["geometry_ms"] = (time.perf_counter() - t) * 1000.0
+
+    t = time.perf_counter()
+    graph = build_rooms(grid)
+    files["rooms.json"] = json.dumps(graph.to_dict(), separators=(",", ":")).encode("utf-8")
+    files["rooms.bin"] = graph.room_of.tobytes()
+    timings["rooms_ms"] = (time.perf_counter() - t) * 1000.0
+
+    t = time.perf_counter()
+    fields = {name: distance_field(grid, tiles) for name, tiles in nav_targets(grid).items()}
+    files["nav.bin"] = encode_nav(fields)
+    timings["nav_ms"] = (time.perf_counter() - t) * 1000.0
+
+    for name, raw in files.items():
+        _write(os.path.join(out_dir, name), raw)
+
+    return {
+        "source_hash": source_hash(rows, texture_prefix or ""),
+        "size": [grid.width, grid.height],
+        "chunks": len(meshes),
+        "rooms": len(graph.rooms),
+        "portals": len(graph.portals),
+        "nav_fields": sorted(fields),
+        "files": {name: len(raw) for name, raw in files.items()},
+        "bake_ms": (time.perf_counter() - t0) * 1000.0,
+        **timings,
+    }
+
+
+# ---------------------------------------------------------------------------
+# DRIVER
+# ---------------------------------------------------------------------------
+
+def load_manifest(root: str = BAKE_DIR) -> Dict[str, Any]:
+    path = os.path.join(version_dir(root), MANIFEST)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": BAKE_VERSION, "wings": {}}
+    if manifest.get("version") != BAKE_VERSION:
+        return {"version": BAKE_VERSION, "wings": {}}
+    return manifest
+
+
+def _current(entry: Optional[Dict[str, Any]], digest: str, wing_dir: str) -> bool:
+    if not entry or entry.get("source_hash") != digest:
+        return False
+    return all(os.path.exists(os.path.join(wing_dir, name)) for name in entry.get("files", {}))
+
+
+def bake(wings: Optional[Sequence[str]] = None, jobs: Optional[int] = None,
+         force: bool = False, root: str = BAKE_DIR) -> Dict[str, Any]:
+    from lib.maps import MAP_DATA
+    from lib.textures import WING_TEXTURE_PREFIX
+
+    out = version_dir(root)
+    manifest = load_manifest(root)
+    entries = manifest["wings"]
+
+    todo = []
+    for wing in wings or list(MAP_DATA):
+        rows = MAP_DATA[wing]
+        prefix = WING_TEXTURE_PREFIX.get(wing, "")
+        digest = source_hash(rows, prefix)
+        if not force and _current(entries.get(wing), digest, os.path.join(out, wing)):
+            print(f"  {wing:<24} up to date")
+            continue
+        todo.append((wing, rows, prefix))
+
+    t0 = time.perf_counter()
+    if todo:
+        workers = max(1, min(jobs or os.cpu_count() or 1, len(todo)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(bake_wing, wing, rows, prefix, os.path.join(out, wing)): wing
+                for wing, rows, prefix in todo
+            }
+            for future in as_completed(futures):
+                wing = futures[future]
+                entries[wing] = entry = future.result()
+                print(f"  {wing:<24} {entry['bake_ms']:8.1f} ms  {entry['chunks']:5d} chunks  "
+                      f"{entry['rooms']:5d} rooms  {entry['portals']:5d} portals")
+        manifest["workers"] = workers
+
+    manifest["version"] = BAKE_VERSION
+    manifest["baked_at"] = time.time()
+    manifest["wall_ms"] = (time.perf_counter() - t0) * 1000.0
+    os.makedirs(out, exist_ok=True)
+    _write(os.path.join(out, MANIFEST), json.dumps(manifest, indent=1).encode("utf-8"))
+    return manifest
+
+
+# ---------------------------------------------------------------------------
+# RUNTIME
+# ---------------------------------------------------------------------------
+
+def load_baked(wing: str, rows: Sequence[str], root: str = BAKE_DIR) -> Optional[BakedGeometry]:
+    """
+    The wing's baked chunk geometry, or None when there is no bake or it
+    no longer matches the map.
+    """
+    from lib.textures import WING_TEXTURE_PREFIX
+
+    entry = load_manifest(root)["wings"].get(wing)
+    if not entry or entry.get("source_hash") != source_hash(rows, WING_TEXTURE_PREFIX.get(wing, "")):
+        return None
+    try:
+        with open(os.path.join(version_dir(root), wing, "geometry.bin"), "rb") as f:
+            return BakedGeometry(f.read())
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def load_baked_rooms(wing: str, rows: Sequence[str], root: str = BAKE_DIR):
+    """
+    The wing's baked RoomGraph, or None when there is no bake or it no
+    longer matches the map.
+    """
+    from lib.rooms import RoomGraph
+    from lib.textures import WING_TEXTURE_PREFIX
+
+    entry = load_manifest(root)["wings"].get(wing)
+    if not entry or entry.get("source_hash") != source_hash(rows, WING_TEXTURE_PREFIX.get(wing, "")):
+        return None
+    wing_dir = os.path.join(version_dir(root), wing)
+    try:
+        with open(os.path.join(wing_dir, "rooms.json"), encoding="utf-8") as f:
+            data = json.load(f)
+        room_of = array("i")
+        with open(os.path.join(wing_dir, "rooms.bin"), "rb") as f:
+            room_of.frombytes(f.read())
+        return RoomGraph.from_dict(data, room_of)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bake wings to " + BAKE_DIR)
+    parser.add_argument("--wings", nargs="*", help="wings to bake (default: all of MAP_DATA)")
+    parser.add_argument("-j", "--jobs", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="rebake even if up to date")
+    parser.add_argument("--out", default=BAKE_DIR)
+    parser.add_argument("--stress", action="append", default=[], metavar="WxH",
+                        help="also bake a generated map of this size (repeatable)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for --stress maps")
+    args = parser.parse_args(argv)
+
+    if args.stress:
+        from lib.mapgen import MapSpec, parse_size, register_map
+        from lib.maps import MAP_DATA
+
+        wings = args.wings or list(MAP_DATA)
+        for size in args.stress:
+            wings.append(register_map(MapSpec(*parse_size(size), seed=args.seed)))
+        args.wings = wings
+
+    manifest = bake(args.wings, args.jobs, args.force, args.out)
+    print(f"Baked in {manifest['wall_ms']:.1f} ms -> {version_dir(args.out)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
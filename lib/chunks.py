@@ -0,0 +1,443 @@
+# lib/chunks.py
+from __future__ import annotations
+
+import math
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from lib.constants import TILE_SIZE, WALL_HEIGHT
+from lib.grid import WALL_CHARS, TileGrid
+
+
+CHUNK_SIZE = 16                 # tiles per chunk side
+STREAM_RADIUS = 3               # chunks kept loaded around the player's chunk
+UNLOAD_MARGIN = 1               # extra ring before a chunk is unloaded
+STREAM_BUDGET = 1.0 / 500.0     # main-thread seconds per frame for meshing/upload
+MAX_FREE_SLOTS = 16             # unloaded chunk buffers kept for reuse
+
+STRIDE = 8                      # floats per vertex: x y z, nx ny nz, u v
+
+Chunk = Tuple[int, int]
+# texture key -> (interleaved V3N3T2 floats, uint32 triangle indices)
+ChunkMesh = Dict[str, Tuple[array, array]]
+
+_WALL = frozenset(ord(c) for c in WALL_CHARS)
+
+
+# ---------------------------------------------------------------------------
+# MESHING (plain arrays, no scene graph; safe for worker threads/processes)
+# ---------------------------------------------------------------------------
+
+def _add_quad(mesh: ChunkMesh, key: str, verts, normal) -> None:
+    vertices, indices = mesh.get(key) or mesh.setdefault(key, (array("f"), array("I")))
+    base = len(vertices) // STRIDE
+    nx, ny, nz = normal
+    for x, y, z, u, v in verts:
+        vertices.extend((x, y, z, nx, ny, nz, u, v))
+    indices.extend((base, base + 1, base + 2, base, base + 2, base + 3))
+
+
+def _wall_faces(mesh, key, x, y, north, south, west, east):
+    # Outward-facing quads, UVs 0..1 across each face
+    s = TILE_SIZE
+    h = WALL_HEIGHT
+    x0, y0 = x * s, y * s
+    x1, y1 = x0 + s, y0 + s
+    if north:
+        _add_quad(mesh, key, ((x0, y0, 0, 0, 0), (x1, y0, 0, 1, 0), (x1, y0, h, 1, 1), (x0, y0, h, 0, 1)), (0, -1, 0))
+    if south:
+        _add_quad(mesh, key, ((x1, y1, 0, 0, 0), (x0, y1, 0, 1, 0), (x0, y1, h, 1, 1), (x1, y1, h, 0, 1)), (0, 1, 0))
+    if west:
+        _add_quad(mesh, key, ((x0, y1, 0, 0, 0), (x0, y0, 0, 1, 0), (x0, y0, h, 1, 1), (x0, y1, h, 0, 1)), (-1, 0, 0))
+    if east:
+        _add_quad(mesh, key, ((x1, y0, 0, 0, 0), (x1, y1, 0, 1, 0), (x1, y1, h, 1, 1), (x1, y0, h, 0, 1)), (1, 0, 0))
+
+
+def chunk_bounds(grid: TileGrid, chunk: Chunk, chunk_size: int = CHUNK_SIZE) -> Tuple[int, int, int, int]:
+    cx, cy = chunk
+    x0, y0 = cx * chunk_size, cy * chunk_size
+    return x0, y0, min(x0 + chunk_size, grid.width), min(y0 + chunk_size, grid.height)
+
+
+def iter_mesh_chunk(grid: TileGrid, chunk: Chunk, pwing: str, chunk_size: int = CHUNK_SIZE):
+    """
+    Generator version of mesh_chunk: yields after each tile row so the
+    streamer can stop mid-chunk when its frame budget runs out. Returns
+    the mesh.
+
+    Walls, floor and ceiling of one chunk, in world coordinates, grouped by
+    texture key. Wall faces are only emitted towards open tiles and door
+    tiles (inside the map), floor and ceiling are merged into one quad per
+    run of non-wall tiles in a row. Doors themselves are dynamic
+    (lib/doors.py); their jambs and floor are meshed here.
+
+    Faces depend on the tile characters, not on grid.solid, so an open
+    door never changes the chunk mesh.
+    """
+    from lib.textures import wing_texture_key
+
+    chars = grid.chars
+    w, h = grid.width, grid.height
+    x0, y0, x1, y1 = chunk_bounds(grid, chunk, chunk_size)
+
+    def open_tile(x, y):
+        return 0 <= x < w and 0 <= y < h and chars[y * w + x] not in _WALL
+
+    wall_keys = {c: wing_texture_key(pwing, "wall", chr(c)) for c in _WALL}
+    floor_key = wing_texture_key(pwing, "floor")
+    ceiling_key = wing_texture_key(pwing, "ceiling")
+
+    s = TILE_SIZE
+    top = WALL_HEIGHT
+    mesh: ChunkMesh = {}
+
+    for y in range(y0, y1):
+        row = y * w
+        run_start = None
+        for x in range(x0, x1 + 1):
+            c = chars[row + x] if x < x1 else None
+
+            if c in _WALL:
+                _wall_faces(
+                    mesh, wall_keys[c], x, y,
+                    north=open_tile(x, y - 1),
+                    south=open_tile(x, y + 1),
+                    west=open_tile(x - 1, y),
+                    east=open_tile(x + 1, y),
+                )
+
+            # Floor and ceiling run under everything but walls (doors can open)
+            walkable = c is not None and c not in _WALL
+            if walkable and run_start is None:
+                run_start = x
+            elif not walkable and run_start is not None:
+                n = x - run_start
+                fx0, fx1 = run_start * s, x * s
+                fy0, fy1 = y * s, (y + 1) * s
+                _add_quad(mesh, floor_key,
+                          ((fx0, fy0, 0, 0, 0), (fx1, fy0, 0, n, 0), (fx1, fy1, 0, n, 1), (fx0, fy1, 0, 0, 1)),
+                          (0, 0, 1))
+                _add_quad(mesh, ceiling_key,
+                          ((fx0, fy0, top, 0, 0), (fx0, fy1, top, 0, 1), (fx1, fy1, top, n, 1), (fx1, fy0, top, n, 0)),
+                          (0, 0, -1))
+                run_start = None
+
+        yield
+
+    return mesh
+
+
+def mesh_chunk(grid: TileGrid, chunk: Chunk, pwing: str, chunk_size: int = CHUNK_SIZE) -> ChunkMesh:
+    builder = iter_mesh_chunk(grid, chunk, pwing, chunk_size)
+    while True:
+        try:
+            next(builder)
+        except StopIteration as done:
+            return done.value
+
+
+# ---------------------------------------------------------------------------
+# GPU SIDE
+# ---------------------------------------------------------------------------
+
+class _Part:
+    """
+    One Geom (one texture) of a chunk; its vertex and index arrays are
+    refilled in place when the slot is reused.
+    """
+    __slots__ = ("np", "node", "vdata", "prim")
+
+    def __init__(self, parent):
+        from panda3d.core import Geom, GeomEnums, GeomNode, GeomTriangles, GeomVertexData, GeomVertexFormat
+
+        self.vdata = GeomVertexData("chunk", GeomVertexFormat.getV3n3t2(), Geom.UHStatic)
+        self.prim = GeomTriangles(Geom.UHStatic)
+        self.prim.setIndexType(GeomEnums.NT_uint32)
+        geom = Geom(self.vdata)
+        geom.addPrimitive(self.prim)
+        self.node = GeomNode("chunk_part")
+        self.node.addGeom(geom)
+        self.np = parent.attachNewNode(self.node)
+
+    def fill(self, vertices: array, indices: array) -> None:
+        self.vdata.uncleanSetNumRows(len(vertices) // STRIDE)
+        memoryview(self.vdata.modifyArray(0)).cast("B")[:] = vertices.tobytes()
+
+        index_array = self.prim.modifyVertices()
+        index_array.uncleanSetNumRows(len(indices))
+        memoryview(index_array).cast("B")[:] = indices.tobytes()
+
+        self.node.markInternalBoundsStale()
+
+
+class ChunkSlot:
+    """
+    Scene-graph holder for one loaded chunk. Slots are pooled: unloading
+    detaches the node and keeps the buffers for the next chunk.
+    """
+    def __init__(self):
+        from panda3d.core import NodePath
+
+        self.root = NodePath("chunk")
+        self.parts: List[_Part] = []
+        self.chunk: Optional[Chunk] = None
+        self.vertex_bytes = 0
+
+    def fill(self, chunk: Chunk, mesh: ChunkMesh) -> None:
+        from lib.textures import TEXTURES
+
+        self.chunk = chunk
+        self.root.setName(f"chunk_{chunk[0]}_{chunk[1]}")
+        self.vertex_bytes = 0
+
+        for i, (key, (vertices, indices)) in enumerate(sorted(mesh.items())):
+            if i == len(self.parts):
+                self.parts.append(_Part(self.root))
+            part = self.parts[i]
+            part.fill(vertices, indices)
+            part.np.setTexture(TEXTURES[key], 1)
+            part.np.unstash()
+            self.vertex_bytes += len(vertices) * 4 + len(indices) * 4
+
+        for part in self.parts[len(mesh):]:
+            part.np.stash()
+
+
+class ChunkStreamer:
+    """
+    Keeps the chunks within `radius` of the player's chunk built under
+    `parent` and unloads those beyond radius + UNLOAD_MARGIN. Loading is
+    nearest-first and limited to `budget` seconds per update, so walking
+    into new territory costs a slice per frame rather than a hitch. The
+    number of live chunks, and so memory, depends on the radius only.
+
+    Collision needs nothing per chunk: it is the compiled TileGrid.
+
+    With `baked` (lib/bake.py BakedGeometry) chunk meshes come from the
+    offline bake instead of being meshed here.
+    """
+    def __init__(self, grid: TileGrid, pwing: str, parent, radius: int = STREAM_RADIUS,
+                 chunk_size: int = CHUNK_SIZE, budget: float = STREAM_BUDGET, baked=None):
+        if baked is not None and baked.chunk_size != chunk_size:
+            baked = None
+        self.grid = grid
+        self.baked = baked
+        self.pwing = pwing
+        self.parent = parent
+        self.radius = radius
+        self.chunk_size = chunk_size
+        self.budget = budget
+
+        self.chunks_x = math.ceil(grid.width / chunk_size)
+        self.chunks_y = math.ceil(grid.height / chunk_size)
+
+        self.loaded: Dict[Chunk, ChunkSlot] = {}
+        self._free: List[ChunkSlot] = []
+        self._queue: List[Chunk] = []
+        self._center: Optional[Chunk] = None
+        # Chunk being meshed across frames: (chunk, generator, seconds spent)
+        self._building = None
+
+        # Chunks whose tiles changed since the bake
+        self._dirty = set()
+
+        self.stats = {"built": 0, "unloaded": 0, "reused": 0, "build_ms": 0.0, "patched": 0, "patch_ms": 0.0}
+
+    # ------------------------------------------------------------
+    # CHUNK MATH
+    # ------------------------------------------------------------
+    def chunk_of(self, wx: float, wy: float) -> Chunk:
+        span = self.chunk_size * self.grid.tile_size
+        cx = min(self.chunks_x - 1, max(0, int(wx // span)))
+        cy = min(self.chunks_y - 1, max(0, int(wy // span)))
+        return cx, cy
+
+    def chunks_touching(self, x: int, y: int) -> List[Chunk]:
+        """
+        Chunks whose geometry depends on tile (x, y): its own, plus the
+        neighbour's chunk for each neighbour across a chunk border (their
+        wall faces toward the tile).
+        """
+        cs = self.chunk_size
+        found = []
+        for tx, ty in ((x, y), (x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if self.grid.in_bounds(tx, ty):
+                chunk = (tx // cs, ty // cs)
+                if chunk not in found:
+                    found.append(chunk)
+        return found
+
+    def _around(self, center: Chunk, radius: int) -> List[Chunk]:
+        cx, cy = center
+        found = [
+            (x, y)
+            for y in range(max(0, cy - radius), min(self.chunks_y, cy + radius + 1))
+            for x in range(max(0, cx - radius), min(self.chunks_x, cx + radius + 1))
+        ]
+        found.sort(key=lambda c: (c[0] - cx) ** 2 + (c[1] - cy) ** 2)
+        return found
+
+    # ------------------------------------------------------------
+    # LOAD / UNLOAD
+    # ------------------------------------------------------------
+    def _baked_mesh(self, chunk: Chunk) -> Optional[ChunkMesh]:
+        if self.baked is None or chunk in self._dirty:
+            return None
+        return self.baked.mesh(chunk)
+
+    def _load(self, chunk: Chunk) -> None:
+        t0 = time.perf_counter()
+        mesh = self._baked_mesh(chunk)
+        if mesh is None:
+            mesh = mesh_chunk(self.grid, chunk, self.pwing, self.chunk_size)
+        self._upload(chunk, mesh)
+        self.stats["build_ms"] += (time.perf_counter() - t0) * 1000.0
+
+    def _upload(self, chunk: Chunk, mesh: ChunkMesh) -> None:
+        if self._free:
+            slot = self._free.pop()
+            self.stats["reused"] += 1
+        else:
+            slot = ChunkSlot()
+        slot.fill(chunk, mesh)
+        slot.root.reparentTo(self.parent)
+
+        self.loaded[chunk] = slot
+        self.stats["built"] += 1
+
+    def _unload(self, chunk: Chunk) -> None:
+        slot = self.loaded.pop(chunk)
+        slot.root.detachNode()
+        slot.chunk = None
+        if len(self._free) < MAX_FREE_SLOTS:
+            self._free.append(slot)
+        else:
+            slot.root.removeNode()
+        self.stats["unloaded"] += 1
+
+    def _recenter(self, center: Chunk) -> None:
+        self._center = center
+        keep = set(self._around(center, self.radius + UNLOAD_MARGIN))
+        for chunk in [c for c in self.loaded if c not in keep]:
+            self._unload(chunk)
+        self._queue = [c for c in self._around(center, self.radius) if c not in self.loaded]
+        if self._building and self._building[0] not in self._queue:
+            self._building = None
+
+    def update(self, wx: float, wy: float) -> None:
+        center = self.chunk_of(wx, wy)
+        if center != self._center:
+            self._recenter(center)
+
+        t0 = time.perf_counter()
+        deadline = t0 + self.budget
+        while self._queue and time.perf_counter() < deadline:
+            if self._building is None:
+                chunk = self._queue[0]
+                mesh = self._baked_mesh(chunk)
+                if mesh is not None:
+                    self._queue.pop(0)
+                    self._upload(chunk, mesh)
+                    continue
+                self._building = (chunk, iter_mesh_chunk(self.grid, chunk, self.pwing, self.chunk_size))
+            chunk, builder = self._building
+            try:
+                next(builder)
+            except StopIteration as done:
+                self._building = None
+                self._queue.remove(chunk)
+                self._upload(chunk, done.value)
+        self.stats["build_ms"] += (time.perf_counter() - t0) * 1000.0
+
+    def iter_load(self, wx: float, wy: float) -> Iterator[float]:
+        """
+        Loads everything around (wx, wy) now, yielding progress per chunk;
+        used behind the loading screen.
+        """
+        self._recenter(self.chunk_of(wx, wy))
+        self._building = None
+        total = len(self._queue) or 1
+        while self._queue:
+            self._load(self._queue.pop(0))
+            yield 1.0 - len(self._queue) / total
+
+    # ------------------------------------------------------------
+    # RUNTIME EDITS
+    # ------------------------------------------------------------
+    def set_tile(self, x: int, y: int, char: str) -> List[Chunk]:
+        """
+        Changes one tile: the grid (and so collision) is updated, and every
+        loaded chunk touching the tile is re-meshed into its existing
+        buffers. Unloaded chunks pick the change up when they stream in.
+        Cost is at most three chunk meshes, whatever the map size.
+        Returns the chunks touched.
+        """
+        t0 = time.perf_counter()
+        self.grid.set_char(x, y, char)
+        touched = self.chunks_touching(x, y)
+        for chunk in touched:
+            self._dirty.add(chunk)
+            if self._building is not None and self._building[0] == chunk:
+                self._building = None
+            slot = self.loaded.get(chunk)
+            if slot is not None:
+                slot.fill(chunk, mesh_chunk(self.grid, chunk, self.pwing, self.chunk_size))
+                self.stats["patched"] += 1
+        self.stats["patch_ms"] += (time.perf_counter() - t0) * 1000.0
+        return touched
+
+    def verify(self) -> List[Chunk]:
+        """
+        Reads back every loaded chunk's vertex and index data and compares
+        it with a full rebuild from the grid. Returns the chunks that
+        differ; empty when incremental patches match.
+        """
+        from lib.textures import TEXTURES
+
+        bad = []
+        for chunk, slot in sorted(self.loaded.items()):
+            mesh = mesh_chunk(self.grid, chunk, self.pwing, self.chunk_size)
+            visible = [part for part in slot.parts if not part.np.isStashed()]
+            ok = len(visible) == len(mesh)
+            for part, (key, (vertices, indices)) in zip(visible, sorted(mesh.items())):
+                ok = ok and part.np.getTexture() == TEXTURES[key]
+                ok = ok and bytes(memoryview(part.vdata.getArray(0))) == vertices.tobytes()
+                ok = ok and bytes(memoryview(part.prim.getVertices())) == indices.tobytes()
+            if not ok:
+                bad.append(chunk)
+        return bad
+
+    # ------------------------------------------------------------
+    # MEMORY
+    # ------------------------------------------------------------
+    def pooled(self) -> List[ChunkSlot]:
+        return list(self._free)
+
+    def trim_pool(self) -> int:
+        """
+        Frees the pooled slots of unloaded chunks. Returns how many.
+        """
+        count = len(self._free)
+        for slot in self._free:
+            slot.root.removeNode()
+        self._free.clear()
+        return count
+
+    def set_radius(self, radius: int) -> None:
+        self.radius = radius
+        if self._center is not None:
+            self._recenter(self._center)
+
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def vertex_bytes(self) -> int:
+        return sum(slot.vertex_bytes for slot in self.loaded.values())
+
+    def destroy(self) -> None:
+        for chunk in list(self.loaded):
+            self._unload(chunk)
+        for slot in self._free:
+            slot.root.removeNode()
+        self._free.clear()
@@ -0,0 +1,304 @@
+# lib/doors.py
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from panda3d.core import (
+    Geom,
+    GeomNode,
+    GeomTriangles,
+    GeomVertexData,
+    GeomVertexFormat,
+    GeomVertexWriter,
+    NodePath,
+    SamplerState,
+)
+
+from lib.constants import TILE_SIZE, WALL_HEIGHT
+from lib.grid import DOOR_CHARS, TileGrid
+from lib.textures import TEXTURES
+from lib.World import DOOR_U_MARGIN, DOOR_U_SCALE, DOOR_V_MARGIN, DOOR_V_SCALE
+
+
+DOOR_SWING_TIME = 0.6           # seconds to open or close
+DOOR_OPEN_ANGLE = 90.0          # degrees the leaf swings away from the user
+DOOR_PASSABLE_AT = 0.6          # swing fraction after which the doorway is open
+LEAF_THICKNESS = 0.12
+
+UNLOCKED_DOOR_CHARS = frozenset("@-")
+DOOR_TEXTURE = "door_old"
+
+# Part of the door image framed on a door face
+_U0, _U1 = DOOR_U_MARGIN * DOOR_U_SCALE, (1.0 - DOOR_U_MARGIN) * DOOR_U_SCALE
+_V0, _V1 = DOOR_V_MARGIN * DOOR_V_SCALE, (1.0 - DOOR_V_MARGIN) * DOOR_V_SCALE
+
+Tile = Tuple[int, int]
+
+
+# ---------------------------------------------------------------------------
+# SHARED LEAF
+# ---------------------------------------------------------------------------
+
+_LEAF: Dict[str, NodePath] = {}
+
+
+def _build_leaf(texture_key: str) -> NodePath:
+    """
+    Door leaf hinged at the origin, spanning +X for one tile, centred on
+    Y=0. Built once per texture; every door instances it.
+    """
+    vdata = GeomVertexData("door_leaf", GeomVertexFormat.getV3n3t2(), Geom.UHStatic)
+    v = GeomVertexWriter(vdata, "vertex")
+    n = GeomVertexWriter(vdata, "normal")
+    t = GeomVertexWriter(vdata, "texcoord")
+    tris = GeomTriangles(Geom.UHStatic)
+
+    s = TILE_SIZE
+    h = WALL_HEIGHT
+    d = LEAF_THICKNESS / 2.0
+    idx = 0
+
+    def quad(verts, normal):
+        nonlocal idx
+        for x, y, z, u, v_ in verts:
+            v.addData3(x, y, z)
+            n.addData3(*normal)
+            t.addData2(u, v_)
+        tris.addVertices(idx, idx + 1, idx + 2)
+        tris.addVertices(idx, idx + 2, idx + 3)
+        idx += 4
+
+    # Faces, then the thin edges with a sliver of the image
+    quad([(0, -d, 0, _U0, _V0), (s, -d, 0, _U1, _V0), (s, -d, h, _U1, _V1), (0, -d, h, _U0, _V1)], (0, -1, 0))
+    quad([(s, d, 0, _U0, _V0), (0, d, 0, _U1, _V0), (0, d, h, _U1, _V1), (s, d, h, _U0, _V1)], (0, 1, 0))
+    quad([(0, d, 0, _U0, _V0), (0, -d, 0, _U0, _V0), (0, -d, h, _U0, _V1), (0, d, h, _U0, _V1)], (-1, 0, 0))
+    quad([(s, -d, 0, _U1, _V0), (s, d, 0, _U1, _V0), (s, d, h, _U1, _V1), (s, -d, h, _U1, _V1)], (1, 0, 0))
+    quad([(0, -d, h, _U0, _V1), (s, -d, h, _U1, _V1), (s, d, h, _U1, _V1), (0, d, h, _U0, _V1)], (0, 0, 1))
+
+    geom = Geom(vdata)
+    geom.addPrimitive(tris)
+    node = GeomNode("door_leaf")
+    node.addGeom(geom)
+
+    tex = TEXTURES[texture_key]
+    tex.setWrapU(SamplerState.WM_clamp)
+    tex.setWrapV(SamplerState.WM_clamp)
+
+    np = NodePath(node)
+    np.setTexture(tex)
+    return np
+
+
+def door_leaf(texture_key: str = DOOR_TEXTURE) -> NodePath:
+    leaf = _LEAF.get(texture_key)
+    if leaf is None:
+        leaf = _LEAF[texture_key] = _build_leaf(texture_key)
+    return leaf
+
+
+# ---------------------------------------------------------------------------
+# DOORS
+# ---------------------------------------------------------------------------
+
+class Door:
+    """
+    One door tile. progress runs 0 (closed) .. 1 (open); swing is the
+    active _Swing while it animates.
+    """
+    __slots__ = ("tile", "char", "unlocked", "along_x", "pivot", "progress", "sign", "swing")
+
+    def __init__(self, tile: Tile, char: str, along_x: bool, pivot: NodePath):
+        self.tile = tile
+        self.char = char
+        self.unlocked = char in UNLOCKED_DOOR_CHARS
+        self.along_x = along_x
+        self.pivot = pivot
+        self.progress = 0.0
+        self.sign = 1.0
+        self.swing: Optional[_Swing] = None
+
+    @property
+    def opening(self) -> bool:
+        return self.swing is not None and self.swing.target == 1.0
+
+    @property
+    def is_open(self) -> bool:
+        # Open or opening: the next use closes it
+        return self.swing.target == 1.0 if self.swing is not None else self.progress > 0.0
+
+
+class _Swing:
+    """
+    Pooled open/close animation. Stepped by DoorSystem.simulate on the
+    fixed timestep, so door timing (and the collision it gates) is the
+    same in every replay.
+    """
+    __slots__ = ("door", "target", "rate")
+
+    def __init__(self):
+        self.door: Optional[Door] = None
+        self.target = 0.0
+        self.rate = 0.0
+
+
+class DoorSystem:
+    """
+    Every door tile of a wing as an instance of one shared leaf under a
+    hinge pivot, kept apart from the static chunk geometry. Doors swing
+    open and closed; the tile's solidity in the grid follows, so
+    collision toggles per door with no other bookkeeping.
+    """
+    def __init__(self, grid: TileGrid, parent: NodePath):
+        self.grid = grid
+        self.root = parent.attachNewNode("doors")
+        self.doors: Dict[Tile, Door] = {}
+        # Tiles of doors that are not fully closed; raycasts still stop there
+        self.open_tiles = set()
+        # Bumped whenever a door is added or removed, opens or shuts, or its
+        # tile turns solid or passable, so caches derived from door state
+        # (lib/propagation.py, lib/sight.py) know to redo it
+        self.revision = 0
+
+        self._active: List[_Swing] = []
+        self._pool: List[_Swing] = []
+
+    def build(self) -> None:
+        for i, c in enumerate(self.grid.chars):
+            if chr(c) in DOOR_CHARS:
+                self.add(i % self.grid.width, i // self.grid.width)
+
+    # ------------------------------------------------------------
+    # DOOR SET
+    # ------------------------------------------------------------
+    def add(self, x: int, y: int) -> Door:
+        grid = self.grid
+        # Leaf runs along the wall the door sits in
+        along_x = grid.is_solid(x - 1, y) and grid.is_solid(x + 1, y)
+        if along_x:
+            pos = (x * TILE_SIZE, (y + 0.5) * TILE_SIZE, 0)
+        else:
+            pos = ((x + 0.5) * TILE_SIZE, y * TILE_SIZE, 0)
+
+        pivot = self.root.attachNewNode(f"door_{x}_{y}")
+        pivot.setPos(*pos)
+        pivot.setH(0.0 if along_x else 90.0)
+        door_leaf().instanceTo(pivot)
+
+        door = Door((x, y), grid.char(x, y), along_x, pivot)
+        self.doors[(x, y)] = door
+        grid.set_solid(x, y, True)
+        self.revision += 1
+        return door
+
+    def remove(self, x: int, y: int) -> Optional[Door]:
+        door = self.doors.pop((x, y), None)
+        if door is None:
+            return None
+        if door.swing is not None:
+            self._release(door.swing)
+        self.open_tiles.discard((x, y))
+        door.pivot.removeNode()
+        self.revision += 1
+        return door
+
+    def get(self, tile) -> Optional[Door]:
+        return self.doors.get(tile)
+
+    def states(self) -> Tuple[Tuple[int, int, bool], ...]:
+        return tuple((x, y, door.unlocked) for (x, y), door in sorted(self.doors.items()))
+
+    # ------------------------------------------------------------
+    # OPEN / CLOSE
+    # ------------------------------------------------------------
+    def toggle(self, tile: Tile, from_x: float, from_y: float, radius: float) -> bool:
+        """
+        Opens (away from from_x, from_y) or closes the door. A door won't
+        close on a footprint of `radius` standing in it. Returns whether
+        the door is open (or opening) afterwards.
+        """
+        door = self.doors[tile]
+        if not door.is_open:
+            if door.progress == 0.0:
+                # Swing away from the user
+                x, y = tile
+                if door.along_x:
+                    door.sign = 1.0 if from_y < (y + 0.5) * TILE_SIZE else -1.0
+                else:
+                    door.sign = 1.0 if from_x > (x + 0.5) * TILE_SIZE else -1.0
+            self._start(door, 1.0)
+            return True
+
+        if self.grid.overlaps(from_x, from_y, radius, tile):
+            return door.is_open
+        self._start(door, 0.0)
+        # Solid again at once so nothing slips in while it closes
+        self._set_solid(tile[0], tile[1], True)
+        return False
+
+    def open_now(self, tile: Tile) -> None:
+        door = self.doors[tile]
+        if door.swing is not None:
+            self._release(door.swing)
+        self._set_progress(door, 1.0)
+
+    def _start(self, door: Door, target: float) -> None:
+        swing = door.swing
+        if swing is None:
+            swing = self._pool.pop() if self._pool else _Swing()
+            swing.door = door
+            door.swing = swing
+            self._active.append(swing)
+        swing.target = target
+        swing.rate = 1.0 / DOOR_SWING_TIME
+        self._mark_open(door.tile, True)
+
+    def _release(self, swing: _Swing) -> None:
+        self._active.remove(swing)
+        swing.door.swing = None
+        swing.door = None
+        self._pool.append(swing)
+
+    def _set_progress(self, door: Door, progress: float) -> None:
+        door.progress = progress
+        door.pivot.setH((0.0 if door.along_x else 90.0) + door.sign * DOOR_OPEN_ANGLE * progress)
+
+        x, y = door.tile
+        if progress == 0.0:
+            self._mark_open(door.tile, False)
+            self._set_solid(x, y, True)
+        else:
+            self._mark_open(door.tile, True)
+            if (progress >= DOOR_PASSABLE_AT and door.opening) or progress == 1.0:
+                self._set_solid(x, y, False)
+
+    def _set_solid(self, x: int, y: int, solid: bool) -> None:
+        if self.grid.is_solid(x, y) != solid:
+            self.grid.set_solid(x, y, solid)
+            self.revision += 1
+
+    def _mark_open(self, tile: Tile, is_open: bool) -> None:
+        if (tile in self.open_tiles) != is_open:
+            if is_open:
+                self.open_tiles.add(tile)
+            else:
+                self.open_tiles.discard(tile)
+            self.revision += 1
+
+    def simulate(self, dt: float) -> None:
+        for swing in list(self._active):
+            door = swing.door
+            step = swing.rate * dt
+            if swing.target > door.progress:
+                progress = min(swing.target, door.progress + step)
+            else:
+                progress = max(swing.target, door.progress - step)
+            self._set_progress(door, progress)
+            if progress == swing.target:
+                self._release(swing)
+
+    def destroy(self) -> None:
+        for swing in list(self._active):
+            self._release(swing)
+        self.root.removeNode()
+        self.doors.clear()
+        self.open_tiles.clear()
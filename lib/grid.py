@@ -0,0 +1,173 @@
+# lib/grid.py
+from __future__ import annotations
+
+import math
+from typing import Container, Iterable, List, Optional, Sequence, Tuple
+
+from lib.constants import TILE_SIZE
+
+
+# Map legend for solid tiles; here rather than in lib/World.py so the grid
+# can be used (and baked) without importing Panda3D.
+WALL_CHARS = frozenset("#*")
+DOOR_CHARS = frozenset("$@-+")
+SOLID_CHARS = WALL_CHARS | DOOR_CHARS
+
+PLAYER_RADIUS = 0.35
+
+_EPS = 1e-6
+
+Tile = Tuple[int, int]
+
+
+class TileGrid:
+    """
+    Compiled map: one byte per tile for the character and one for
+    solidity, row-major. Out-of-bounds tiles count as solid.
+    """
+    def __init__(self, rows: Sequence[str], tile_size: float = TILE_SIZE):
+        self.width = len(rows[0]) if rows else 0
+        self.height = len(rows)
+        self.tile_size = tile_size
+        self.chars = bytearray("".join(rows).encode("ascii"))
+        self.solid = bytearray(1 if chr(c) in SOLID_CHARS else 0 for c in self.chars)
+
+    # ------------------------------------------------------------
+    # TILES
+    # ------------------------------------------------------------
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def char(self, x: int, y: int) -> str:
+        return chr(self.chars[y * self.width + x])
+
+    def is_solid(self, x: int, y: int) -> bool:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return True
+        return self.solid[y * self.width + x] == 1
+
+    def set_solid(self, x: int, y: int, solid: bool) -> None:
+        self.solid[y * self.width + x] = 1 if solid else 0
+
+    def set_char(self, x: int, y: int, char: str) -> None:
+        i = y * self.width + x
+        self.chars[i] = ord(char)
+        self.solid[i] = 1 if char in SOLID_CHARS else 0
+
+    def tile_at(self, wx: float, wy: float) -> Tile:
+        return int(math.floor(wx / self.tile_size)), int(math.floor(wy / self.tile_size))
+
+    def rows(self) -> List[str]:
+        w = self.width
+        return [self.chars[y * w:(y + 1) * w].decode("ascii") for y in range(self.height)]
+
+    def find(self, char: str) -> Optional[Tile]:
+        i = self.chars.find(char.encode("ascii"))
+        return None if i < 0 else (i % self.width, i // self.width)
+
+    # ------------------------------------------------------------
+    # SWEPT MOVEMENT
+    # ------------------------------------------------------------
+    def _blocked(self, x: int, y: int, ignore: Iterable[Tile]) -> bool:
+        return self.is_solid(x, y) and (x, y) not in ignore
+
+    def _span(self, lo: float, hi: float) -> range:
+        # Tiles overlapped by the open interval (lo, hi)
+        ts = self.tile_size
+        return range(int(math.floor((lo + _EPS) / ts)), int(math.ceil((hi - _EPS) / ts)))
+
+    def _sweep(self, pos: float, other: float, delta: float, radius: float,
+               axis: int, ignore: Iterable[Tile]) -> Tuple[float, bool]:
+        """
+        Moves a square footprint of half-size radius along one axis, scanning
+        every tile line the leading edge crosses. Returns (new pos, hit).
+        """
+        if delta == 0.0:
+            return pos, False
+
+        ts = self.tile_size
+        lanes = self._span(other - radius, other + radius)
+
+        if delta > 0:
+            edge = pos + radius
+            target = edge + delta
+            line = int(math.ceil((edge - _EPS) / ts))
+            while line * ts < target:
+                for lane in lanes:
+                    tile = (line, lane) if axis == 0 else (lane, line)
+                    if self._blocked(tile[0], tile[1], ignore):
+                        return line * ts - radius, True
+                line += 1
+            return pos + delta, False
+
+        edge = pos - radius
+        target = edge + delta
+        line = int(math.floor((edge + _EPS) / ts)) - 1
+        while (line + 1) * ts > target:
+            for lane in lanes:
+                tile = (line, lane) if axis == 0 else (lane, line)
+                if self._blocked(tile[0], tile[1], ignore):
+                    return (line + 1) * ts + radius, True
+            line -= 1
+        return pos + delta, False
+
+    def move(self, x: float, y: float, dx: float, dy: float, radius: float = PLAYER_RADIUS,
+             ignore: Iterable[Tile] = (), y_first: bool = False) -> Tuple[float, float, bool, bool]:
+        """
+        Swept move of the player footprint from (x, y) by (dx, dy). Axes
+        resolve one after the other, so a blocked axis stops while the
+        other keeps going (sliding along walls). Work is proportional to
+        the tiles crossed, and nothing is ever skipped, whatever the step
+        length. Returns (x, y, hit_x, hit_y).
+        """
+        ignore = frozenset(ignore)
+        if y_first:
+            y, hit_y = self._sweep(y, x, dy, radius, 1, ignore)
+            x, hit_x = self._sweep(x, y, dx, radius, 0, ignore)
+        else:
+            x, hit_x = self._sweep(x, y, dx, radius, 0, ignore)
+            y, hit_y = self._sweep(y, x, dy, radius, 1, ignore)
+        return x, y, hit_x, hit_y
+
+    def raycast(self, x: float, y: float, dx: float, dy: float,
+                max_distance: Optional[float] = None, also: Container[Tile] = ()) -> Optional[Tile]:
+        """
+        First solid tile (or tile in `also`) along the ray from (x, y) in
+        direction (dx, dy), walking tile boundaries (DDA). None if nothing
+        is hit within max_distance (world units).
+        """
+        length = math.hypot(dx, dy)
+        if length == 0.0:
+            return None
+        dx, dy = dx / length, dy / length
+
+        ts = self.tile_size
+        tx, ty = self.tile_at(x, y)
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        # Ray distance to the next vertical / horizontal tile boundary
+        next_x = ((tx + (step_x > 0)) * ts - x) / dx if dx else math.inf
+        next_y = ((ty + (step_y > 0)) * ts - y) / dy if dy else math.inf
+        delta_x = ts / abs(dx) if dx else math.inf
+        delta_y = ts / abs(dy) if dy else math.inf
+
+        limit = math.inf if max_distance is None else max_distance
+        # Out of bounds counts as solid, so this always terminates
+        while True:
+            if self.is_solid(tx, ty) or (tx, ty) in also:
+                return (tx, ty)
+            if next_x < next_y:
+                if next_x > limit:
+                    return None
+                tx += step_x
+                next_x += delta_x
+            else:
+                if next_y > limit:
+                    return None
+                ty += step_y
+                next_y += delta_y
+
+    def overlaps(self, x: float, y: float, radius: float, tile: Tile) -> bool:
+        tx, ty = tile
+        return (tx in self._span(x - radius, x + radius)
+                and ty in self._span(y - radius, y + radius))
@@ -0,0 +1,119 @@
+# lib/jobs.py
+from __future__ import annotations
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generator, List, Optional
+
+
+# Main-thread time per frame given to time-sliced jobs
+SLICE_BUDGET = 1.0 / 240.0
+
+
+@dataclass
+class Job:
+    name: str
+    kind: str                                   # "thread" | "sliced" | "wait"
+    on_done: Optional[Callable[[Any], None]] = None
+    future: Optional[Future] = None
+    generator: Optional[Generator] = None
+    condition: Optional[Callable[[], bool]] = None
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+    result: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def done(self) -> bool:
+        return self.finished is not None
+
+
+class JobSystem:
+    """
+    Runs warm-up style work without blocking the frame:
+      - thread jobs: plain callables on a small worker pool (file I/O,
+        image/audio decode, anything that releases the GIL)
+      - sliced jobs: generators stepped on the main thread for at most
+        SLICE_BUDGET per frame (scene graph work that must stay on the
+        main thread)
+      - wait jobs: complete when a condition becomes true
+    on_done callbacks always run on the main thread.
+    """
+    def __init__(self, base, workers: int = 2):
+        self.base = base
+        self.jobs: List[Job] = []
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        base.taskMgr.add(self._tick, "jobSystem", sort=-10)
+
+    # ------------------------------------------------------------
+    # SUBMISSION
+    # ------------------------------------------------------------
+    def submit_thread(self, name: str, fn: Callable[..., Any], *args, on_done=None) -> Job:
+        job = Job(name, "thread", on_done=on_done, future=self._pool.submit(fn, *args))
+        self.jobs.append(job)
+        return job
+
+    def submit_sliced(self, name: str, generator: Generator, on_done=None) -> Job:
+        job = Job(name, "sliced", on_done=on_done, generator=generator)
+        self.jobs.append(job)
+        return job
+
+    def submit_wait(self, name: str, condition: Callable[[], bool], on_done=None) -> Job:
+        job = Job(name, "wait", on_done=on_done, condition=condition)
+        self.jobs.append(job)
+        return job
+
+    # ------------------------------------------------------------
+    # STATUS
+    # ------------------------------------------------------------
+    def pending(self) -> List[Job]:
+        return [j for j in self.jobs if not j.done]
+
+    def all_done(self) -> bool:
+        return not self.pending()
+
+    def report(self) -> List[str]:
+        return [
+            f"{j.name}: {(j.finished - j.started) * 1000:.1f} ms" + (f" FAILED ({j.error})" if j.error else "")
+            for j in self.jobs if j.done
+        ]
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------------------------------------
+    # TICK
+    # ------------------------------------------------------------
+    def _finish(self, job: Job, result: Any = None, error: Optional[BaseException] = None) -> None:
+        job.finished = time.perf_counter()
+        job.result = result
+        job.error = error
+        if error is not None:
+            print(f"Job {job.name} failed: {error!r}")
+        elif job.on_done:
+            job.on_done(result)
+
+    def _tick(self, task):
+        deadline = time.perf_counter() + SLICE_BUDGET
+
+        for job in self.pending():
+            if job.kind == "thread":
+                if job.future.done():
+                    error = job.future.exception()
+                    self._finish(job, None if error else job.future.result(), error)
+
+            elif job.kind == "wait":
+                if job.condition():
+                    self._finish(job)
+
+            elif job.kind == "sliced":
+                while not job.done and time.perf_counter() < deadline:
+                    try:
+                        next(job.generator)
+                    except StopIteration as stop:
+                        self._finish(job, stop.value)
+                    except Exception as e:
+                        self._finish(job, error=e)
+
+        return task.cont
@@ -0,0 +1,309 @@
+# lib/mapgen.py
+"""
+Procedural stress maps in the lib/maps.py legend, for benchmarking the
+world, collision and pathfinding code at sizes the hand-made wings never
+reach.
+
+    python -m lib.mapgen 1000 1000 --seed 7 --layout grid > big.txt
+
+generate_map() returns rows like MAP_DATA's; register_map() adds one to
+MAP_DATA (and picks its textures) so GameScreen / bench.py can load it.
+No Panda3D imports, so maps can be generated in worker processes.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+
+LAYOUTS = ("grid", "spine", "random")
+
+WALL, NEW_WALL = ord("#"), ord("*")
+FLOOR = ord(".")
+LOCKED_DOOR, UNLOCKED_DOOR = ord("$"), ord("@")
+NEW_LOCKED_DOOR, NEW_UNLOCKED_DOOR = ord("+"), ord("-")
+START, STAIR_DOWN, STAIR_UP = ord("X"), ord("<"), ord(">")
+
+# Generated wings borrow the east wing textures, which have old and new
+# wall variants for "#" and "*"
+DEFAULT_TEXTURE_PREFIX = "east_wing"
+
+
+@dataclass
+class MapSpec:
+    width: int
+    height: int
+    seed: int = 0
+    layout: str = "grid"            # "grid" | "spine" | "random"
+    block: int = 12                 # room slot size (tiles, walls included)
+    corridor: int = 2               # corridor width
+    room_density: float = 0.7       # fraction of slots that get a room
+    min_room: int = 4               # smallest room side (walls included)
+    doors_per_room: float = 1.5     # average doors per room, at least one
+    locked_ratio: float = 0.25      # fraction of doors that are locked
+    new_ratio: float = 0.3          # fraction of rooms built with new walls/doors
+    stairs: int = 2                 # stairs of each direction
+    corridor_fill: float = 0.15     # "random" layout: target corridor share
+
+
+class _Canvas:
+    """
+    Row-major bytearray; every tile starts as wall.
+    """
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.tiles = bytearray([WALL]) * (width * height)
+        self.corridor = bytearray(width * height)
+
+    def get(self, x: int, y: int) -> int:
+        return self.tiles[y * self.width + x]
+
+    def set(self, x: int, y: int, value: int) -> None:
+        self.tiles[y * self.width + x] = value
+
+    def inner(self, x: int, y: int) -> bool:
+        # Inside the one-tile outer wall
+        return 0 < x < self.width - 1 and 0 < y < self.height - 1
+
+    def carve_corridor(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        """
+        Carves the rectangle [x0, x1) x [y0, y1), clipped to the inner area.
+        """
+        x0, x1 = max(1, x0), min(self.width - 1, x1)
+        y0, y1 = max(1, y0), min(self.height - 1, y1)
+        if x0 >= x1:
+            return
+        w = self.width
+        run = bytes([FLOOR]) * (x1 - x0)
+        mark = b"\x01" * (x1 - x0)
+        for y in range(y0, y1):
+            self.tiles[y * w + x0:y * w + x1] = run
+            self.corridor[y * w + x0:y * w + x1] = mark
+
+    def is_corridor(self, x: int, y: int) -> bool:
+        return self.corridor[y * self.width + x] == 1
+
+    def rows(self) -> List[str]:
+        w = self.width
+        return [self.tiles[y * w:(y + 1) * w].decode("ascii") for y in range(self.height)]
+
+
+# ---------------------------------------------------------------------------
+# CORRIDORS
+# ---------------------------------------------------------------------------
+
+def _pitch(spec: MapSpec) -> int:
+    return spec.block + spec.corridor
+
+
+def _grid_corridors(canvas: _Canvas, spec: MapSpec) -> None:
+    pitch = _pitch(spec)
+    for y in range(1, canvas.height - 1, pitch):
+        canvas.carve_corridor(1, y, canvas.width - 1, y + spec.corridor)
+    for x in range(1, canvas.width - 1, pitch):
+        canvas.carve_corridor(x, 1, x + spec.corridor, canvas.height - 1)
+
+
+def _spine_corridors(canvas: _Canvas, spec: MapSpec) -> None:
+    # One main corridor across the middle, ribs every pitch tiles
+    mid = canvas.height // 2 - spec.corridor // 2
+    canvas.carve_corridor(1, mid, canvas.width - 1, mid + spec.corridor)
+    for x in range(1, canvas.width - 1, _pitch(spec)):
+        canvas.carve_corridor(x, 1, x + spec.corridor, canvas.height - 1)
+
+
+def _random_corridors(canvas: _Canvas, spec: MapSpec, rng: random.Random) -> None:
+    # Straight random walks from the centre; always connected
+    target = int(spec.corridor_fill * canvas.width * canvas.height)
+    carved = 0
+    x, y = canvas.width // 2, canvas.height // 2
+    c = spec.corridor
+    while carved < target:
+        dx, dy = rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1)))
+        length = rng.randint(spec.block // 2, spec.block * 2)
+        for _ in range(length):
+            nx, ny = x + dx, y + dy
+            if not (1 <= nx < canvas.width - c and 1 <= ny < canvas.height - c):
+                break
+            x, y = nx, ny
+            if not canvas.is_corridor(x, y):
+                carved += c * c
+            canvas.carve_corridor(x, y, x + c, y + c)
+
+
+# ---------------------------------------------------------------------------
+# ROOMS
+# ---------------------------------------------------------------------------
+
+def _free(canvas: _Canvas, x0: int, y0: int, x1: int, y1: int) -> bool:
+    # Solid rectangle that doesn't touch the outer wall
+    if x0 < 1 or y0 < 1 or x1 > canvas.width - 1 or y1 > canvas.height - 1:
+        return False
+    w = canvas.width
+    for y in range(y0, y1):
+        if canvas.corridor[y * w + x0:y * w + x1].count(1):
+            return False
+    return True
+
+
+def _door_candidates(canvas: _Canvas, x0: int, y0: int, x1: int, y1: int) -> List[Tuple[int, int]]:
+    """
+    Non-corner perimeter tiles with a corridor directly outside.
+    """
+    found = []
+    for x in range(x0 + 1, x1 - 1):
+        if y0 > 0 and canvas.is_corridor(x, y0 - 1):
+            found.append((x, y0))
+        if y1 < canvas.height and canvas.is_corridor(x, y1):
+            found.append((x, y1 - 1))
+    for y in range(y0 + 1, y1 - 1):
+        if x0 > 0 and canvas.is_corridor(x0 - 1, y):
+            found.append((x0, y))
+        if x1 < canvas.width and canvas.is_corridor(x1, y):
+            found.append((x1 - 1, y))
+    return found
+
+
+def _place_room(canvas: _Canvas, spec: MapSpec, rng: random.Random, sx: int, sy: int) -> bool:
+    """
+    Tries a room of random size in the slot at (sx, sy), anchored to a
+    random corner so it touches the corridors on that side.
+    """
+    block = spec.block
+    w = rng.randint(spec.min_room, block)
+    h = rng.randint(spec.min_room, block)
+    x0 = sx if rng.random() < 0.5 else sx + block - w
+    y0 = sy if rng.random() < 0.5 else sy + block - h
+    x1, y1 = x0 + w, y0 + h
+
+    if not _free(canvas, x0, y0, x1, y1):
+        return False
+    doors = _door_candidates(canvas, x0, y0, x1, y1)
+    if not doors:
+        return False
+
+    new = rng.random() < spec.new_ratio
+    wall = NEW_WALL if new else WALL
+    for y in range(y0, y1):
+        for x in range(x0, x1):
+            edge = x in (x0, x1 - 1) or y in (y0, y1 - 1)
+            canvas.set(x, y, wall if edge else FLOOR)
+
+    count = max(1, int(spec.doors_per_room) + (rng.random() < spec.doors_per_room % 1))
+    for x, y in rng.sample(doors, min(count, len(doors))):
+        locked = rng.random() < spec.locked_ratio
+        if new:
+            canvas.set(x, y, NEW_LOCKED_DOOR if locked else NEW_UNLOCKED_DOOR)
+        else:
+            canvas.set(x, y, LOCKED_DOOR if locked else UNLOCKED_DOOR)
+    return True
+
+
+def _rooms(canvas: _Canvas, spec: MapSpec, rng: random.Random) -> int:
+    pitch = _pitch(spec)
+    placed = 0
+    for sy in range(1 + spec.corridor, canvas.height - 1, pitch):
+        for sx in range(1 + spec.corridor, canvas.width - 1, pitch):
+            if rng.random() < spec.room_density and _place_room(canvas, spec, rng, sx, sy):
+                placed += 1
+    return placed
+
+
+def _markers(canvas: _Canvas, spec: MapSpec, rng: random.Random) -> None:
+    floor = [
+        i for i, c in enumerate(canvas.corridor)
+        if c and canvas.tiles[i] == FLOOR
+    ]
+    if not floor:
+        raise ValueError("map too small for a corridor")
+
+    rng.shuffle(floor)
+    canvas.tiles[min(floor)] = START
+    picks = [i for i in floor if canvas.tiles[i] == FLOOR][:spec.stairs * 2]
+    for n, i in enumerate(picks):
+        canvas.tiles[i] = STAIR_DOWN if n % 2 == 0 else STAIR_UP
+
+
+# ---------------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------------
+
+def generate_map(spec: MapSpec) -> List[str]:
+    """
+    Rows of the map described by spec. The same spec (seed included)
+    always gives the same map.
+    """
+    if spec.layout not in LAYOUTS:
+        raise ValueError(f"unknown layout {spec.layout!r}; expected one of {LAYOUTS}")
+    if spec.width < spec.block + 4 or spec.height < spec.block + 4:
+        raise ValueError("map must be at least block + 4 tiles on each side")
+
+    rng = random.Random(spec.seed)
+    canvas = _Canvas(spec.width, spec.height)
+
+    if spec.layout == "grid":
+        _grid_corridors(canvas, spec)
+    elif spec.layout == "spine":
+        _spine_corridors(canvas, spec)
+    else:
+        _random_corridors(canvas, spec, rng)
+
+    _rooms(canvas, spec, rng)
+    _markers(canvas, spec, rng)
+    return canvas.rows()
+
+
+def map_name(spec: MapSpec) -> str:
+    return f"stress_{spec.layout}_{spec.width}x{spec.height}_s{spec.seed}"
+
+
+def register_map(spec: MapSpec, name: Optional[str] = None,
+                 texture_prefix: str = DEFAULT_TEXTURE_PREFIX) -> str:
+    """
+    Generates the map and adds it to MAP_DATA under name (default
+    map_name(spec)). Returns the name.
+    """
+    from lib.maps import MAP_DATA
+    from lib.textures import WING_TEXTURE_PREFIX
+
+    name = name or map_name(spec)
+    MAP_DATA[name] = generate_map(spec)
+    WING_TEXTURE_PREFIX[name] = texture_prefix
+    return name
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    """
+    "1000x1000" -> (1000, 1000)
+    """
+    w, _, h = text.lower().partition("x")
+    return int(w), int(h or w)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a stress-test map")
+    parser.add_argument("width", type=int)
+    parser.add_argument("height", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--layout", choices=LAYOUTS, default="grid")
+    parser.add_argument("--block", type=int, default=MapSpec.block)
+    parser.add_argument("--room-density", type=float, default=MapSpec.room_density)
+    parser.add_argument("--doors-per-room", type=float, default=MapSpec.doors_per_room)
+    parser.add_argument("--locked-ratio", type=float, default=MapSpec.locked_ratio)
+    parser.add_argument("--new-ratio", type=float, default=MapSpec.new_ratio)
+    args = parser.parse_args(argv)
+
+    spec = MapSpec(
+        args.width, args.height, seed=args.seed, layout=args.layout, block=args.block,
+        room_density=args.room_density, doors_per_room=args.doors_per_room,
+        locked_ratio=args.locked_ratio, new_ratio=args.new_ratio,
+    )
+    sys.stdout.write("\n".join(generate_map(spec)) + "\n")
+
+
+if __name__ == "__main__":
+    main()
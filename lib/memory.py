@@ -0,0 +1,387 @@
+# lib/memory.py
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterable, List, Optional
+
+from panda3d.core import NodePath, TexturePool
+
+
+MEMORY_DIR = "data/memory"
+OVERLAY_REFRESH = 0.5           # seconds between overlay updates (scene walk)
+CHECK_INTERVAL = 2.0            # seconds between budget checks
+MIN_STREAM_RADIUS = 1           # eviction never shrinks streaming below this
+
+MB = 1024 * 1024
+
+_FLAGS = {"1": True, "true": True, "yes": True, "on": True,
+          "0": False, "false": False, "no": False, "off": False}
+
+
+# ---------------------------------------------------------------------------
+# BUDGETS
+# ---------------------------------------------------------------------------
+
+@dataclass
+class MemoryBudget:
+    """
+    Limits in MB per category (CPU + GPU bytes); None is unlimited. Over
+    budget prints a warning, and with evict=True also frees what isn't
+    needed right now. Textures still held by a screen that isn't showing
+    (stashed, cached, pooled chunks) count as needed.
+    """
+    total_mb: Optional[float] = None
+    wing_mb: Optional[float] = None
+    textures_mb: Optional[float] = None
+    props_mb: Optional[float] = None
+    evict: bool = False
+
+    @classmethod
+    def parse(cls, text: str) -> "MemoryBudget":
+        """
+        "total=256,textures=64,evict" -> MemoryBudget(total_mb=256, ...)
+        evict also takes a value: evict=1, evict=off, ...
+        """
+        budget = cls()
+        names = {f.name for f in fields(cls)}
+        for part in filter(None, (p.strip() for p in text.split(","))):
+            key, _, value = part.partition("=")
+            if key == "evict":
+                flag = _FLAGS.get(value.strip().lower() or "1")
+                if flag is None:
+                    raise ValueError(f"bad value for evict: {value!r}")
+                budget.evict = flag
+                continue
+            name = f"{key}_mb"
+            if name not in names:
+                raise ValueError(f"unknown memory budget {key!r}")
+            setattr(budget, name, float(value))
+        return budget
+
+    def limits(self) -> Dict[str, float]:
+        return {
+            name: getattr(self, f"{name}_mb") * MB
+            for name in ("total", "wing", "textures", "props")
+            if getattr(self, f"{name}_mb") is not None
+        }
+
+
+# ---------------------------------------------------------------------------
+# ACCOUNTING
+# ---------------------------------------------------------------------------
+
+def _row(**extra) -> Dict[str, Any]:
+    return {"cpu_bytes": 0, "gpu_bytes": 0, "nodes": 0, **extra}
+
+
+def geometry_bytes(roots: Iterable[NodePath], seen: set) -> int:
+    """
+    Vertex and index bytes of every Geom under roots (stashed ones
+    included). Shared vertex data and primitives count once across calls
+    with the same `seen`, so instances cost only their nodes.
+    """
+    total = 0
+    for root in roots:
+        if root.isEmpty():
+            continue
+        for gnp in root.findAllMatches("**/+GeomNode;+s"):
+            node = gnp.node()
+            for i in range(node.getNumGeoms()):
+                geom = node.getGeom(i)
+                vdata = geom.getVertexData()
+                if vdata.this not in seen:
+                    seen.add(vdata.this)
+                    total += sum(vdata.getArray(j).getDataSizeBytes() for j in range(vdata.getNumArrays()))
+                for p in range(geom.getNumPrimitives()):
+                    prim = geom.getPrimitive(p)
+                    if prim.this in seen:
+                        continue
+                    seen.add(prim.this)
+                    vertices = prim.getVertices()
+                    if vertices is not None:
+                        total += vertices.getDataSizeBytes()
+    return total
+
+
+def _count_nodes(roots: Iterable[NodePath]) -> int:
+    return sum(1 + np.countNumDescendants() for np in roots if not np.isEmpty())
+
+
+def _live_props(screen) -> Dict[str, List[NodePath]]:
+    instances: Dict[str, List[NodePath]] = {}
+    spawns = getattr(screen, "prop_spawns", None) or ()
+    for spawn, np in zip(spawns, getattr(screen, "prop_nodes", None) or ()):
+        if not np.isEmpty():
+            instances.setdefault(spawn.prop_id, []).append(np)
+    return instances
+
+
+def texture_row(tex) -> Dict[str, Any]:
+    # RAM image on the CPU side, estimated video memory on the GPU side
+    return _row(
+        cpu_bytes=tex.getRamImageSize() if tex.hasRamImage() else 0,
+        gpu_bytes=tex.estimateTextureMemory(),
+        size=[tex.getXSize(), tex.getYSize()],
+    )
+
+
+def account(base) -> Dict[str, Any]:
+    """
+    Attributes CPU/GPU bytes and node counts to the loaded wing, each prop
+    type and each texture. Geometry is kept in RAM and uploaded once, so it
+    counts on both sides.
+    """
+    from lib.objects import shared_registries
+    from lib.screens import UI_TEXTURES
+    from lib.textures import TEXTURES
+
+    report: Dict[str, Any] = {"time": time.time(), "wings": {}, "props": {}, "textures": {}}
+    seen = set()
+
+    # --- WING: streamed chunks (loaded and pooled), doors, tile grid ---
+    screen = base.screens.current
+    streamer = getattr(screen, "streamer", None)
+    if streamer is not None:
+        pooled = [slot.root for slot in streamer.pooled()]
+        geometry = geometry_bytes([screen.wing_np] + pooled, seen)
+        grid = len(screen.grid.chars) + len(screen.grid.solid)
+        report["wings"][screen.wing] = _row(
+            cpu_bytes=geometry + grid,
+            gpu_bytes=geometry,
+            nodes=_count_nodes([screen.wing_np] + pooled),
+            geometry_bytes=geometry,
+            grid_bytes=grid,
+            chunks_loaded=len(streamer.loaded),
+            chunks_pooled=len(pooled),
+            doors=len(screen.doors.doors),
+        )
+
+    # --- PROPS: cached source model once, plus every live instance ---
+    instances = _live_props(screen)
+    for registry in shared_registries():
+        for prop_id, model in registry.cached_models().items():
+            live = instances.get(prop_id, [])
+            geometry = geometry_bytes([model] + live, seen)
+            report["props"][prop_id] = _row(
+                cpu_bytes=geometry,
+                gpu_bytes=geometry if live else 0,
+                nodes=_count_nodes(live),
+                instances=len(live),
+                collision_solids=sum(
+                    c.node().getNumSolids() for np in live for c in np.findAllMatches("**/+CollisionNode")
+                ),
+            )
+
+    # --- TEXTURES ---
+    for key, tex in list(TEXTURES.items()):
+        report["textures"][key] = texture_row(tex)
+    for path, tex in list(UI_TEXTURES.items()):
+        report["textures"].setdefault(os.path.basename(path), texture_row(tex))
+
+    report["totals"] = totals = {}
+    for category in ("wings", "props", "textures"):
+        rows = report[category].values()
+        totals[category] = {
+            k: sum(row[k] for row in rows) for k in ("cpu_bytes", "gpu_bytes", "nodes")
+        }
+    totals["all"] = {
+        k: sum(totals[c][k] for c in ("wings", "props", "textures")) for k in ("cpu_bytes", "gpu_bytes", "nodes")
+    }
+    return report
+
+
+def _category_bytes(report: Dict[str, Any]) -> Dict[str, int]:
+    totals = report["totals"]
+
+    def both(c):
+        return totals[c]["cpu_bytes"] + totals[c]["gpu_bytes"]
+
+    return {
+        "total": both("all"),
+        "wing": both("wings"),
+        "textures": both("textures"),
+        "props": both("props"),
+    }
+
+
+# ---------------------------------------------------------------------------
+# TRACKER
+# ---------------------------------------------------------------------------
+
+class MemoryTracker:
+    """
+    Periodic accounting against a MemoryBudget, an F6 overlay with the
+    breakdown and F7 to write the report to MEMORY_DIR.
+    """
+    def __init__(self, base, budget: Optional[MemoryBudget] = None, toggle_key="f6", export_key="f7"):
+        self.base = base
+        self.budget = budget or MemoryBudget()
+        self.report: Optional[Dict[str, Any]] = None
+        self.over: Dict[str, int] = {}
+        self.evictions: List[str] = []
+
+        self.text = None
+        self.timer = 0.0
+        self.check_timer = 0.0
+
+        base.accept(toggle_key, self.toggle)
+        base.accept(export_key, self.export)
+
+    # ------------------------------------------------------------
+    # BUDGETS
+    # ------------------------------------------------------------
+    def check(self) -> Dict[str, int]:
+        """
+        Accounts now and applies the budget. Returns the categories over
+        budget (bytes) after any eviction.
+        """
+        self.report = account(self.base)
+        limits = self.budget.limits()
+        over = {k: v for k, v in _category_bytes(self.report).items() if k in limits and v > limits[k]}
+
+        if over and self.budget.evict:
+            for category in over:
+                self._evict(category)
+            self.report = account(self.base)
+            over = {k: v for k, v in _category_bytes(self.report).items() if k in limits and v > limits[k]}
+
+        # Warn on crossing into over-budget, not on every check
+        for category, used in over.items():
+            if category not in self.over:
+                print(f"Memory over budget: {category} {used / MB:.1f} MB > {limits[category] / MB:.1f} MB")
+        self.over = over
+        return over
+
+    def _evict(self, category: str) -> None:
+        if category in ("total", "textures"):
+            self._evict_textures()
+        if category in ("total", "props"):
+            self._evict_props()
+        if category in ("total", "wing"):
+            self._evict_wing()
+        if category == "total":
+            self.base.screens.evict()
+
+    def _in_use_textures(self) -> set:
+        base = self.base
+        roots = [base.render, base.render2d]
+        # Detached but alive: evicting their textures from the tables would
+        # only make the next lookup load a second copy
+        roots += [screen.root for screen in base.screens.kept()]
+        streamer = getattr(base.screens.current, "streamer", None)
+        if streamer is not None:
+            roots += [slot.root for slot in streamer.pooled()]
+
+        used = set()
+        for root in roots:
+            if root.isEmpty():
+                continue
+            for tex in root.findAllTextures():
+                used.add(tex.this)
+        return used
+
+    def _evict_textures(self) -> None:
+        from lib.screens import UI_TEXTURES
+        from lib.textures import TEXTURES
+
+        used = self._in_use_textures()
+        for table in (TEXTURES, UI_TEXTURES):
+            for key, tex in list(table.items()):
+                if tex.this not in used:
+                    del table[key]
+                    tex.releaseAll()
+                    TexturePool.releaseTexture(tex)
+                    self.evictions.append(f"texture {key}")
+
+    def _evict_props(self) -> None:
+        from lib.objects import shared_registries
+
+        live = _live_props(self.base.screens.current)
+        for registry in shared_registries():
+            for prop_id in [p for p in registry.cached_models() if p not in live]:
+                registry.evict(prop_id)
+                self.evictions.append(f"prop {prop_id}")
+
+    def _evict_wing(self) -> None:
+        streamer = getattr(self.base.screens.current, "streamer", None)
+        if streamer is None:
+            return
+        if streamer.trim_pool():
+            self.evictions.append("chunk pool")
+        elif streamer.radius > MIN_STREAM_RADIUS:
+            streamer.set_radius(streamer.radius - 1)
+            self.evictions.append(f"stream radius {streamer.radius}")
+
+    # ------------------------------------------------------------
+    # OVERLAY / EXPORT
+    # ------------------------------------------------------------
+    def toggle(self):
+        if self.text is None:
+            from direct.gui.OnscreenText import OnscreenText
+            from panda3d.core import TextNode
+
+            self.text = OnscreenText(
+                text="",
+                parent=self.base.a2dTopRight,
+                pos=(-0.05, -0.08),
+                scale=0.04,
+                fg=(0.8, 0.9, 1, 1),
+                bg=(0, 0, 0, 0.6),
+                align=TextNode.ARight,
+                mayChange=True,
+                font=self.base.loader.loadFont("cmtt12"),
+            )
+            self.text.setBin("fixed", 110)
+            self.timer = OVERLAY_REFRESH
+        elif self.text.isHidden():
+            self.text.show()
+        else:
+            self.text.hide()
+
+    def export(self, directory: str = MEMORY_DIR) -> str:
+        report = self.report = account(self.base)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, time.strftime("memory_%Y%m%d_%H%M%S.json"))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"Memory report: {path}")
+        return path
+
+    def _overlay_text(self) -> str:
+        report = self.report
+        limits = self.budget.limits()
+        used = _category_bytes(report)
+
+        def mb(n):
+            return f"{n / MB:7.1f}"
+
+        lines = [f"{'memory':<22}{'cpu':>8}{'gpu':>8}{'nodes':>7}"]
+        for category in ("wings", "props", "textures"):
+            t = report["totals"][category]
+            lines.append(f"{category:<22}{mb(t['cpu_bytes'])} {mb(t['gpu_bytes'])}{t['nodes']:7d}")
+            rows = sorted(report[category].items(), key=lambda kv: -(kv[1]["cpu_bytes"] + kv[1]["gpu_bytes"]))
+            for name, row in rows[:4]:
+                lines.append(f"  {name[:20]:<20}{mb(row['cpu_bytes'])} {mb(row['gpu_bytes'])}{row['nodes']:7d}")
+        for category, limit in limits.items():
+            flag = "OVER" if category in self.over else "ok"
+            lines.append(f"budget {category:<15}{mb(used[category])} /{mb(limit)} {flag}")
+        return "\n".join(lines)
+
+    def update(self, dt):
+        if self.budget.limits():
+            self.check_timer += dt
+            if self.check_timer >= CHECK_INTERVAL:
+                self.check_timer = 0.0
+                self.check()
+
+        if self.text is None or self.text.isHidden():
+            return
+        self.timer += dt
+        if self.timer < OVERLAY_REFRESH:
+            return
+        self.timer = 0.0
+        self.report = account(self.base)
+        self.text.setText(self._overlay_text())
@@ -0,0 +1,256 @@
+# lib/minimap.py
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+import numpy as np
+from panda3d.core import CardMaker, NodePath, SamplerState, Texture, TransparencyAttrib
+
+from lib.doors import DoorSystem
+from lib.grid import WALL_CHARS, TileGrid
+
+
+PAGE = 64                       # tiles per texture page side; one texel per tile
+MAP_SIZE = 0.6                  # aspect2d units spanned by the longer side of the wing
+REVEAL_RADIUS = 7               # tiles around the player checked for sight
+MARKER_SIZE = 0.6               # in tiles
+
+# Texel colours (r, g, b, a) for the base image
+WALL_COLOR = (150, 150, 160, 255)
+FLOOR_COLOR = (45, 45, 55, 220)
+STAIRS_COLOR = (90, 140, 200, 255)
+FOG_COLOR = (0, 0, 0, 0)
+TILE_COLORS = {"<": STAIRS_COLOR, ">": STAIRS_COLOR}
+
+# Overlay colours
+PLAYER_COLOR = (1.0, 1.0, 1.0, 1.0)
+LOCKED_COLOR = (0.9, 0.15, 0.15, 1.0)
+CLOSED_COLOR = (0.9, 0.7, 0.2, 1.0)
+OPEN_COLOR = (0.3, 0.85, 0.35, 1.0)
+
+
+def _bgra(rgba):
+    # Panda3D keeps RGBA8 RAM images in BGRA order
+    r, g, b, a = rgba
+    return (b, g, r, a)
+
+
+def tile_color(char: str):
+    if char in WALL_CHARS:
+        return _bgra(WALL_COLOR)
+    return _bgra(TILE_COLORS.get(char, FLOOR_COLOR))
+
+
+def rasterize(grid: TileGrid) -> np.ndarray:
+    """
+    The wing as (height, width, 4) BGRA texels, row 0 = tile row 0.
+    """
+    chars = np.frombuffer(bytes(grid.chars), np.uint8).reshape(grid.height, grid.width)
+    palette = np.array([tile_color(chr(c)) for c in range(128)], np.uint8)
+    return palette[chars & 0x7F]
+
+
+class Minimap:
+    """
+    Fog-of-war map of the current wing in a corner of the screen.
+
+    The wing is rasterized once, one texel per tile, into PAGE x PAGE
+    texture pages. As the player moves into a new tile, the tiles around
+    them that SightService says are visible are revealed (plus the walls
+    bounding them), and only the pages under that rectangle have the
+    rectangle written into their RAM image, so only those pages upload.
+    Doors and the player are small cards over the map; a frame where the
+    player stays on their tile only moves the marker.
+    """
+    def __init__(self, base, grid: TileGrid, doors: DoorSystem, sight, resources):
+        self.grid = grid
+        self.doors = doors
+        self.sight = sight
+
+        w, h = grid.width, grid.height
+        self.image = rasterize(grid)
+        self.seen = np.zeros((h, w), bool)
+        self._fog = np.array(_bgra(FOG_COLOR), np.uint8)
+
+        # Tile units under root; root is scaled to MAP_SIZE
+        self.root = resources.node(base.a2dTopRight.attachNewNode("minimap"))
+        scale = MAP_SIZE / max(w, h)
+        self.root.setScale(scale, 1, scale)
+        self.root.setPos(-0.05 - w * scale, 0, -0.05 - h * scale)
+        self.root.setTransparency(TransparencyAttrib.MAlpha)
+        self.root.setBin("fixed", 100)
+        self.root.setDepthTest(False)
+        self.root.setDepthWrite(False)
+
+        self.pages: Dict[Tuple[int, int], Texture] = {}
+        for py in range(0, h, PAGE):
+            for px in range(0, w, PAGE):
+                self.pages[(px // PAGE, py // PAGE)] = self._make_page(px, py)
+
+        self._door_markers: Dict[Tuple[int, int], NodePath] = {}
+        self._door_key = None
+        for tile in doors.doors:
+            self._add_door_marker(tile)
+
+        cm = CardMaker("minimap_player")
+        half = MARKER_SIZE / 2.0
+        cm.setFrame(-half, half, -half, half)
+        self.marker = self.root.attachNewNode(cm.generate())
+        self.marker.setColor(*PLAYER_COLOR)
+        self.marker.setR(45)
+        self.marker.setBin("fixed", 102)
+
+        self._tile = None
+        self.stats = {"reveals": 0, "uploads": 0, "upload_bytes": 0}
+
+        resources.accept("tab", self.toggle)
+
+    def _make_page(self, px: int, py: int) -> Texture:
+        tex = Texture(f"minimap_{px}_{py}")
+        tex.setup2dTexture(PAGE, PAGE, Texture.T_unsigned_byte, Texture.F_rgba8)
+        tex.setMagfilter(SamplerState.FT_nearest)
+        tex.setMinfilter(SamplerState.FT_nearest)
+        tex.setWrapU(SamplerState.WM_clamp)
+        tex.setWrapV(SamplerState.WM_clamp)
+        # Everything starts fogged
+        tex.setRamImage(np.tile(self._fog, PAGE * PAGE).tobytes())
+
+        cm = CardMaker(f"minimap_page_{px}_{py}")
+        cm.setFrame(px, px + PAGE, py, py + PAGE)
+        card = self.root.attachNewNode(cm.generate())
+        card.setTexture(tex)
+        return tex
+
+    def _add_door_marker(self, tile) -> None:
+        cm = CardMaker(f"minimap_door_{tile[0]}_{tile[1]}")
+        cm.setFrame(tile[0] + 0.2, tile[0] + 0.8, tile[1] + 0.2, tile[1] + 0.8)
+        marker = self.root.attachNewNode(cm.generate())
+        marker.setBin("fixed", 101)
+        if not self.seen[tile[1], tile[0]]:
+            marker.hide()
+        self._door_markers[tile] = marker
+        self._door_key = None
+
+    def toggle(self) -> None:
+        if self.root.isHidden():
+            self.root.show()
+        else:
+            self.root.hide()
+
+    # ------------------------------------------------------------
+    # MAP CHANGES
+    # ------------------------------------------------------------
+    def set_tile(self, x: int, y: int) -> None:
+        """
+        Redraws one tile after GameScreen.set_tile and follows doors
+        added or removed there.
+        """
+        self.image[y, x] = tile_color(self.grid.char(x, y))
+        self._upload(x, y, x + 1, y + 1)
+
+        marker = self._door_markers.pop((x, y), None)
+        if marker is not None:
+            marker.removeNode()
+        if (x, y) in self.doors.doors:
+            self._add_door_marker((x, y))
+        self._door_key = None
+
+    def doors_changed(self) -> None:
+        """
+        A door's lock state changed (GameScreen.set_door_unlocked).
+        """
+        self._door_key = None
+
+    # ------------------------------------------------------------
+    # UPDATE
+    # ------------------------------------------------------------
+    def update(self, x: float, y: float) -> None:
+        ts = self.grid.tile_size
+        self.marker.setPos(x / ts, 0, y / ts)
+
+        tile = self.grid.tile_at(x, y)
+        if tile != self._tile:
+            self._tile = tile
+            self._reveal(*tile)
+
+        # Door colours only change when a door opens, shuts, or is unlocked
+        if self._door_key != self.doors.revision:
+            self._door_key = self.doors.revision
+            self._paint_doors()
+
+    def _reveal(self, cx: int, cy: int) -> None:
+        grid = self.grid
+        r = REVEAL_RADIUS
+        x0, y0 = max(0, cx - r), max(0, cy - r)
+        x1, y1 = min(grid.width, cx + r + 1), min(grid.height, cy + r + 1)
+        if not grid.in_bounds(cx, cy):
+            return
+
+        ys, xs = np.mgrid[y0:y1, x0:x1]
+        inside = (xs - cx) ** 2 + (ys - cy) ** 2 <= r * r
+        xs, ys = xs[inside], ys[inside]
+        pairs = np.empty((len(xs), 4), np.int64)
+        pairs[:, 0] = cx
+        pairs[:, 1] = cy
+        pairs[:, 2] = xs
+        pairs[:, 3] = ys
+        seen_now = self.sight.query(pairs)
+        visible = np.zeros((y1 - y0, x1 - x0), bool)
+        visible[ys[seen_now] - y0, xs[seen_now] - x0] = True
+
+        # Walls and doors bounding what is seen show too
+        lit = visible.copy()
+        lit[1:, :] |= visible[:-1, :]
+        lit[:-1, :] |= visible[1:, :]
+        lit[:, 1:] |= visible[:, :-1]
+        lit[:, :-1] |= visible[:, 1:]
+        lit[1:, 1:] |= visible[:-1, :-1]
+        lit[:-1, :-1] |= visible[1:, 1:]
+        lit[1:, :-1] |= visible[:-1, 1:]
+        lit[:-1, 1:] |= visible[1:, :-1]
+
+        seen = self.seen[y0:y1, x0:x1]
+        new = lit & ~seen
+        if not new.any():
+            return
+        seen |= new
+        self.stats["reveals"] += 1
+
+        rows, cols = np.nonzero(new)
+        self._upload(x0 + cols.min(), y0 + rows.min(), x0 + cols.max() + 1, y0 + rows.max() + 1)
+
+        for (tx, ty), marker in self._door_markers.items():
+            if x0 <= tx < x1 and y0 <= ty < y1 and seen[ty - y0, tx - x0]:
+                marker.show()
+
+    def _upload(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        """
+        Writes tiles [x0, x1) x [y0, y1) into the pages they fall on.
+        """
+        for py in range(y0 // PAGE, (y1 - 1) // PAGE + 1):
+            for px in range(x0 // PAGE, (x1 - 1) // PAGE + 1):
+                bx0, by0 = px * PAGE, py * PAGE
+                sx0, sy0 = max(x0, bx0), max(y0, by0)
+                sx1, sy1 = min(x1, bx0 + PAGE), min(y1, by0 + PAGE)
+
+                seen = self.seen[sy0:sy1, sx0:sx1, None]
+                texels = np.where(seen, self.image[sy0:sy1, sx0:sx1], self._fog)
+                ram = np.asarray(memoryview(self.pages[(px, py)].modifyRamImage())).reshape(PAGE, PAGE, 4)
+                ram[sy0 - by0:sy1 - by0, sx0 - bx0:sx1 - bx0] = texels
+
+                self.stats["uploads"] += 1
+                self.stats["upload_bytes"] += PAGE * PAGE * 4
+
+    def _paint_doors(self) -> None:
+        open_tiles = self.doors.open_tiles
+        for tile, marker in self._door_markers.items():
+            door = self.doors.get(tile)
+            if door is None:
+                continue
+            if not door.unlocked:
+                marker.setColor(*LOCKED_COLOR)
+            elif tile in open_tiles:
+                marker.setColor(*OPEN_COLOR)
+            else:
+                marker.setColor(*CLOSED_COLOR)
+
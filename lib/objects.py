@@ -4,7 +4,7 @@ from __future__ import annotations
 import json
 import os
 from dataclasses import dataclass
-from typing import Any, Dict, Optional, Tuple, Literal
+from typing import Any, Dict, List, Optional, Tuple, Literal
 
 from panda3d.core import (
     NodePath,
@@ -184,6 +184,39 @@ class PropRegistry:
         self._model_cache[prop_id] = model
         return model
 
+    def cached_models(self) -> Dict[str, NodePath]:
+        return dict(self._model_cache)
+
+    def evict(self, prop_id: str) -> bool:
+        """
+        Drops the cached source model; live instances keep their own copy.
+        The next spawn reloads it.
+        """
+        model = self._model_cache.pop(prop_id, None)
+        if model is None:
+            return False
+        model.removeNode()
+        return True
+
+
+_SHARED_REGISTRIES: Dict[Tuple[int, str], PropRegistry] = {}
+
+
+def shared_registry(loader, props_root: str = DEFAULT_PROPS_ROOT) -> PropRegistry:
+    """
+    One registry per (loader, props_root), so cached source models survive
+    across screens and can be preloaded ahead of time.
+    """
+    key = (id(loader), props_root)
+    registry = _SHARED_REGISTRIES.get(key)
+    if registry is None:
+        registry = _SHARED_REGISTRIES[key] = PropRegistry(loader, props_root=props_root)
+    return registry
+
+
+def shared_registries() -> List[PropRegistry]:
+    return list(_SHARED_REGISTRIES.values())
+
 
 # ---------------------------------------------------------------------------
 # COLLISION PRIMITIVES
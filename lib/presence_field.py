@@ -0,0 +1,153 @@
+# lib/presence_field.py
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from lib.grid import WALL_CHARS, TileGrid
+from lib.rooms import LOCKED_DOOR_CHARS
+
+
+PRESENCE_TICK_RATE = 10.0       # field updates per second
+DIFFUSION_RATE = 1.5            # per second, share exchanged with each open neighbour
+DECAY_HALF_LIFE = 4.0           # seconds for an isolated value to halve
+
+# Explicit diffusion is stable while a tile gives away at most all of it
+# to its four neighbours in one tick
+MAX_DIFFUSION_PER_TICK = 0.25
+
+
+class PresenceField:
+    """
+    Presence over the tiles of a wing, one float32 per tile. Every tick it
+    spreads to open 4-neighbours, decays, and takes in what was emitted
+    since the last tick. Walls and locked doors neither hold nor pass it.
+
+    The array is padded with a ring of closed tiles so the neighbour sums
+    are four shifted views with no edge cases; a tick is a handful of
+    whole-array operations into preallocated buffers.
+    """
+    def __init__(self, grid: TileGrid, tick_rate: float = PRESENCE_TICK_RATE):
+        w, h = grid.width, grid.height
+        self.width = w
+        self.height = h
+        self.tile_size = grid.tile_size
+        self.tick_dt = 1.0 / tick_rate
+        self.spread = np.float32(min(MAX_DIFFUSION_PER_TICK, DIFFUSION_RATE * self.tick_dt))
+        self.decay = np.float32(0.5 ** (self.tick_dt / DECAY_HALF_LIFE))
+
+        self._padded = np.zeros((h + 2, w + 2), np.float32)
+        # values[y, x]; a view, so sampling never copies
+        self.values = self._padded[1:-1, 1:-1]
+
+        chars = np.frombuffer(bytes(grid.chars), np.uint8).reshape(h, w)
+        blocked = np.frombuffer("".join(sorted(WALL_CHARS | LOCKED_DOOR_CHARS)).encode("ascii"), np.uint8)
+        self._open_padded = np.zeros((h + 2, w + 2), np.float32)
+        self.open = self._open_padded[1:-1, 1:-1]
+        self.open[:] = ~np.isin(chars, blocked)
+        self._degree = np.zeros((h, w), np.float32)
+        self._update_degree()
+
+        self._emitted = np.zeros((h, w), np.float32)
+        self._flux = np.zeros((h, w), np.float32)
+        self._scratch = np.zeros((h, w), np.float32)
+        self._accumulator = 0.0
+
+        self.ticks = 0
+        self.tick_ms_total = 0.0
+        self.tick_ms_max = 0.0
+
+    def _update_degree(self) -> None:
+        o = self._open_padded
+        d = self._degree
+        np.add(o[:-2, 1:-1], o[2:, 1:-1], out=d)
+        d += o[1:-1, :-2]
+        d += o[1:-1, 2:]
+
+    # ------------------------------------------------------------
+    # TILES
+    # ------------------------------------------------------------
+    def set_open(self, x: int, y: int, is_open: bool) -> None:
+        """
+        Opens or closes a tile to presence (a door unlocked, a wall gone).
+        """
+        self.set_open_many([((x, y), is_open)])
+
+    def set_open_many(self, tiles) -> None:
+        """
+        set_open for many ((x, y), is_open) at once, recomputing the
+        neighbour counts a single time.
+        """
+        for (x, y), is_open in tiles:
+            self.open[y, x] = 1.0 if is_open else 0.0
+            if not is_open:
+                self.values[y, x] = 0.0
+        self._update_degree()
+
+    def tile_of(self, wx: float, wy: float):
+        return int(wx // self.tile_size), int(wy // self.tile_size)
+
+    # ------------------------------------------------------------
+    # SOURCES / SAMPLING
+    # ------------------------------------------------------------
+    def emit(self, wx: float, wy: float, amount: float) -> None:
+        """
+        Adds presence at a world position; it enters the field next tick.
+        """
+        x, y = self.tile_of(wx, wy)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self._emitted[y, x] += amount
+
+    def at(self, x: int, y: int) -> float:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return float(self.values[y, x])
+        return 0.0
+
+    def sample(self, wx: float, wy: float) -> float:
+        x, y = self.tile_of(wx, wy)
+        return self.at(x, y)
+
+    # ------------------------------------------------------------
+    # UPDATE
+    # ------------------------------------------------------------
+    def update(self, dt: float) -> int:
+        """
+        Runs the ticks due after dt seconds; returns how many ran.
+        """
+        self._accumulator += dt
+        ticks = 0
+        while self._accumulator >= self.tick_dt:
+            self._accumulator -= self.tick_dt
+            self.tick()
+            ticks += 1
+        return ticks
+
+    def tick(self) -> None:
+        t0 = time.perf_counter()
+        p = self._padded
+        v = self.values
+        flux = self._flux
+
+        # Sum of the open neighbours minus what flows out to them; closed
+        # tiles hold zero, so they add nothing and take nothing
+        np.add(p[:-2, 1:-1], p[2:, 1:-1], out=flux)
+        flux += p[1:-1, :-2]
+        flux += p[1:-1, 2:]
+        np.multiply(v, self._degree, out=self._scratch)
+        flux -= self._scratch
+
+        flux *= self.spread
+        v += flux
+        v *= self.decay
+        v += self._emitted
+        v *= self.open
+        self._emitted.fill(0.0)
+
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.ticks += 1
+        self.tick_ms_total += ms
+        self.tick_ms_max = max(self.tick_ms_max, ms)
+
+    def total(self) -> float:
+        return float(self.values.sum())
@@ -0,0 +1,207 @@
+# lib/profiling.py
+from __future__ import annotations
+
+import csv
+import json
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from panda3d.core import PStatClient, PStatCollector
+
+
+HISTORY_FRAMES = 600            # ring buffer length per scope (~10 s at 60 fps)
+PROFILE_DIR = "data/profiles"
+OVERLAY_REFRESH = 0.25          # seconds between overlay text updates
+
+FRAME = "Frame"
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+class _Scope:
+    """
+    Reusable context manager for one named scope. Times with
+    perf_counter (always) and a PStatCollector (shows up in pstats when a
+    PStats server is connected).
+    """
+    __slots__ = ("profiler", "name", "collector", "t0")
+
+    def __init__(self, profiler: "FrameProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.collector = PStatCollector(f"App:Show code:{name}")
+        self.t0 = 0.0
+
+    def __enter__(self):
+        if self.profiler.pstats:
+            self.collector.start()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self.t0) * 1000.0
+        if self.profiler.pstats:
+            self.collector.stop()
+        acc = self.profiler._frame
+        acc[self.name] = acc.get(self.name, 0.0) + ms
+        return False
+
+
+class FrameProfiler:
+    """
+    Named timing scopes accumulated per frame into fixed-size ring buffers.
+    Scopes that don't run in a frame record 0 for it so percentiles are
+    per-frame costs.
+    """
+    def __init__(self, history: int = HISTORY_FRAMES):
+        self.history = history
+        self.samples: Dict[str, Deque[float]] = {}
+        self._scopes: Dict[str, _Scope] = {}
+        self._frame: Dict[str, float] = {}
+        self.frame_count = 0
+        self.pstats = False
+
+        # Full per-frame log for export, bounded like the ring buffers
+        self.session: Deque[Dict[str, float]] = deque(maxlen=history * 10)
+        self.session_start = time.time()
+
+    def scope(self, name: str) -> _Scope:
+        s = self._scopes.get(name)
+        if s is None:
+            s = self._scopes[name] = _Scope(self, name)
+        return s
+
+    def next_frame(self, dt: float) -> None:
+        """
+        Closes the previous frame; dt is its total duration in seconds.
+        """
+        self.pstats = PStatClient.isConnected()
+
+        frame = self._frame
+        frame[FRAME] = dt * 1000.0
+        self._frame = {}
+
+        for name in set(self.samples) | set(frame):
+            buf = self.samples.get(name)
+            if buf is None:
+                buf = self.samples[name] = deque(maxlen=self.history)
+            buf.append(frame.get(name, 0.0))
+
+        self.frame_count += 1
+        frame["frame"] = float(self.frame_count)
+        self.session.append(frame)
+
+    def stats(self, name: str) -> Dict[str, float]:
+        values = sorted(self.samples.get(name, ()))
+        if not values:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+        return {
+            "p50": percentile(values, 0.50),
+            "p95": percentile(values, 0.95),
+            "p99": percentile(values, 0.99),
+            "max": values[-1],
+            "mean": sum(values) / len(values),
+        }
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: self.stats(name) for name in sorted(self.samples)}
+
+    # ------------------------------------------------------------
+    # EXPORT
+    # ------------------------------------------------------------
+    def export(self, directory: str = PROFILE_DIR, label: Optional[str] = None) -> str:
+        """
+        Writes <session>.json (summary + per-frame samples) and <session>.csv
+        (one row per frame, one column per scope). Returns the path stem.
+        """
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, label or time.strftime("session-%Y%m%d-%H%M%S"))
+
+        frames = list(self.session)
+        columns = ["frame", FRAME] + sorted({k for f in frames for k in f} - {"frame", FRAME})
+
+        with open(stem + ".json", "w", encoding="utf-8") as f:
+            json.dump({
+                "started": self.session_start,
+                "frames": len(frames),
+                "summary": self.summary(),
+                "samples": frames,
+            }, f, indent=1)
+
+        with open(stem + ".csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for frame in frames:
+                writer.writerow([f"{frame.get(c, 0.0):.4f}" for c in columns])
+
+        return stem
+
+
+PROFILER = FrameProfiler()
+
+
+# ---------------------------------------------------------------------------
+# OVERLAY
+# ---------------------------------------------------------------------------
+
+class ProfilerOverlay:
+    """
+    F3 toggles a text overlay with p50/p95/p99 per scope; F4 exports the
+    session to PROFILE_DIR.
+    """
+    def __init__(self, base, profiler: FrameProfiler = PROFILER, toggle_key="f3", export_key="f4"):
+        self.base = base
+        self.profiler = profiler
+        self.text = None
+        self.timer = 0.0
+
+        base.accept(toggle_key, self.toggle)
+        base.accept(export_key, self.export)
+
+    def toggle(self):
+        if self.text is None:
+            from direct.gui.OnscreenText import OnscreenText
+            from panda3d.core import TextNode
+
+            self.text = OnscreenText(
+                text="",
+                parent=self.base.a2dTopLeft,
+                pos=(0.05, -0.08),
+                scale=0.04,
+                fg=(0.8, 1, 0.8, 1),
+                bg=(0, 0, 0, 0.6),
+                align=TextNode.ALeft,
+                mayChange=True,
+                font=self.base.loader.loadFont("cmtt12"),
+            )
+            self.text.setBin("fixed", 110)
+            self.timer = OVERLAY_REFRESH
+        elif self.text.isHidden():
+            self.text.show()
+        else:
+            self.text.hide()
+
+    def export(self):
+        stem = self.profiler.export()
+        print(f"Profile exported: {stem}.json / {stem}.csv")
+
+    def update(self, dt):
+        if self.text is None or self.text.isHidden():
+            return
+
+        self.timer += dt
+        if self.timer < OVERLAY_REFRESH:
+            return
+        self.timer = 0.0
+
+        lines = [f"{'scope':<24}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+        for name, s in self.profiler.summary().items():
+            lines.append(f"{name:<24}{s['p50']:7.2f}{s['p95']:7.2f}{s['p99']:7.2f}")
+        self.text.setText("\n".join(lines))
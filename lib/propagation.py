@@ -0,0 +1,174 @@
+# lib/propagation.py
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Dict, Optional, Tuple
+
+from panda3d.core import Point3
+
+from lib.doors import DoorSystem
+from lib.grid import TileGrid
+from lib.rooms import NO_ROOM, RoomGraph, build_rooms
+
+
+OPEN_DOOR_GAIN = 1.0
+CLOSED_DOOR_GAIN = 0.3
+# Routes through a closed door are only taken over an open one when the
+# open way round is longer by more than this
+CLOSED_DOOR_DETOUR = 12.0
+MAX_ROUTE_LENGTH = 60.0         # portal-to-portal length beyond which rooms can't hear each other
+
+
+class Route:
+    """
+    Best way from one room to another through portals: the portal sound
+    leaves the listener's room by (first) and enters the emitter's room by
+    (last), the length between them, and the combined door gain.
+    """
+    __slots__ = ("first", "last", "length", "gain")
+
+    def __init__(self, first: Point3, last: Point3, length: float, gain: float):
+        self.first = first
+        self.last = last
+        self.length = length
+        self.gain = gain
+
+
+class SoundPropagation:
+    """
+    Occlusion and apparent position of sounds in other rooms, heard through
+    the doors between them rather than through walls.
+
+    Routes are found per listener room with one Dijkstra over the portal
+    graph and cached for every room it reaches; a sound then costs two
+    room lookups and a dict hit. Door state changes (DoorSystem.revision)
+    drop the cache; a tile change (rooms_changed()) rebuilds the room graph
+    on the next update.
+    """
+    def __init__(self, grid: TileGrid, doors: DoorSystem, graph: Optional[RoomGraph] = None):
+        self.grid = grid
+        self.doors = doors
+        self.graph = graph if graph is not None else build_rooms(grid)
+        self._portal_pos = self._portal_positions()
+
+        self._routes: Dict[int, Dict[int, Route]] = {}
+        self._revision = doors.revision
+        self._stale_rooms = False
+
+        self.listener_room = NO_ROOM
+        self.stats = {"rows": 0, "lookups": 0, "invalidated": 0, "rebuilt": 0}
+
+    def _portal_positions(self):
+        ts = self.grid.tile_size
+        return [Point3((p.tile[0] + 0.5) * ts, (p.tile[1] + 0.5) * ts, 0) for p in self.graph.portals]
+
+    # ------------------------------------------------------------
+    # INVALIDATION
+    # ------------------------------------------------------------
+    def rooms_changed(self) -> None:
+        """
+        The map changed under the room graph (GameScreen.set_tile).
+        """
+        self._stale_rooms = True
+
+    def update(self, listener: Point3) -> None:
+        """
+        Once per frame, before any resolve().
+        """
+        if self._stale_rooms:
+            self.graph = build_rooms(self.grid)
+            self._portal_pos = self._portal_positions()
+            self._stale_rooms = False
+            self._routes.clear()
+            self.stats["rebuilt"] += 1
+        elif self.doors.revision != self._revision and self._routes:
+            self._routes.clear()
+            self.stats["invalidated"] += 1
+        self._revision = self.doors.revision
+        self.listener_room = self.room_of(listener)
+
+    def room_of(self, pos) -> int:
+        x, y = self.grid.tile_at(pos.x, pos.y)
+        return self.graph.room_at(x, y)
+
+    # ------------------------------------------------------------
+    # ROUTES
+    # ------------------------------------------------------------
+    def _door_gain(self, portal) -> float:
+        return OPEN_DOOR_GAIN if portal.tile in self.doors.open_tiles else CLOSED_DOOR_GAIN
+
+    def _row(self, source: int) -> Dict[int, Route]:
+        """
+        Routes from source to every room within MAX_ROUTE_LENGTH.
+        """
+        graph = self.graph
+        pos = self._portal_pos
+        row: Dict[int, Route] = {}
+
+        # (cost, length, gain, tiebreak, portal, room entered, first portal)
+        heap = []
+        for i, (portal, room) in enumerate(graph.neighbours(source)):
+            if room != NO_ROOM:
+                gain = self._door_gain(portal)
+                cost = 0.0 if gain == OPEN_DOOR_GAIN else CLOSED_DOOR_DETOUR
+                heap.append((cost, 0.0, gain, i, portal.id, room, portal.id))
+        heapq.heapify(heap)
+
+        seen = set()
+        count = len(heap)
+        while heap:
+            cost, length, gain, _, pid, room, first = heapq.heappop(heap)
+            if (pid, room) in seen:
+                continue
+            seen.add((pid, room))
+            if room not in row and room != source:
+                row[room] = Route(pos[first], pos[pid], length, gain)
+
+            for portal, nxt in graph.neighbours(room):
+                if portal.id == pid or nxt == NO_ROOM or (portal.id, nxt) in seen:
+                    continue
+                step = (pos[portal.id] - pos[pid]).length()
+                if length + step > MAX_ROUTE_LENGTH:
+                    continue
+                door = self._door_gain(portal)
+                count += 1
+                heapq.heappush(heap, (
+                    cost + step + (0.0 if door == OPEN_DOOR_GAIN else CLOSED_DOOR_DETOUR),
+                    length + step, gain * door, count, portal.id, nxt, first,
+                ))
+
+        self.stats["rows"] += 1
+        return row
+
+    def route(self, source: int, target: int) -> Optional[Route]:
+        row = self._routes.get(source)
+        if row is None:
+            row = self._routes[source] = self._row(source)
+        return row.get(target)
+
+    def resolve(self, listener: Point3, pos: Point3) -> Tuple[float, Point3]:
+        """
+        (occlusion gain, position to play at) for a sound at pos. A sound
+        in another room is placed along the listener's way out through the
+        first door, as far off as the route through the doors is long.
+        """
+        self.stats["lookups"] += 1
+        source = self.listener_room
+        target = self.room_of(pos)
+        # Same room, or either side standing in a doorway: heard directly
+        if source == target or source == NO_ROOM or target == NO_ROOM:
+            return 1.0, pos
+
+        route = self.route(source, target)
+        if route is None:
+            return 0.0, pos
+
+        to_door = route.first - listener
+        to_door.z = 0.0
+        near = to_door.length()
+        distance = near + route.length + math.hypot(pos.x - route.last.x, pos.y - route.last.y)
+        if near > 0.0:
+            to_door /= near
+        heard_at = Point3(listener.x + to_door.x * distance, listener.y + to_door.y * distance, pos.z)
+        return route.gain, heard_at
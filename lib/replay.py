@@ -0,0 +1,293 @@
+# lib/replay.py
+from __future__ import annotations
+
+import json
+import os
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from direct.showbase.DirectObject import DirectObject
+from direct.showbase.InputStateGlobal import inputState
+from panda3d.core import ClockObject
+
+from lib.saves import atomic_write
+
+
+# ---------------------------------------------------------------------------
+# FORMAT
+# ---------------------------------------------------------------------------
+#
+#   header  "<4sHHII"  magic, version, flags, frame count, meta length
+#   meta    UTF-8 JSON (start state, end state, clock info)
+#   body    zlib of frame count * FRAME records
+#
+# dt is stored as float32 and the mouse as whole pixels; while recording the
+# game is fed the same rounded values, so a replay is bit-for-bit identical.
+
+REPLAY_DIR = "data/replays"
+REPLAY_EXT = ".pbrec"
+REPLAY_MAGIC = b"PBIN"
+REPLAY_VERSION = 1
+
+HEADER = struct.Struct("<4sHHII")
+FRAME = struct.Struct("<fHhh")          # dt, flags, mouse dx, mouse dy
+
+FIXED_DT = 1.0 / 60.0
+
+# Bit order of InputFrame.flags. "use" is latched from the key event, the
+# rest mirror inputState.
+INPUT_FLAGS = (
+    "forward", "back", "left", "right",
+    "forward2", "back2", "left2", "right2",
+    "use",
+)
+_BITS = {name: 1 << i for i, name in enumerate(INPUT_FLAGS)}
+
+REPLAY_DONE_EVENT = "replayFinished"
+
+
+class ReplayError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class InputFrame:
+    dt: float
+    flags: int = 0
+    mouse_dx: int = 0
+    mouse_dy: int = 0
+
+    def is_set(self, name: str) -> bool:
+        return bool(self.flags & _BITS[name])
+
+
+def _f32(value: float) -> float:
+    return struct.unpack("<f", struct.pack("<f", value))[0]
+
+
+def _pixels(value: float) -> int:
+    # Whole pixels clamped to the int16 the frame stores
+    return max(-32768, min(32767, int(round(value))))
+
+
+def encode_recording(meta: Dict[str, Any], frames: List[InputFrame]) -> bytes:
+    body = b"".join(FRAME.pack(f.dt, f.flags, f.mouse_dx, f.mouse_dy) for f in frames)
+    meta_raw = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    header = HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, 0, len(frames), len(meta_raw))
+    return header + meta_raw + zlib.compress(body, 6)
+
+
+def decode_recording(raw: bytes) -> Tuple[Dict[str, Any], List[InputFrame]]:
+    if len(raw) < HEADER.size:
+        raise ReplayError("recording truncated")
+    magic, version, _flags, count, meta_len = HEADER.unpack_from(raw)
+    if magic != REPLAY_MAGIC:
+        raise ReplayError("not an input recording")
+    if version != REPLAY_VERSION:
+        raise ReplayError(f"unsupported recording version {version}")
+
+    offset = HEADER.size
+    meta = json.loads(raw[offset:offset + meta_len].decode("utf-8"))
+    try:
+        body = zlib.decompress(raw[offset + meta_len:])
+    except zlib.error as e:
+        raise ReplayError(f"recording body corrupt: {e}") from e
+    if len(body) != count * FRAME.size:
+        raise ReplayError("recording frame count mismatch")
+
+    frames = [InputFrame(*FRAME.unpack_from(body, i * FRAME.size)) for i in range(count)]
+    return meta, frames
+
+
+def read_recording(path: str) -> Tuple[Dict[str, Any], List[InputFrame]]:
+    with open(path, "rb") as f:
+        return decode_recording(f.read())
+
+
+def state_digest(game) -> str:
+    """
+    Hash of the simulated state a replay has to reproduce exactly.
+    """
+    player = game.player
+    state = (
+        tuple(player.pos), player.node.getH(), player.pitch,
+        game.door_state, game.prop_state, game.base.presence.level,
+    )
+    return format(zlib.crc32(repr(state).encode("utf-8")), "08x")
+
+
+# ---------------------------------------------------------------------------
+# INPUT SYSTEM
+# ---------------------------------------------------------------------------
+
+class InputSystem(DirectObject):
+    """
+    Produces one InputFrame per frame (self.frame) before any other task
+    runs. Live mode samples inputState and the mouse pointer. Record mode
+    does the same and keeps every frame; replay mode feeds frames back from
+    a file. In both record and replay the global clock is slaved to the
+    frame's dt so intervals and tasks see the same time as the game logic.
+
+    clock: "recorded" replays the stored dts, "fixed" uses fixed_dt.
+    """
+    def __init__(self, base, record: Optional[str] = None, replay: Optional[str] = None,
+                 clock: str = "recorded", fixed_dt: float = FIXED_DT):
+        super().__init__()
+        self.base = base
+        self.record_path = record
+        self.clock = clock
+        self.fixed_dt = fixed_dt
+
+        self.frame = InputFrame(0.0)
+        self.frames: List[InputFrame] = []
+        self.meta: Dict[str, Any] = {}
+        self.active = False
+        self.game = None
+        self._use = False
+        self._cursor = 0
+        self._last_real = 0.0
+
+        self.replay_meta: Optional[Dict[str, Any]] = None
+        self._replay: List[InputFrame] = []
+        if replay:
+            self.replay_meta, self._replay = read_recording(replay)
+
+        self.accept("space", self._latch_use)
+        base.taskMgr.add(self._tick, "inputSystem", sort=-100)
+
+    @property
+    def recording(self) -> bool:
+        return self.record_path is not None
+
+    @property
+    def replaying(self) -> bool:
+        return self.replay_meta is not None
+
+    def _latch_use(self):
+        self._use = True
+
+    # ------------------------------------------------------------
+    # SESSION
+    # ------------------------------------------------------------
+    def start(self, game) -> None:
+        """
+        Called by GameScreen.enter(); frames are captured or fed from here.
+        """
+        self.game = game
+        if not (self.recording or self.replaying) or self.active:
+            return
+
+        self.active = True
+        self._use = False
+        clock = ClockObject.getGlobalClock()
+        self._last_real = clock.getRealTime()
+        clock.setMode(ClockObject.MSlave)
+
+        if self.recording:
+            self.meta = {
+                "start": game.snapshot().to_save_data(),
+                "start_digest": state_digest(game),
+            }
+
+    def _next_live(self) -> InputFrame:
+        flags = 0
+        for name in INPUT_FLAGS[:-1]:
+            if inputState.isSet(name):
+                flags |= _BITS[name]
+        if self._use:
+            flags |= _BITS["use"]
+            self._use = False
+
+        dx = dy = 0
+        base = self.base
+        if base.mouse_captured and base.mouseWatcherNode.hasMouse():
+            win = base.win
+            cx = win.getXSize() // 2
+            cy = win.getYSize() // 2
+            md = win.getPointer(0)
+            # Rounded here so live play uses exactly what is recorded
+            dx = _pixels(md.getX() - cx)
+            dy = _pixels(md.getY() - cy)
+            # Recenter immediately
+            win.movePointer(0, cx, cy)
+
+        clock = ClockObject.getGlobalClock()
+        if self.active:
+            real = clock.getRealTime()
+            dt = _f32(real - self._last_real)
+            self._last_real = real
+        else:
+            dt = clock.getDt()
+        return InputFrame(dt, flags, dx, dy)
+
+    def _next_replay(self) -> Optional[InputFrame]:
+        if self._cursor >= len(self._replay):
+            return None
+        frame = self._replay[self._cursor]
+        self._cursor += 1
+        if self.clock == "fixed":
+            frame = InputFrame(self.fixed_dt, frame.flags, frame.mouse_dx, frame.mouse_dy)
+        return frame
+
+    def _tick(self, task):
+        if self.replaying and self.active:
+            frame = self._next_replay()
+            if frame is None:
+                self._finish_replay()
+                frame = InputFrame(0.0)
+        else:
+            frame = self._next_live()
+            if self.recording and self.active:
+                self.frames.append(frame)
+
+        if self.active:
+            clock = ClockObject.getGlobalClock()
+            clock.setFrameTime(clock.getFrameTime() + frame.dt)
+            clock.setDt(frame.dt)
+
+        self.frame = frame
+        return task.cont
+
+    # ------------------------------------------------------------
+    # END
+    # ------------------------------------------------------------
+    def _finish_replay(self) -> None:
+        self.active = False
+        ClockObject.getGlobalClock().setMode(ClockObject.MNormal)
+
+        expected = self.replay_meta.get("end_digest")
+        digest = state_digest(self.game) if self.game and self.game.player else None
+        match = expected is not None and digest == expected
+        if self.clock == "fixed":
+            # Different dts, so the end state is not expected to match
+            verdict = "fixed clock, not compared"
+        else:
+            verdict = "MATCH" if match else f"DIVERGED, expected {expected}"
+        print(f"Replay finished: {len(self._replay)} frames, state {digest} ({verdict})")
+        self.base.messenger.send(REPLAY_DONE_EVENT, [match])
+
+    def close(self) -> Optional[str]:
+        """
+        Writes the recording (record mode). Returns the path written.
+        """
+        if not self.recording or not self.meta:
+            return None
+
+        if self.game is not None and self.game.player is not None:
+            self.meta["end_digest"] = state_digest(self.game)
+        self.meta["frames"] = len(self.frames)
+        self.meta["duration"] = sum(f.dt for f in self.frames)
+
+        directory = os.path.dirname(self.record_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        atomic_write(self.record_path, encode_recording(self.meta, self.frames))
+        print(f"Input recording: {self.record_path} ({len(self.frames)} frames)")
+        self.meta = {}
+        return self.record_path
+
+    def destroy(self) -> None:
+        self.ignoreAll()
+        self.base.taskMgr.remove("inputSystem")
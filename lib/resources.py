@@ -0,0 +1,121 @@
+# lib/resources.py
+from __future__ import annotations
+
+from typing import Callable, Dict, List
+
+from direct.showbase.DirectObject import DirectObject
+
+
+class ResourceScope(DirectObject):
+    """
+    Owns what a screen puts into shared ShowBase state: nodes outside its
+    root, lights, tasks, event bindings, input watchers and GUI. Each is
+    registered as it is created; release() undoes all of it, newest
+    first, and the scope can be used again afterwards.
+    """
+    def __init__(self, base, name: str):
+        self.base = base
+        self.name = name
+        self._undo: List[Callable[[], None]] = []
+        self._task_names = set()
+
+    def add(self, release: Callable[[], None]) -> None:
+        """
+        Registers a release callback (a subsystem's destroy()).
+        """
+        self._undo.append(release)
+
+    def node(self, np):
+        self._undo.append(np.removeNode)
+        return np
+
+    def light(self, np, target=None):
+        """
+        Registers a light already set on target (default render).
+        """
+        target = target if target is not None else self.base.render
+
+        def release():
+            target.clearLight(np)
+            np.removeNode()
+
+        self._undo.append(release)
+        return np
+
+    def gui(self, widget):
+        self._undo.append(widget.destroy)
+        return widget
+
+    def watch(self, token_group):
+        """
+        Registers an inputState.watch*() token (group).
+        """
+        self._undo.append(token_group.release)
+        return token_group
+
+    def task(self, fn, name: str, **kw):
+        self._task_names.add(name)
+        return self.base.taskMgr.add(fn, name, **kw)
+
+    def do_later(self, delay: float, fn, name: str, **kw):
+        self._task_names.add(name)
+        return self.base.taskMgr.doMethodLater(delay, fn, name, **kw)
+
+    # accept()/ignore() come from DirectObject; bindings are per scope, so
+    # releasing never touches another owner's handlers for the same event.
+
+    def release(self) -> None:
+        self.ignoreAll()
+        for name in self._task_names:
+            self.base.taskMgr.remove(name)
+        self._task_names.clear()
+        while self._undo:
+            self._undo.pop()()
+
+
+# ---------------------------------------------------------------------------
+# LEAK CHECK
+# ---------------------------------------------------------------------------
+
+def resource_counts(base) -> Dict[str, int]:
+    """
+    Scene and ShowBase state that screens can leak into.
+    """
+    from panda3d.core import LightAttrib
+
+    lights = base.render.getAttrib(LightAttrib)
+    messenger = base.messenger
+    return {
+        "nodes": base.render.countNumDescendants() + base.render2d.countNumDescendants(),
+        "lights": lights.getNumOnLights() if lights else 0,
+        "tasks": len(base.taskMgr.getAllTasks()),
+        "listeners": sum(len(messenger.whoAccepts(e) or ()) for e in messenger.getEvents()),
+    }
+
+
+def check_cycles(base, make_screen, home, cycles: int = 5, frames: int = 3) -> List[str]:
+    """
+    Enters make_screen() from the screen home() returns and goes back to
+    it `cycles` times, stepping a few frames inside each time. Returns the counts that did not
+    come back to their value before the first cycle (empty when clean).
+    """
+    manager = base.screens
+    manager.change(home())
+    for _ in range(frames):
+        base.taskMgr.step()
+    before = resource_counts(base)
+
+    for _ in range(cycles):
+        manager.change(make_screen())
+        for _ in range(frames):
+            base.taskMgr.step()
+        manager.change(home())
+        for _ in range(frames):
+            base.taskMgr.step()
+
+    after = resource_counts(base)
+    return [
+        f"{name}: {before[name]} -> {after[name]} after {cycles} cycles"
+        for name in before
+        if after[name] != before[name]
+    ]
@@ -0,0 +1,202 @@
+# lib/rooms.py
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+
+from lib.grid import DOOR_CHARS, SOLID_CHARS, TileGrid
+
+
+# Room id for solid tiles and for the outside of the map
+NO_ROOM = -1
+
+UNREACHABLE = 0xFFFF            # distance_field value for tiles never reached
+
+LOCKED_DOOR_CHARS = frozenset("$+")
+
+_NEIGHBOURS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+
+@dataclass
+class Room:
+    id: int
+    tiles: int
+    bounds: Tuple[int, int, int, int]           # x0, y0, x1, y1 (inclusive)
+    portals: List[int] = field(default_factory=list)
+
+
+@dataclass
+class Portal:
+    """
+    A door tile joining two rooms (b is NO_ROOM for doors to the outside).
+    """
+    id: int
+    tile: Tuple[int, int]
+    a: int
+    b: int
+    char: str
+
+    @property
+    def locked(self) -> bool:
+        return self.char in LOCKED_DOOR_CHARS
+
+    def other(self, room: int) -> int:
+        return self.b if room == self.a else self.a
+
+
+class RoomGraph:
+    """
+    Rooms are 4-connected regions of open tiles with doors acting as walls;
+    portals are the doors between them. room_of maps every tile to its room.
+    """
+    def __init__(self, width: int, height: int, room_of: array, rooms: List[Room], portals: List[Portal]):
+        self.width = width
+        self.height = height
+        self.room_of = room_of
+        self.rooms = rooms
+        self.portals = portals
+        self.portal_at = {p.tile: p for p in portals}
+
+    def room_at(self, x: int, y: int) -> int:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return NO_ROOM
+        return self.room_of[y * self.width + x]
+
+    def neighbours(self, room: int) -> Iterable[Tuple[Portal, int]]:
+        for pid in self.rooms[room].portals:
+            portal = self.portals[pid]
+            yield portal, portal.other(room)
+
+    # ------------------------------------------------------------
+    # SERIALIZATION (room_of is stored separately as raw int32)
+    # ------------------------------------------------------------
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "width": self.width,
+            "height": self.height,
+            "rooms": [{"id": r.id, "tiles": r.tiles, "bounds": list(r.bounds), "portals": r.portals}
+                      for r in self.rooms],
+            "portals": [{"id": p.id, "tile": list(p.tile), "a": p.a, "b": p.b, "char": p.char}
+                        for p in self.portals],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], room_of: array) -> "RoomGraph":
+        rooms = [Room(r["id"], r["tiles"], tuple(r["bounds"]), list(r["portals"])) for r in data["rooms"]]
+        portals = [Portal(p["id"], tuple(p["tile"]), p["a"], p["b"], p["char"]) for p in data["portals"]]
+        return cls(data["width"], data["height"], room_of, rooms, portals)
+
+
+def build_rooms(grid: TileGrid) -> RoomGraph:
+    w, h = grid.width, grid.height
+    chars = grid.chars
+    solid = frozenset(ord(c) for c in SOLID_CHARS)
+    doors = frozenset(ord(c) for c in DOOR_CHARS)
+
+    room_of = array("i", [NO_ROOM]) * (w * h)
+    rooms: List[Room] = []
+
+    for start in range(w * h):
+        if room_of[start] != NO_ROOM or chars[start] in solid:
+            continue
+
+        rid = len(rooms)
+        room_of[start] = rid
+        queue = deque([start])
+        count = 0
+        x0, y0, x1, y1 = w, h, -1, -1
+        while queue:
+            i = queue.popleft()
+            count += 1
+            x, y = i % w, i // w
+            x0, y0, x1, y1 = min(x0, x), min(y0, y), max(x1, x), max(y1, y)
+            for dx, dy in _NEIGHBOURS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < w and 0 <= ny < h:
+                    j = ny * w + nx
+                    if room_of[j] == NO_ROOM and chars[j] not in solid:
+                        room_of[j] = rid
+                        queue.append(j)
+        rooms.append(Room(rid, count, (x0, y0, x1, y1)))
+
+    portals: List[Portal] = []
+    for i, c in enumerate(chars):
+        if c not in doors:
+            continue
+        x, y = i % w, i // w
+        touching = []
+        for dx, dy in _NEIGHBOURS:
+            r = NO_ROOM
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < w and 0 <= ny < h:
+                r = room_of[ny * w + nx]
+            if r != NO_ROOM and r not in touching:
+                touching.append(r)
+        if not touching:
+            continue
+        a = touching[0]
+        b = touching[1] if len(touching) > 1 else NO_ROOM
+        portal = Portal(len(portals), (x, y), a, b, chr(c))
+        portals.append(portal)
+        rooms[a].portals.append(portal.id)
+        if b != NO_ROOM:
+            rooms[b].portals.append(portal.id)
+
+    return RoomGraph(w, h, room_of, rooms, portals)
+
+
+# ---------------------------------------------------------------------------
+# NAVIGATION FIELDS
+# ---------------------------------------------------------------------------
+
+def distance_field(grid: TileGrid, sources: Iterable[Tuple[int, int]],
+                   through_doors: bool = True, locked_doors: bool = False) -> array:
+    """
+    Breadth-first tile distance from the nearest source over open tiles
+    (and doors, unless through_doors is False; locked ones only with
+    locked_doors). Unreached tiles hold UNREACHABLE. Following the
+    steepest descent from any tile leads to a source.
+    """
+    w, h = grid.width, grid.height
+    chars = grid.chars
+    blocked = set(ord(c) for c in SOLID_CHARS)
+    if through_doors:
+        blocked -= set(ord(c) for c in DOOR_CHARS)
+        if not locked_doors:
+            blocked |= set(ord(c) for c in LOCKED_DOOR_CHARS)
+
+    field = array("H", [UNREACHABLE]) * (w * h)
+    queue = deque()
+    for x, y in sources:
+        i = y * w + x
+        field[i] = 0
+        queue.append(i)
+
+    while queue:
+        i = queue.popleft()
+        d = field[i] + 1
+        if d >= UNREACHABLE:
+            continue
+        x, y = i % w, i // w
+        for dx, dy in _NEIGHBOURS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < w and 0 <= ny < h:
+                j = ny * w + nx
+                if field[j] == UNREACHABLE and chars[j] not in blocked:
+                    field[j] = d
+                    queue.append(j)
+    return field
+
+
+def nav_targets(grid: TileGrid) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    Named source sets baked into navigation fields: player start and stairs.
+    """
+    targets: Dict[str, List[Tuple[int, int]]] = {}
+    for name, char in (("start", "X"), ("stairs_down", "<"), ("stairs_up", ">")):
+        tiles = [(i % grid.width, i // grid.width) for i, c in enumerate(grid.chars) if c == ord(char)]
+        if tiles:
+            targets[name] = tiles
+    return targets
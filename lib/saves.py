@@ -0,0 +1,575 @@
+# lib/saves.py
+from __future__ import annotations
+
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# ---------------------------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------------------------
+
+SAVE_DIR = "data/saves"
+SAVE_EXT = ".pbsav"
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+THUMBNAIL_SIZE = (160, 90)
+
+SAVE_MAGIC = b"PBSV"
+SAVE_VERSION = 2
+
+# Header flags
+FLAG_ZLIB = 0x1     # section body is zlib-compressed
+
+# Header: magic, version, flags, section count, crc32 of the stored body
+_HEADER = struct.Struct("<4sHHII")
+# Section: 4-byte tag, payload length
+_SECTION = struct.Struct("<4sI")
+
+_META = struct.Struct("<dd")        # play_time, timestamp
+_PLAYER = struct.Struct("<5f")      # x, y, z, h, pitch
+_PRESENCE = struct.Struct("<f")     # level
+_COUNT = struct.Struct("<I")
+_PROP = struct.Struct("<6fI")       # pos xyz, hpr, state
+_STR_LEN = struct.Struct("<H")
+
+
+class SaveFormatError(RuntimeError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# DEFAULTS
+# ---------------------------------------------------------------------------
+
+def new_save_data(wing: str = "main_floor") -> Dict[str, Any]:
+    """
+    Returns a save dict in the current (in-memory) schema.
+    """
+    return {
+        "version": SAVE_VERSION,
+        "wing": wing,
+        "play_time": 0.0,
+        "timestamp": time.time(),
+        "presence": 0.0,
+        "player": None,     # {"pos": [x, y, z], "h": float, "pitch": float}
+        "doors": [],        # [[x, y, unlocked], ...]
+        "props": [],        # [{"id": str, "pos": [..], "hpr": [..], "state": int}, ...]
+    }
+
+
+# ---------------------------------------------------------------------------
+# ENCODING
+# ---------------------------------------------------------------------------
+
+def _pack_str(s: str) -> bytes:
+    raw = s.encode("utf-8")
+    return _STR_LEN.pack(len(raw)) + raw
+
+
+def _unpack_str(buf: bytes, off: int) -> Tuple[str, int]:
+    (n,) = _STR_LEN.unpack_from(buf, off)
+    off += _STR_LEN.size
+    return buf[off:off + n].decode("utf-8"), off + n
+
+
+def _le_bytes(arr: array) -> bytes:
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _le_array(typecode: str, raw: bytes) -> array:
+    arr = array(typecode)
+    arr.frombytes(raw)
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+def _encode_sections(data: Dict[str, Any]) -> List[Tuple[bytes, bytes]]:
+    sections = []
+
+    meta = _META.pack(float(data.get("play_time", 0.0)), float(data.get("timestamp", 0.0)))
+    sections.append((b"META", meta + _pack_str(data.get("wing", "main_floor"))))
+
+    player = data.get("player")
+    if player:
+        x, y, z = player["pos"]
+        sections.append((b"PLYR", _PLAYER.pack(x, y, z, player.get("h", 0.0), player.get("pitch", 0.0))))
+
+    sections.append((b"PRES", _PRESENCE.pack(float(data.get("presence", 0.0)))))
+
+    doors = data.get("doors") or []
+    if doors:
+        xs = array("H", (d[0] for d in doors))
+        ys = array("H", (d[1] for d in doors))
+        states = bytes(1 if d[2] else 0 for d in doors)
+        sections.append((b"DOOR", _COUNT.pack(len(doors)) + _le_bytes(xs) + _le_bytes(ys) + states))
+
+    props = data.get("props") or []
+    if props:
+        # Fixed-width records first so they decode in one pass, then the
+        # id lengths and the ids themselves
+        ids = [p["id"].encode("utf-8") for p in props]
+        parts = [_COUNT.pack(len(props))]
+        parts.extend(_PROP.pack(*p["pos"], *p["hpr"], int(p.get("state", 0))) for p in props)
+        parts.append(_le_bytes(array("H", (len(i) for i in ids))))
+        parts.extend(ids)
+        sections.append((b"PROP", b"".join(parts)))
+
+    return sections
+
+
+def encode_save(data: Dict[str, Any], flags: int = 0) -> bytes:
+    sections = _encode_sections(data)
+    body = b"".join(_SECTION.pack(tag, len(payload)) + payload for tag, payload in sections)
+    if flags & FLAG_ZLIB:
+        body = zlib.compress(body, 6)
+    header = _HEADER.pack(SAVE_MAGIC, SAVE_VERSION, flags, len(sections), zlib.crc32(body))
+    return header + body
+
+
+# ---------------------------------------------------------------------------
+# DECODING
+# ---------------------------------------------------------------------------
+
+def _decode_props_v1(buf: bytes, n: int) -> List[Dict[str, Any]]:
+    # v1 interleaved each id with its record
+    off = _COUNT.size
+    props = []
+    for _ in range(n):
+        prop_id, off = _unpack_str(buf, off)
+        px, py, pz, h, p, r, state = _PROP.unpack_from(buf, off)
+        off += _PROP.size
+        props.append({"id": prop_id, "pos": [px, py, pz], "hpr": [h, p, r], "state": state})
+    return props
+
+
+def _decode_props(buf: bytes, n: int) -> List[Dict[str, Any]]:
+    off = _COUNT.size
+    end = off + n * _PROP.size
+    records = list(_PROP.iter_unpack(buf[off:end]))
+    lengths = _le_array("H", buf[end:end + n * 2])
+    if len(records) != n or len(lengths) != n:
+        raise SaveFormatError("Save file is corrupt (truncated props)")
+
+    off = end + n * 2
+    props = []
+    for (px, py, pz, h, p, r, state), length in zip(records, lengths):
+        props.append({
+            "id": buf[off:off + length].decode("utf-8"),
+            "pos": [px, py, pz], "hpr": [h, p, r], "state": state,
+        })
+        off += length
+    return props
+
+
+def _decode_section(data: Dict[str, Any], tag: bytes, buf: bytes) -> None:
+    if tag == b"META":
+        data["play_time"], data["timestamp"] = _META.unpack_from(buf, 0)
+        data["wing"], _ = _unpack_str(buf, _META.size)
+
+    elif tag == b"PLYR":
+        x, y, z, h, pitch = _PLAYER.unpack_from(buf, 0)
+        data["player"] = {"pos": [x, y, z], "h": h, "pitch": pitch}
+
+    elif tag == b"PRES":
+        (data["presence"],) = _PRESENCE.unpack_from(buf, 0)
+
+    elif tag == b"DOOR":
+        (n,) = _COUNT.unpack_from(buf, 0)
+        off = _COUNT.size
+        xs = _le_array("H", buf[off:off + n * 2])
+        ys = _le_array("H", buf[off + n * 2:off + n * 4])
+        states = buf[off + n * 4:off + n * 5]
+        data["doors"] = [[xs[i], ys[i], bool(states[i])] for i in range(n)]
+
+    elif tag == b"PROP":
+        (n,) = _COUNT.unpack_from(buf, 0)
+        if data["version"] < 2:
+            data["props"] = _decode_props_v1(buf, n)
+        else:
+            data["props"] = _decode_props(buf, n)
+
+    # Unknown tags are skipped so older builds can read newer saves.
+
+
+def decode_save(raw: bytes) -> Dict[str, Any]:
+    if len(raw) < _HEADER.size:
+        raise SaveFormatError("Save file is truncated")
+
+    magic, version, flags, n_sections, crc = _HEADER.unpack_from(raw, 0)
+    if magic != SAVE_MAGIC:
+        raise SaveFormatError("Not a Protocol Black save file")
+    if version > SAVE_VERSION:
+        raise SaveFormatError(f"Save version {version} is newer than supported ({SAVE_VERSION})")
+
+    body = raw[_HEADER.size:]
+    if zlib.crc32(body) != crc:
+        raise SaveFormatError("Save file is corrupt (checksum mismatch)")
+    if flags & FLAG_ZLIB:
+        try:
+            body = zlib.decompress(body)
+        except zlib.error as e:
+            raise SaveFormatError("Save file is corrupt (bad compressed body)") from e
+
+    data = new_save_data()
+    data["version"] = version
+    off = 0
+    try:
+        for _ in range(n_sections):
+            tag, length = _SECTION.unpack_from(body, off)
+            off += _SECTION.size
+            _decode_section(data, tag, body[off:off + length])
+            off += length
+    except (struct.error, IndexError, ValueError) as e:
+        # Short or mangled sections (UnicodeDecodeError is a ValueError)
+        raise SaveFormatError("Save file is corrupt (bad section)") from e
+
+    return migrate(data)
+
+
+# ---------------------------------------------------------------------------
+# SCHEMA MIGRATION
+# ---------------------------------------------------------------------------
+
+def _migrate_v0(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    v0 = the original JSON saves, which only carried "wing".
+    """
+    out = new_save_data(data.get("wing", "main_floor"))
+    for key in ("play_time", "timestamp", "presence", "player", "doors", "props"):
+        if key in data:
+            out[key] = data[key]
+    out["version"] = 1
+    return out
+
+
+def _migrate_v1(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    v1 only differs from v2 in the PROP section layout on disk; the dict
+    is the same.
+    """
+    data["version"] = 2
+    return data
+
+
+# version -> function upgrading a dict from that version to version + 1
+MIGRATIONS: Dict[int, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    0: _migrate_v0,
+    1: _migrate_v1,
+}
+
+
+def migrate(data: Dict[str, Any]) -> Dict[str, Any]:
+    version = int(data.get("version", 0))
+    while version < SAVE_VERSION:
+        step = MIGRATIONS.get(version)
+        if step is None:
+            raise SaveFormatError(f"No migration from save version {version}")
+        data = step(data)
+        version = int(data["version"])
+    return data
+
+
+# ---------------------------------------------------------------------------
+# FILE I/O
+# ---------------------------------------------------------------------------
+
+def read_save(path: str) -> Dict[str, Any]:
+    """
+    Reads a binary save, or a legacy JSON save (migrated on the fly).
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    if raw[:len(SAVE_MAGIC)] == SAVE_MAGIC:
+        return decode_save(raw)
+
+    try:
+        legacy = json.loads(raw.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise SaveFormatError(f"Unreadable save file: {path}") from e
+
+    if not isinstance(legacy, dict):
+        raise SaveFormatError(f"Unreadable save file: {path}")
+    legacy.setdefault("version", 0)
+    return migrate(legacy)
+
+
+def atomic_write(path: str, raw: bytes) -> None:
+    """
+    Write-to-temp plus rename: readers see either the old file or the new
+    one, never a partial write.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def save_path(slot: str) -> str:
+    return os.path.join(SAVE_DIR, slot + SAVE_EXT)
+
+
+# ---------------------------------------------------------------------------
+# SAVE INDEX
+# ---------------------------------------------------------------------------
+
+# Serializes read-modify-write of the index between the writer and scanners
+_INDEX_LOCK = threading.Lock()
+
+
+def index_path() -> str:
+    return os.path.join(SAVE_DIR, INDEX_FILE)
+
+
+def index_entry(filename: str, data: Dict[str, Any], st: os.stat_result,
+                thumbnail: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "file": filename,
+        "wing": data.get("wing", "main_floor"),
+        "play_time": float(data.get("play_time", 0.0)),
+        "timestamp": float(data.get("timestamp", 0.0)) or st.st_mtime,
+        "thumbnail": thumbnail,
+        "size": st.st_size,
+        "mtime": st.st_mtime,
+    }
+
+
+def load_index() -> Dict[str, Dict[str, Any]]:
+    """
+    Returns {filename: entry}. A missing or unreadable index is empty; the
+    next reconcile() rebuilds it.
+    """
+    try:
+        with open(index_path(), "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(raw, dict) or raw.get("version") != INDEX_VERSION:
+        return {}
+    saves = raw.get("saves")
+    return saves if isinstance(saves, dict) else {}
+
+
+def _write_index(entries: Dict[str, Dict[str, Any]]) -> None:
+    raw = json.dumps({"version": INDEX_VERSION, "saves": entries}, indent=1)
+    atomic_write(index_path(), raw.encode("utf-8"))
+
+
+def update_index(filename: str, entry: Optional[Dict[str, Any]]) -> None:
+    """
+    Adds/replaces (or removes, when entry is None) one index entry.
+    """
+    with _INDEX_LOCK:
+        entries = load_index()
+        if entry is None:
+            entries.pop(filename, None)
+        else:
+            entries[filename] = entry
+        _write_index(entries)
+
+
+def _is_save_file(name: str) -> bool:
+    return name != INDEX_FILE and not name.endswith(".tmp") and not name.endswith(".png")
+
+
+def reconcile_index() -> Dict[str, Dict[str, Any]]:
+    """
+    Brings the index in line with the save directory: new or changed files
+    are read for their metadata, deleted files are dropped. Only files whose
+    size/mtime differ from the index are opened, so this is cheap when the
+    index is already current. Meant to run off the main thread.
+    """
+    with _INDEX_LOCK:
+        entries = load_index()
+        seen = set()
+        changed = False
+
+        try:
+            scan = list(os.scandir(SAVE_DIR))
+        except OSError:
+            scan = []
+
+        for de in scan:
+            if not de.is_file() or not _is_save_file(de.name):
+                continue
+            seen.add(de.name)
+            st = de.stat()
+            old = entries.get(de.name)
+            if old and old.get("size") == st.st_size and old.get("mtime") == st.st_mtime:
+                continue
+            try:
+                data = read_save(de.path)
+            except (OSError, SaveFormatError):
+                continue
+            entries[de.name] = index_entry(de.name, data, st, old.get("thumbnail") if old else None)
+            changed = True
+
+        for name in list(entries):
+            if name not in seen:
+                del entries[name]
+                changed = True
+
+        if changed:
+            _write_index(entries)
+        return entries
+
+
+def _write_thumbnail(screenshot, path: str) -> None:
+    from panda3d.core import PNMImage
+
+    img = PNMImage()
+    if not screenshot.store(img):
+        raise SaveFormatError("Could not read back screenshot for thumbnail")
+    small = PNMImage(*THUMBNAIL_SIZE)
+    small.quickFilterFrom(img)
+    tmp = path + ".tmp.png"
+    if not small.write(tmp):
+        raise SaveFormatError(f"Could not write thumbnail {path}")
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# BACKGROUND WRITER
+# ---------------------------------------------------------------------------
+
+class SaveWriter:
+    """
+    Encodes and writes saves on a worker thread so the frame never waits on
+    disk. Callers hand over either a save dict they will not mutate
+    afterwards, or an immutable snapshot with a to_save_data() method, which
+    is then converted on the worker too. Every write also refreshes the
+    save index. Completed writes are collected with poll() from the main
+    thread.
+    """
+    def __init__(self):
+        self._jobs: "queue.Queue[Optional[Tuple[str, Any, Any, int]]]" = queue.Queue()
+        self._done: "queue.Queue[Tuple[str, Optional[BaseException]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="SaveWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, path: str, data: Any, screenshot=None, flags: int = 0) -> None:
+        """
+        screenshot: optional Texture (e.g. win.getScreenshot()) that is
+        scaled down and written next to the save as its thumbnail.
+        flags: header flags for encode_save, e.g. FLAG_ZLIB.
+        """
+        self._jobs.put((path, data, screenshot, flags))
+
+    def poll(self) -> List[Tuple[str, Optional[BaseException]]]:
+        """
+        Returns (path, error) for every write finished since the last poll.
+        """
+        out = []
+        while True:
+            try:
+                out.append(self._done.get_nowait())
+            except queue.Empty:
+                return out
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Flushes pending writes and stops the worker.
+        """
+        if self._thread.is_alive():
+            self._jobs.put(None)
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            path, data, screenshot, flags = job
+            try:
+                if hasattr(data, "to_save_data"):
+                    data = data.to_save_data()
+                atomic_write(path, encode_save(data, flags))
+
+                thumbnail = None
+                if screenshot is not None:
+                    thumbnail = os.path.splitext(os.path.basename(path))[0] + ".png"
+                    _write_thumbnail(screenshot, os.path.join(os.path.dirname(path), thumbnail))
+
+                filename = os.path.basename(path)
+                update_index(filename, index_entry(filename, data, os.stat(path), thumbnail))
+                self._done.put((path, None))
+            except Exception as e:  # reported back to the main thread
+                self._done.put((path, e))
+
+
+# ---------------------------------------------------------------------------
+# BENCHMARK
+# ---------------------------------------------------------------------------
+
+def _sample_save() -> Dict[str, Any]:
+    data = new_save_data("main_floor")
+    data["play_time"] = 5423.25
+    data["presence"] = 42.5
+    data["player"] = {"pos": [61.0, 23.0, 0.0], "h": 180.0, "pitch": -12.5}
+    data["doors"] = [[x, y, (x + y) % 2 == 0] for x in range(0, 60, 3) for y in (0, 4, 8)]
+    data["props"] = [
+        {"id": "chair", "pos": [i * 1.5, 6.0, 0.0], "hpr": [90.0, 0.0, 0.0], "state": i % 3}
+        for i in range(30)
+    ]
+    return data
+
+
+def benchmark(iterations: int = 2000) -> Dict[str, Dict[str, float]]:
+    """
+    Compares encode/decode throughput and size against the JSON baseline.
+    """
+    data = _sample_save()
+    results = {}
+
+    codecs = {
+        "json": (
+            lambda d: json.dumps(d).encode("utf-8"),
+            lambda b: json.loads(b.decode("utf-8")),
+        ),
+        "binary": (encode_save, decode_save),
+    }
+
+    for name, (enc, dec) in codecs.items():
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            raw = enc(data)
+        t1 = time.perf_counter()
+        for _ in range(iterations):
+            dec(raw)
+        t2 = time.perf_counter()
+
+        results[name] = {
+            "bytes": float(len(raw)),
+            "save_per_sec": iterations / (t1 - t0),
+            "load_per_sec": iterations / (t2 - t1),
+        }
+
+    return results
+
+
+if __name__ == "__main__":
+    for name, r in benchmark().items():
+        print(
+            f"{name:>6}: {int(r['bytes']):6d} bytes  "
+            f"save {r['save_per_sec']:10.0f}/s  load {r['load_per_sec']:10.0f}/s"
+        )
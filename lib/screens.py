@@ -1,10 +1,65 @@
-from panda3d.core import NodePath
+import time
+from collections import OrderedDict
+
+from panda3d.core import NodePath, TexturePool
+
+from lib.resources import ResourceScope
+
+
+# Time per frame spent stepping a screen's prepare() during a transition
+PREPARE_BUDGET = 1.0 / 120.0
+FADE_TIME = 0.4
+
+# Menu screens kept built by ScreenManager.screen(), least recently shown
+# evicted first. Entering a screen that isn't cacheable (the game) drops
+# them all.
+MENU_CACHE_SIZE = 4
+
+
+# Menu image path -> Texture
+UI_TEXTURES = {}
+
+
+def ui_texture(path):
+    """
+    Menu image, loaded once and shared by every screen that shows it.
+    """
+    tex = UI_TEXTURES.get(path)
+    if tex is None:
+        tex = UI_TEXTURES[path] = TexturePool.loadTexture(path)
+    return tex
 
 
 class Screen:
+    # Set once prepare() has run to completion
+    prepared = False
+
+    # Cacheable screens only hide in exit() and are reused by
+    # ScreenManager.screen(); destroy() frees them on eviction
+    cacheable = False
+
     def __init__(self, base):
         self.base = base
         self.root = NodePath(self.__class__.__name__)
+        # Everything the screen creates outside self.root (lights, tasks,
+        # event bindings, GUI); released with the screen
+        self.resources = ResourceScope(base, self.__class__.__name__)
+
+    def prepare(self):
+        """
+        Optional generator that loads resources before enter(), yielding
+        progress in 0..1. ScreenManager.transition() steps it a slice per
+        frame behind a loading screen.
+        """
+        return
+        yield
+
+    def cancel(self):
+        """
+        Called instead of enter() when a transition is cancelled mid-prepare.
+        """
+        self.resources.release()
+        self.root.removeNode()
 
     def enter(self):
         self.root.reparentTo(self.base.render)
@@ -12,6 +67,17 @@ class Screen:
     def exit(self):
         self.root.detachNode()
 
+    def destroy(self):
+        self.resources.release()
+        self.root.removeNode()
+
+    def simulate(self, dt):
+        """
+        Fixed-rate simulation step (see lib/simulation.py); update() runs
+        once per rendered frame.
+        """
+        pass
+
     def update(self, dt):
         pass
 
@@ -28,13 +94,197 @@ class ScreenManager:
     def __init__(self, base):
         self.base = base
         self.current = None
+        self._fader = None
+
+        self.loading = None
+        self._target = None
+        self._fallback = None
+        self._prepare = None
+        self._sequence = None
+
+        # Screens prepared ahead of time (e.g. during splash warm-up)
+        self._stash = {}
+
+        # key -> cacheable screen, least recently shown first
+        self._cache = OrderedDict()
+        self.cache_stats = {"built": 0, "reused": 0, "evicted": 0}
 
     def change(self, screen):
         if self.current:
             self.current.exit()
         self.current = screen
         self.current.enter()
+        if not screen.cacheable:
+            self.evict()
+
+    # ------------------------------------------------------------
+    # MENU CACHE
+    # ------------------------------------------------------------
+    def screen(self, key, factory):
+        """
+        The cached screen for key, built with factory(base, manager) on
+        first use or after eviction.
+        """
+        screen = self._cache.pop(key, None)
+        if screen is None:
+            screen = factory(self.base, self)
+            self.cache_stats["built"] += 1
+        else:
+            self.cache_stats["reused"] += 1
+        self._cache[key] = screen
+
+        while len(self._cache) > MENU_CACHE_SIZE:
+            oldest = next(iter(self._cache))
+            if not self._evict_one(oldest):
+                break
+        return screen
+
+    def show(self, key, factory):
+        self.change(self.screen(key, factory))
+
+    def evict(self, key=None):
+        """
+        Destroys one cached screen, or all of them; the one on screen stays.
+        """
+        for k in ([key] if key is not None else list(self._cache)):
+            if k in self._cache:
+                self._evict_one(k)
+
+    def _evict_one(self, key):
+        screen = self._cache[key]
+        if screen is self.current or screen is self._target:
+            return False
+        del self._cache[key]
+        screen.destroy()
+        self.cache_stats["evicted"] += 1
+        return True
+
+    def stash(self, key, screen):
+        self._stash[key] = screen
+
+    def take(self, key):
+        """
+        Returns (and forgets) a stashed screen, or None.
+        """
+        return self._stash.pop(key, None)
+
+    def kept(self):
+        """
+        Screens alive but not on screen: stashed, cached, or being
+        prepared. Their roots are detached but still hold their resources.
+        """
+        screens = list(self._stash.values()) + list(self._cache.values())
+        if self._target is not None:
+            screens.append(self._target)
+        return [s for s in screens if s is not self.current]
+
+    # ------------------------------------------------------------
+    # TRANSITIONS
+    # ------------------------------------------------------------
+    @property
+    def fader(self):
+        # Created on first transition so startup doesn't pay for it
+        if self._fader is None:
+            from lib.ScreenFader import ScreenFader
+            self._fader = ScreenFader(self.base)
+        return self._fader
+
+    def transition(self, screen, fallback=None):
+        """
+        Fade out, show the loading screen while screen.prepare() runs in
+        per-frame slices, then enter the screen and fade back in.
+        fallback: zero-arg factory for the screen to show if cancelled.
+        """
+        if self.in_transition():
+            return
+
+        from direct.interval.IntervalGlobal import Func, Sequence
+
+        self._target = screen
+        self._fallback = fallback
+        self._play(Sequence(self.fader.fade_out(FADE_TIME), Func(self._begin_loading)))
+
+    def in_transition(self):
+        return self._target is not None
+
+    def cancel_transition(self):
+        if self._target is None or self._prepare is None:
+            return
+
+        self._prepare.close()
+        self._prepare = None
+        self._target.cancel()
+        self._target = None
+
+        fallback = self._fallback
+        self._fallback = None
+        self._end_loading()
+        if fallback is not None:
+            self.change(fallback())
+
+    def _play(self, sequence):
+        if self._sequence:
+            self._sequence.finish()
+        self._sequence = sequence
+        sequence.start()
+
+    def _begin_loading(self):
+        from screens.loading import LoadingScreen
+
+        if self.current:
+            self.current.exit()
+            self.current = None
+
+        if self._target.prepared:
+            self._finish()
+            return
+
+        self.loading = LoadingScreen(
+            self.base,
+            on_cancel=self.cancel_transition if self._fallback else None,
+        )
+        self.loading.enter()
+        self.fader.overlay.hide()
+
+        self._prepare = self._target.prepare()
+
+    def _end_loading(self):
+        if self.loading:
+            self.loading.exit()
+            self.loading = None
+
+    def _step_prepare(self):
+        deadline = time.perf_counter() + PREPARE_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                progress = next(self._prepare)
+            except StopIteration:
+                self._finish()
+                return
+            if progress is not None:
+                self.loading.set_progress(progress)
+
+    def _finish(self):
+        self._prepare = None
+        self._end_loading()
+
+        screen = self._target
+        self._target = None
+        self._fallback = None
+
+        self.fader.overlay.show()
+        self.fader.overlay.setColorScale(0, 0, 0, 1)
+        self.change(screen)
+        self._play(self.fader.fade_in(FADE_TIME))
+
+    def simulate(self, dt):
+        if self._target is None and self.current:
+            self.current.simulate(dt)
 
     def update(self, dt):
+        if self._prepare is not None:
+            self._step_prepare()
+            return
+
         if self.current:
             self.current.update(dt)
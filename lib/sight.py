@@ -0,0 +1,218 @@
+# lib/sight.py
+from __future__ import annotations
+
+import math
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lib.doors import DoorSystem
+from lib.grid import TileGrid
+from lib.rooms import NO_ROOM, RoomGraph, build_rooms
+
+
+Tile = Tuple[int, int]
+
+
+def reference_visible(grid: TileGrid, a: Tile, b: Tile) -> bool:
+    """
+    Whether the centre of tile b can be seen from the centre of tile a:
+    one TileGrid.raycast along the segment. SightService must agree.
+    """
+    ts = grid.tile_size
+    x0, y0 = (a[0] + 0.5) * ts, (a[1] + 0.5) * ts
+    dx, dy = (b[0] - a[0]) * ts, (b[1] - a[1]) * ts
+    if dx == 0 and dy == 0:
+        return not grid.is_solid(*a)
+    return grid.raycast(x0, y0, dx, dy, max_distance=math.hypot(dx, dy)) is None
+
+
+class SightService:
+    """
+    Line of sight between tiles (centre to centre) for AI, many queries
+    per call.
+
+    A query is first checked against the potentially visible set: two
+    rooms can only see each other if a chain of currently open doors joins
+    them, which is one component lookup per query. The rest are traced
+    together, one tile step per iteration for every ray at once, with the
+    same DDA as TileGrid.raycast so the answers match it exactly. Answers
+    are cached per (from, to) tile pair until begin_frame() or a door
+    changes.
+    """
+    def __init__(self, grid: TileGrid, doors: DoorSystem, graph: Optional[RoomGraph] = None):
+        self.grid = grid
+        self.doors = doors
+        self.graph = graph if graph is not None else build_rooms(grid)
+        self._stale_rooms = False
+
+        self._revision = -1
+        self._component = np.zeros(0, np.int32)
+
+        self._cache: Dict[int, bool] = {}
+        self.stats = {"queries": 0, "cached": 0, "rejected": 0, "traced": 0, "steps": 0}
+
+    # ------------------------------------------------------------
+    # INVALIDATION
+    # ------------------------------------------------------------
+    def rooms_changed(self) -> None:
+        """
+        The map changed under the room graph (GameScreen.set_tile).
+        """
+        self._stale_rooms = True
+        self._cache.clear()
+
+    def begin_frame(self) -> None:
+        self._cache.clear()
+
+    def _refresh(self) -> None:
+        if self._stale_rooms:
+            self.graph = build_rooms(self.grid)
+            self._stale_rooms = False
+            self._revision = -1
+        if self.doors.revision == self._revision:
+            return
+        self._revision = self.doors.revision
+        self._cache.clear()
+
+        # Rooms joined by doors that don't block right now (grid solidity
+        # is what the ray test sees) share a component
+        graph = self.graph
+        parent = list(range(len(graph.rooms)))
+
+        def find(r):
+            while parent[r] != r:
+                parent[r] = parent[parent[r]]
+                r = parent[r]
+            return r
+
+        for portal in graph.portals:
+            if portal.b != NO_ROOM and not self.grid.is_solid(*portal.tile):
+                parent[find(portal.a)] = find(portal.b)
+        self._component = np.array([find(r) for r in range(len(parent))], np.int32)
+
+    # ------------------------------------------------------------
+    # QUERIES
+    # ------------------------------------------------------------
+    def visible(self, a: Tile, b: Tile) -> bool:
+        return bool(self.query(np.array([[a[0], a[1], b[0], b[1]]], np.int64))[0])
+
+    def query(self, pairs) -> np.ndarray:
+        """
+        pairs: (N, 4) tiles as ax, ay, bx, by. Returns N bools.
+        """
+        self._refresh()
+        grid = self.grid
+        w, h = grid.width, grid.height
+        pairs = np.asarray(pairs, np.int64).reshape(-1, 4)
+        n = len(pairs)
+        self.stats["queries"] += n
+        result = np.zeros(n, bool)
+        if n == 0:
+            return result
+
+        ax, ay, bx, by = pairs.T
+        inside = (0 <= ax) & (ax < w) & (0 <= ay) & (ay < h) & (0 <= bx) & (bx < w) & (0 <= by) & (by < h)
+        keys = ((ay * w + ax) * (w * h) + by * w + bx).tolist()
+
+        cache = self._cache
+        todo = []
+        for i in np.nonzero(inside)[0].tolist():
+            hit = cache.get(keys[i])
+            if hit is not None:
+                result[i] = hit
+            else:
+                todo.append(i)
+        self.stats["cached"] += int(inside.sum()) - len(todo)
+        if not todo:
+            return result
+        todo = np.array(todo, np.int64)
+
+        # Early out: rooms that no open door joins can't see each other
+        room_of = np.frombuffer(self.graph.room_of, np.int32)
+        ra = room_of[ay[todo] * w + ax[todo]]
+        rb = room_of[by[todo] * w + bx[todo]]
+        both = (ra != NO_ROOM) & (rb != NO_ROOM)
+        apart = np.zeros(len(todo), bool)
+        apart[both] = self._component[ra[both]] != self._component[rb[both]]
+        self.stats["rejected"] += int(apart.sum())
+        for i in todo[apart].tolist():
+            cache[keys[i]] = False
+
+        trace = todo[~apart]
+        if len(trace):
+            seen = self._trace(ax[trace], ay[trace], bx[trace], by[trace])
+            result[trace] = seen
+            for i, s in zip(trace.tolist(), seen.tolist()):
+                cache[keys[i]] = s
+        return result
+
+    def _trace(self, ax, ay, bx, by) -> np.ndarray:
+        """
+        TileGrid.raycast from each a-centre towards each b-centre, all rays
+        stepping together. True where nothing solid is hit before b.
+        """
+        grid = self.grid
+        ts = grid.tile_size
+        w = grid.width
+        solid = np.frombuffer(bytes(grid.solid), np.uint8)
+        n = len(ax)
+        self.stats["traced"] += n
+
+        x0 = (ax + 0.5) * ts
+        y0 = (ay + 0.5) * ts
+        dx = ((bx - ax) * ts).astype(np.float64)
+        dy = ((by - ay) * ts).astype(np.float64)
+        # Tile deltas square exactly, so this rounds like math.hypot in
+        # raycast (np.hypot can be an ulp off and flip a corner case)
+        limit = np.sqrt(dx * dx + dy * dy)
+        seen = np.zeros(n, bool)
+
+        # Zero-length rays only look at their own tile
+        still = limit == 0.0
+        seen[still] = solid[ay[still] * w + ax[still]] == 0
+        idx = np.nonzero(~still)[0]
+        if not len(idx):
+            return seen
+
+        length = limit[idx]
+        ndx = dx[idx] / length
+        ndy = dy[idx] / length
+        tx = ax[idx].copy()
+        ty = ay[idx].copy()
+        step_x = np.where(ndx > 0, 1, -1)
+        step_y = np.where(ndy > 0, 1, -1)
+        with np.errstate(divide="ignore"):
+            next_x = np.where(ndx != 0, ((tx + (step_x > 0)) * ts - x0[idx]) / ndx, np.inf)
+            next_y = np.where(ndy != 0, ((ty + (step_y > 0)) * ts - y0[idx]) / ndy, np.inf)
+            delta_x = np.where(ndx != 0, ts / np.abs(ndx), np.inf)
+            delta_y = np.where(ndy != 0, ts / np.abs(ndy), np.inf)
+
+        while len(idx):
+            self.stats["steps"] += 1
+            blocked = solid[ty * w + tx] == 1
+            move_x = next_x < next_y
+            reach = np.where(move_x, next_x, next_y) > length
+            seen[idx[reach & ~blocked]] = True
+
+            keep = ~(blocked | reach)
+            idx, tx, ty, length = idx[keep], tx[keep], ty[keep], length[keep]
+            next_x, next_y, delta_x, delta_y = next_x[keep], next_y[keep], delta_x[keep], delta_y[keep]
+            step_x, step_y, move_x = step_x[keep], step_y[keep], move_x[keep]
+
+            tx += np.where(move_x, step_x, 0)
+            ty += np.where(move_x, 0, step_y)
+            next_x += np.where(move_x, delta_x, 0.0)
+            next_y += np.where(move_x, 0.0, delta_y)
+        return seen
+
+
+def check_against_reference(service: SightService, pairs: Sequence[Tuple[int, int, int, int]]):
+    """
+    Pairs on which the batched answer differs from reference_visible.
+    """
+    got = service.query(np.array(pairs, np.int64).reshape(-1, 4))
+    return [
+        tuple(p) for p, g in zip(pairs, got.tolist())
+        if g != reference_visible(service.grid, (p[0], p[1]), (p[2], p[3]))
+    ]
@@ -0,0 +1,43 @@
+# lib/simulation.py
+from __future__ import annotations
+
+
+SIM_RATE = 60                   # simulation steps per second
+SIM_DT = 1.0 / SIM_RATE
+MAX_CATCH_UP_STEPS = 5          # per frame; time beyond this is dropped
+
+
+class FixedStep:
+    """
+    Accumulator for a fixed-rate simulation driven by variable frame times.
+
+    advance(dt) returns how many steps of step_dt to run this frame. After a
+    long frame (a wing build, a hitch) at most max_steps run and the rest of
+    the backlog is dropped, so the game slows down briefly instead of
+    spiralling. alpha is how far the frame is between the last two steps,
+    for interpolating what gets rendered.
+    """
+    def __init__(self, step_dt: float = SIM_DT, max_steps: int = MAX_CATCH_UP_STEPS):
+        self.step_dt = step_dt
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.steps = 0              # total steps run
+        self.dropped = 0.0          # total seconds of simulation skipped
+
+    def advance(self, dt: float) -> int:
+        self.accumulator += max(0.0, dt)
+        steps = int(self.accumulator / self.step_dt)
+        if steps > self.max_steps:
+            self.dropped += (steps - self.max_steps) * self.step_dt
+            self.accumulator -= (steps - self.max_steps) * self.step_dt
+            steps = self.max_steps
+        self.accumulator -= steps * self.step_dt
+        self.steps += steps
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        return min(1.0, self.accumulator / self.step_dt)
+
+    def reset(self) -> None:
+        self.accumulator = 0.0
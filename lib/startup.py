@@ -0,0 +1,190 @@
+# lib/startup.py
+"""
+Startup tracer: records module import times, asset loads and constructor
+times from process start to the first rendered frame, then writes a JSON
+report. Enabled with PB_TRACE_STARTUP=1 (or --trace-startup); costs
+nothing otherwise.
+
+This module must stay dependency-free: main.py imports it before Panda3D
+so that Panda's own imports are timed too.
+"""
+from __future__ import annotations
+
+import importlib.abc
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+
+REPORT_PATH = "data/startup_report.json"
+
+_T0 = time.perf_counter()
+
+
+# ---------------------------------------------------------------------------
+# IMPORT TIMING
+# ---------------------------------------------------------------------------
+
+class _TimingLoader(importlib.abc.Loader):
+    def __init__(self, tracer: "StartupTracer", name: str, loader):
+        self._tracer = tracer
+        self._name = name
+        self._loader = loader
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Keep the real loader visible to the module (resources, reload)
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        with self._tracer.span("import", self._name):
+            self._loader.exec_module(module)
+
+    def __getattr__(self, item):
+        return getattr(self._loader, item)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    def __init__(self, tracer: "StartupTracer"):
+        self._tracer = tracer
+        self._busy = False
+
+    def find_spec(self, name, path, target=None):
+        if self._busy:
+            return None
+
+        self._busy = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._busy = False
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimingLoader(self._tracer, name, spec.loader)
+        return spec
+
+
+# ---------------------------------------------------------------------------
+# TRACER
+# ---------------------------------------------------------------------------
+
+class StartupTracer:
+    def __init__(self):
+        self.enabled = False
+        self.finished = False
+        self.events: List[Dict[str, Any]] = []
+        self._depth = 0
+        self._finder: Optional[_TimingFinder] = None
+
+    def start(self, enabled: Optional[bool] = None) -> None:
+        if enabled is None:
+            enabled = os.environ.get("PB_TRACE_STARTUP") == "1" or "--trace-startup" in sys.argv
+        self.enabled = enabled
+        if enabled and self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    @staticmethod
+    def now_ms() -> float:
+        return (time.perf_counter() - _T0) * 1000.0
+
+    @contextmanager
+    def span(self, category: str, name: str):
+        if not self.enabled or self.finished:
+            yield
+            return
+
+        event = {"category": category, "name": name, "start_ms": self.now_ms(), "depth": self._depth}
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            event["duration_ms"] = self.now_ms() - event["start_ms"]
+            self.events.append(event)
+
+    def mark(self, name: str) -> None:
+        if self.enabled and not self.finished:
+            self.events.append({"category": "mark", "name": name, "start_ms": self.now_ms(),
+                                "depth": self._depth, "duration_ms": 0.0})
+
+    # ------------------------------------------------------------
+    # FIRST FRAME
+    # ------------------------------------------------------------
+    def watch_first_frame(self, base) -> None:
+        """
+        Adds a task that runs after igLoop (sort 50) on the first frame,
+        i.e. once the first frame has been rendered.
+        """
+        if not self.enabled:
+            return
+
+        def _first_frame(task):
+            self.finish()
+            return task.done
+
+        base.taskMgr.add(_first_frame, "startupFirstFrame", sort=60)
+
+    def finish(self, path: str = REPORT_PATH) -> None:
+        if not self.enabled or self.finished:
+            return
+
+        self.mark("first_frame")
+        self.finished = True
+
+        if self._finder is not None and self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+        report = self.report()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+
+        print(f"Startup: first frame at {report['first_frame_ms']:.1f} ms (report: {path})")
+        for e in report["slowest"][:10]:
+            print(f"  {e['self_ms']:8.1f} ms  {e['category']:<8} {e['name']}")
+
+    def report(self) -> Dict[str, Any]:
+        events = sorted(self.events, key=lambda e: e["start_ms"])
+
+        # Exclusive ("self") time: subtract directly nested spans
+        for e in events:
+            e["self_ms"] = e["duration_ms"]
+        stack: List[Dict[str, Any]] = []
+        for e in events:
+            while stack and e["start_ms"] >= stack[-1]["start_ms"] + stack[-1]["duration_ms"]:
+                stack.pop()
+            if stack and e["category"] != "mark":
+                stack[-1]["self_ms"] -= e["duration_ms"]
+            if e["category"] != "mark":
+                stack.append(e)
+
+        totals: Dict[str, float] = {}
+        for e in events:
+            totals[e["category"]] = totals.get(e["category"], 0.0) + e["self_ms"]
+
+        first_frame = next((e["start_ms"] for e in events if e["name"] == "first_frame"), self.now_ms())
+        return {
+            "first_frame_ms": first_frame,
+            "self_ms_by_category": totals,
+            "slowest": sorted((e for e in events if e["category"] != "mark"),
+                              key=lambda e: e["self_ms"], reverse=True)[:25],
+            "events": events,
+        }
+
+
+TRACER = StartupTracer()
@@ -1,29 +1,69 @@
 from panda3d.core import TexturePool
 
-TEXTURES = {
-    "main_floor_wall": TexturePool.loadTexture("assets/images/main_wing_wall_1.png"),
-    "main_upper_wall": TexturePool.loadTexture("assets/images/main_wing_wall_1.png"),
-    "main_floor_floor": TexturePool.loadTexture("assets/images/main_wing_floor.png"),
-    "main_upper_floor": TexturePool.loadTexture("assets/images/main_wing_floor.png"),
-    "main_floor_ceiling": TexturePool.loadTexture("assets/images/main_wing_ceiling.png"),
-    "main_upper_ceiling": TexturePool.loadTexture("assets/images/main_wing_ceiling.png"),
-    
-    "west_wing_wall": TexturePool.loadTexture("assets/images/west_wing_wall_1.png"),
-    "west_upper_wall": TexturePool.loadTexture("assets/images/west_wing_wall_1.png"),
-    "west_wing_floor": TexturePool.loadTexture("assets/images/west_wing_floor_1.png"),
-    "west_upper_floor": TexturePool.loadTexture("assets/images/west_wing_floor_1.png"),
-    "west_wing_ceiling": TexturePool.loadTexture("assets/images/west_wing_ceiling.png"),
-    "west_upper_ceiling": TexturePool.loadTexture("assets/images/west_wing_ceiling.png"),
-
-    "east_wing_wall_old": TexturePool.loadTexture("assets/images/east_wing_wall_old_1.png"),
-    "east_upper_wall_old": TexturePool.loadTexture("assets/images/east_wing_wall_old_1.png"),
-    "east_wing_wall_new": TexturePool.loadTexture("assets/images/east_wing_wall_new_1.png"),
-    "east_upper_wall_new": TexturePool.loadTexture("assets/images/east_wing_wall_new_1.png"),
-    "east_wing_floor": TexturePool.loadTexture("assets/images/east_wing_floor.png"),
-    "east_upper_floor": TexturePool.loadTexture("assets/images/east_wing_floor.png"),
-    "east_wing_ceiling": TexturePool.loadTexture("assets/images/east_wing_ceiling.png"),
-    "east_upper_ceiling": TexturePool.loadTexture("assets/images/east_wing_ceiling.png"),
-
-    "door_old": TexturePool.loadTexture("assets/images/door_old.png"),
-    "door_new": TexturePool.loadTexture("assets/images/door_new.png"),
-}
\ No newline at end of file
+from lib.startup import TRACER
+
+# Texture key -> image path. Images are read from disk on first use.
+TEXTURE_PATHS = {
+    "main_floor_wall": "assets/images/main_wing_wall_1.png",
+    "main_upper_wall": "assets/images/main_wing_wall_1.png",
+    "main_floor_floor": "assets/images/main_wing_floor.png",
+    "main_upper_floor": "assets/images/main_wing_floor.png",
+    "main_floor_ceiling": "assets/images/main_wing_ceiling.png",
+    "main_upper_ceiling": "assets/images/main_wing_ceiling.png",
+
+    "west_wing_wall": "assets/images/west_wing_wall_1.png",
+    "west_upper_wall": "assets/images/west_wing_wall_1.png",
+    "west_wing_floor": "assets/images/west_wing_floor_1.png",
+    "west_upper_floor": "assets/images/west_wing_floor_1.png",
+    "west_wing_ceiling": "assets/images/west_wing_ceiling.png",
+    "west_upper_ceiling": "assets/images/west_wing_ceiling.png",
+
+    "east_wing_wall_old": "assets/images/east_wing_wall_old_1.png",
+    "east_upper_wall_old": "assets/images/east_wing_wall_old_1.png",
+    "east_wing_wall_new": "assets/images/east_wing_wall_new_1.png",
+    "east_upper_wall_new": "assets/images/east_wing_wall_new_1.png",
+    "east_wing_floor": "assets/images/east_wing_floor.png",
+    "east_upper_floor": "assets/images/east_wing_floor.png",
+    "east_wing_ceiling": "assets/images/east_wing_ceiling.png",
+    "east_upper_ceiling": "assets/images/east_wing_ceiling.png",
+
+    "door_old": "assets/images/door_old.png",
+    "door_new": "assets/images/door_new.png",
+}
+
+
+class _TextureTable(dict):
+    """
+    Loads each texture on first lookup instead of at import, so importing
+    the world code does no disk I/O.
+    """
+    def __missing__(self, key):
+        path = TEXTURE_PATHS[key]
+        with TRACER.span("asset", path):
+            tex = TexturePool.loadTexture(path)
+        self[key] = tex
+        return tex
+
+
+TEXTURES = _TextureTable()
+
+# Wing name -> texture key prefix, where the two differ
+WING_TEXTURE_PREFIX = {
+    "west_floor": "west_wing",
+    "east_floor": "east_wing",
+}
+
+
+def wing_texture_key(pwing, kind, tile_char=None):
+    """
+    kind: "wall", "floor" or "ceiling". Wings with old/new wall variants
+    (the east wing) pick "_new" for "*" tiles and "_old" otherwise.
+    """
+    key = f"{WING_TEXTURE_PREFIX.get(pwing, pwing)}_{kind}"
+    if key not in TEXTURE_PATHS:
+        key += "_new" if tile_char == "*" else "_old"
+    return key
+
+
+def wing_texture(pwing, kind, tile_char=None):
+    return TEXTURES[wing_texture_key(pwing, kind, tile_char)]
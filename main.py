@@ -1,6 +1,11 @@
-from panda3d.core import loadPrcFileData, WindowProperties
-from direct.showbase.ShowBase import ShowBase
-from direct.showbase.ShowBaseGlobal import globalClock
+# Imported first so that every later import is covered by the tracer
+from lib.startup import TRACER
+TRACER.start()
+
+with TRACER.span("import", "panda3d/direct core"):
+    from panda3d.core import loadPrcFileData, GraphicsWindow, WindowProperties
+    from direct.showbase.ShowBase import ShowBase
+    from direct.showbase.ShowBaseGlobal import globalClock
 
 loadPrcFileData(
     "",
@@ -13,22 +18,32 @@ loadPrcFileData(
     """
 )
 
+# Only what the splash screen needs is imported here; the world, textures,
+# props and game screen load on first use.
 from lib.screens import ScreenManager
 from screens.splash import SplashScreen
 from lib.Audio import AudioManager
 from lib.Presence import PresenceSystem
+from lib.saves import SaveWriter
+from lib.jobs import JobSystem
+from lib.memory import MemoryBudget, MemoryTracker
+from lib.profiling import PROFILER, ProfilerOverlay
+from lib.replay import InputSystem, REPLAY_DONE_EVENT
+from lib.simulation import FixedStep
 
 
 class HorrorGame(ShowBase):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, splash=True, record=None, replay=None, replay_clock="recorded", render=True,
+                 memory_budget=None, presence_rate=None):
+        with TRACER.span("ctor", "ShowBase"):
+            super().__init__()
         self.setBackgroundColor(0, 0, 0, 1)
 
         props = WindowProperties()
         props.setTitle("Protocol Black")
         props.setCursorHidden(False)
         props.setMouseMode(WindowProperties.M_absolute)
-        if self.win is not None:
+        if self._has_window():
             self.win.requestProperties(props)
 
         # Disable Panda default camera controller
@@ -39,16 +54,63 @@ class HorrorGame(ShowBase):
         self.player_start = None
         self.mouse_captured = False
 
-        self.audio = AudioManager(self)
-        self.presence = PresenceSystem()
+        with TRACER.span("ctor", "AudioManager"):
+            self.audio = AudioManager(self)
+        self.presence = PresenceSystem(tick_rate=presence_rate)
 
-        self.screens = ScreenManager(self)
-        self.screens.change(SplashScreen(self, self.screens))
+        # Saves are encoded and written on a worker thread; flush on quit
+        self.saves = SaveWriter()
+        self.jobs = JobSystem(self)
+        self.exitFunc = self._on_exit
+
+        # Player, presence and AI advance in fixed steps; rendering
+        # interpolates between them (lib/simulation.py)
+        self.sim = FixedStep()
+
+        # Per-frame input (and dt); records to / replays from a file
+        self.input = InputSystem(self, record=record, replay=replay, clock=replay_clock)
 
+        self.screens = ScreenManager(self)
+        if self.input.replaying:
+            from screens.game import GameScreen
+            self.accept(REPLAY_DONE_EVENT, lambda match: self.userExit())
+            self.screens.change(GameScreen(self, self.screens, save_data=self.input.replay_meta["start"]))
+        elif splash:
+            with TRACER.span("ctor", "SplashScreen"):
+                self.screens.change(SplashScreen(self, self.screens))
+
+        # F3 = frame-time overlay, F4 = export profile session
+        self.profiler_overlay = ProfilerOverlay(self)
+        # F6 = memory overlay, F7 = export memory report
+        self.memory = MemoryTracker(self, memory_budget)
+
+        self._last_real = globalClock.getRealTime()
         self.taskMgr.add(self.update, "update")
+        TRACER.watch_first_frame(self)
+
+        if not render:
+            self.set_rendering(False)
+
+    def set_rendering(self, enabled):
+        """
+        With rendering off the window is skipped by the graphics engine and
+        the loop only runs tasks: simulation, audio, jobs. Benchmarks use it
+        to time the simulation on its own.
+        """
+        if self.win is not None:
+            self.win.setActive(enabled)
+
+    def _on_exit(self):
+        self.input.close()
+        self.jobs.shutdown()
+        self.saves.close()
+
+    def _has_window(self):
+        # Offscreen buffers (bench.py) have no window properties to set
+        return isinstance(self.win, GraphicsWindow)
 
     def capture_mouse(self):
-        if self.mouse_captured or not self.win:
+        if self.mouse_captured or not self._has_window():
             return
 
         props = WindowProperties()
@@ -59,7 +121,7 @@ class HorrorGame(ShowBase):
         self.mouse_captured = True
 
     def release_mouse(self):
-        if self.win is None:
+        if not self._has_window():
             return
 
         props = WindowProperties()
@@ -71,10 +133,49 @@ class HorrorGame(ShowBase):
 
 
     def update(self, task):
-        dt = globalClock.getDt()
-        self.screens.update(dt)
+        dt = self.input.frame.dt
+
+        # Profile wall-clock time; dt is game time and is replayed
+        real = globalClock.getRealTime()
+        PROFILER.next_frame(real - self._last_real)
+        self._last_real = real
+
+        steps = self.sim.advance(dt)
+        with PROFILER.scope("Simulation"):
+            for _ in range(steps):
+                self.screens.simulate(self.sim.step_dt)
+
+        with PROFILER.scope("ScreenManager.update"):
+            self.screens.update(dt)
+        with PROFILER.scope("Audio.update"):
+            self.audio.update(dt, self.presence)
+
+        self.profiler_overlay.update(dt)
+        self.memory.update(dt)
         return task.cont
 
 
+def parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Protocol Black")
+    parser.add_argument("--record", metavar="PATH", help="record input to PATH")
+    parser.add_argument("--replay", metavar="PATH", help="replay an input recording")
+    parser.add_argument("--replay-clock", choices=("recorded", "fixed"), default="recorded")
+    parser.add_argument("--trace-startup", action="store_true", help="see lib/startup.py")
+    parser.add_argument("--memory-budget", type=MemoryBudget.parse, metavar="SPEC",
+                        help='MB per category, e.g. "total=512,textures=128,evict"')
+    parser.add_argument("--presence-rate", type=float, metavar="HZ",
+                        help="presence field updates per second (default 10)")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    HorrorGame().run()
+    args = parse_args()
+    HorrorGame(
+        record=args.record,
+        replay=args.replay,
+        replay_clock=args.replay_clock,
+        memory_budget=args.memory_budget,
+        presence_rate=args.presence_rate,
+    ).run()
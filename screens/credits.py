@@ -1,12 +1,14 @@
 from panda3d.core import TextNode
 from direct.gui.OnscreenImage import OnscreenImage
 from panda3d.core import TransparencyAttrib
-from lib.screens import UIScreen
+from lib.screens import UIScreen, ui_texture
 from direct.gui.OnscreenText import OnscreenText
 from direct.gui.DirectButton import DirectButton
 
 
 class CreditsScreen(UIScreen):
+    cacheable = True
+
     def __init__(self, base, manager):
         super().__init__(base)
         self.manager = manager
@@ -14,7 +16,7 @@ class CreditsScreen(UIScreen):
         # Background
         aspect = self.base.getAspectRatio()
         self.bg = OnscreenImage(
-            image="assets/images/game-logo-no-text.png",
+            image=ui_texture("assets/images/game-logo-no-text.png"),
             parent=self.root,
             pos=(0, 0, 0),
             scale=(aspect, 1, 1),
@@ -47,13 +49,13 @@ class CreditsScreen(UIScreen):
 
     def back_to_title(self):
         from screens.title import TitleScreen
-        self.manager.change(TitleScreen(self.base, self.manager))
+        self.manager.show("title", TitleScreen)
     
     def enter(self):
         super().enter()
         self.base.release_mouse()
     
-    def exit(self):
+    def destroy(self):
         for attr in (
             "bg",
             "title",
@@ -65,4 +67,4 @@ class CreditsScreen(UIScreen):
                 obj.destroy()
                 setattr(self, attr, None)
 
-        super().exit()
\ No newline at end of file
+        super().destroy()
@@ -1,13 +1,36 @@
 # screens/game.py
-from lib.World import add_lighting, build_wing, compute_spawn_heading
+import time
+
+from panda3d.core import NodePath, Vec3
+
+from lib.World import PLAYER_START, add_lighting, compute_spawn_heading
+from lib.bake import load_baked, load_baked_rooms
+from lib.chunks import ChunkStreamer
+from lib.doors import DoorSystem
+from lib.minimap import Minimap
+from lib.propagation import SoundPropagation
+from lib.sight import SightService
+from lib.rooms import UNREACHABLE, distance_field
+from lib.constants import PLAYER_EYE_HEIGHT
+from lib.grid import DOOR_CHARS, WALL_CHARS, TileGrid
 from lib.constants import TILE_SIZE
 from lib.screens import Screen
 from lib.Player import Player
 from lib.maps import MAP_DATA
+from lib.saves import save_path
+from lib.autosave import AutosaveService, GameSnapshot
+from lib.profiling import PROFILER
 
 from lib.ObjectManager import PropManager, PropSpawn
 
 
+QUICKSAVE_SLOT = "quicksave"
+
+DEFAULT_PROPS = [
+    PropSpawn("chair", (10.5, 6.0, 0.0), (90, 0, 0)),
+]
+
+
 class GameScreen(Screen):
     def __init__(self, base, manager, save_data=None):
         super().__init__(base)
@@ -15,12 +38,35 @@ class GameScreen(Screen):
         self.save_data = save_data
         self.player = None
         self.props = None
+        self.wing = None
+        self.wing_np = None
+        self.grid = None
+        self.streamer = None
+        self.doors = None
+        self.propagation = None
+        self.sight = None
+        self.minimap = None
+        self.prop_spawns = []
+        self.prop_nodes = []
+        self.play_time = 0.0
+        self.autosave = None
+        self.entity_pos = None
 
-    def enter(self):
-        super().enter()
+        # Copy-on-write state: replaced as a whole on change so snapshots
+        # can share it without copying.
+        self.door_state = ()
+        self.prop_state = ()
 
-        # --- LIGHTING ---
-        add_lighting(self.base)
+        self.prepared = False
+
+    def prepare(self):
+        """
+        Builds the wing, doors and props under self.root (still detached),
+        yielding progress so ScreenManager.transition() can spread it over
+        frames.
+        """
+        if self.prepared:
+            return
 
         # --- BUILD WORLD FIRST ---
         wing = (
@@ -28,24 +74,113 @@ class GameScreen(Screen):
             if self.save_data
             else "main_floor"
         )
+        self.wing = wing
+        self.grid = TileGrid(MAP_DATA[wing])
+        self.wing_np = self.root.attachNewNode(f"wing_{wing}")
 
-        build_wing(self.base, MAP_DATA[wing], wing)
-
+        start = self.grid.find(PLAYER_START)
+        if start is not None:
+            self.base.player_start = Vec3(
+                (start[0] + 0.5) * TILE_SIZE,
+                (start[1] + 0.5) * TILE_SIZE,
+                PLAYER_EYE_HEIGHT,
+            )
         assert self.base.player_start is not None, "No player start (X) in map!"
 
+        # --- DOORS ---
+        self.doors = DoorSystem(self.grid, self.wing_np)
+        self.doors.build()
+        self.resources.add(self.doors.destroy)
+        yield 0.1
+
+        if self.save_data:
+            for x, y, unlocked in self.save_data.get("doors", []):
+                door = self.doors.get((x, y))
+                if door is not None:
+                    door.unlocked = bool(unlocked)
+
+        self.door_state = self.doors.states()
+
+        # --- SOUND PROPAGATION through the rooms and doors ---
+        self.propagation = SoundPropagation(self.grid, self.doors, load_baked_rooms(wing, MAP_DATA[wing]))
+        # Line of sight for AI, over the same room graph
+        self.sight = SightService(self.grid, self.doors, self.propagation.graph)
+
+        # The presence lurks at the open tile farthest from the start
+        far = distance_field(self.grid, [self.grid.tile_at(*self.base.player_start.xy)])
+        reached = [i for i, d in enumerate(far) if d != UNREACHABLE]
+        if reached:
+            i = max(reached, key=far.__getitem__)
+            self.entity_pos = (
+                (i % self.grid.width + 0.5) * TILE_SIZE,
+                (i // self.grid.width + 0.5) * TILE_SIZE,
+            )
+
+        # --- WALLS / FLOOR / CEILING: chunks around the spawn now, the
+        # rest streams in as the player moves ---
+        player = self.save_data.get("player") if self.save_data else None
+        spawn = player["pos"] if player else self.base.player_start
+        self.streamer = ChunkStreamer(self.grid, wing, self.wing_np, baked=load_baked(wing, MAP_DATA[wing]))
+        self.resources.add(self.streamer.destroy)
+        for progress in self.streamer.iter_load(spawn[0], spawn[1]):
+            yield 0.1 + 0.8 * progress
+
         # --- PROPS ---
         self.props = PropManager(
             base=self.base,
-            parent=self.base.render,
+            parent=self.root,
             props_root="assets/objects",
         )
 
-        self.props.spawn_batch([
-            PropSpawn("chair", (10.5, 6.0, 0.0), (90, 0, 0)),
-        ])
+        if self.save_data and self.save_data.get("props"):
+            self.prop_spawns = [
+                PropSpawn(p["id"], tuple(p["pos"]), tuple(p["hpr"]))
+                for p in self.save_data["props"]
+            ]
+        else:
+            self.prop_spawns = list(DEFAULT_PROPS)
+
+        self.prop_nodes = self.props.spawn_batch(self.prop_spawns)
+
+        saved_props = self.save_data.get("props", []) if self.save_data else []
+        states = [p.get("state", 0) for p in saved_props]
+        states += [0] * (len(self.prop_spawns) - len(states))
+
+        prop_state = []
+        for spawn, np, state in zip(self.prop_spawns, self.prop_nodes, states):
+            np.setTag("state", str(state))
+            p = np.getPos(self.root)
+            p.z -= self.props.registry.get_meta(spawn.prop_id).y_offset
+            h, pp, r = np.getHpr(self.root)
+            prop_state.append((spawn.prop_id, (p.x, p.y, p.z), (h, pp, r), state))
+        self.prop_state = tuple(prop_state)
+
+        self.prepared = True
+        yield 1.0
+
+    def enter(self):
+        if not self.prepared:
+            for _ in self.prepare():
+                pass
+
+        super().enter()
+
+        # --- LIGHTING ---
+        for light in add_lighting(self.base):
+            self.resources.light(light)
+
+        # --- PRESENCE FIELD ---
+        presence = self.base.presence
+        field = presence.attach(self.grid)
+        field.set_open_many((tile, door.unlocked) for tile, door in self.doors.doors.items())
+        presence.entity = self.entity_pos
+        self.resources.add(presence.detach)
+
+        self.base.audio.set_propagation(self.propagation)
+        self.resources.add(lambda: self.base.audio.set_propagation(None))
 
         # --- CREATE PLAYER ---
-        self.player = Player(self.base, save_data=self.save_data)
+        self.player = Player(self.base, self.grid, self.doors, self.resources, save_data=self.save_data)
         self.player.node.setPos(
             self.base.player_start.x,
             self.base.player_start.y,
@@ -54,9 +189,12 @@ class GameScreen(Screen):
         tx = int(self.base.player_start.x // TILE_SIZE)
         ty = int(self.base.player_start.y // TILE_SIZE)
 
-        heading = compute_spawn_heading(MAP_DATA[wing], tx, ty)
+        heading = compute_spawn_heading(MAP_DATA[self.wing], tx, ty)
         self.player.node.setH(heading)
 
+        # --- MINIMAP (TAB) ---
+        self.minimap = Minimap(self.base, self.grid, self.doors, self.sight, self.resources)
+
         # --- CAMERA SAFETY ---
         self.base.camLens.setNearFar(0.1, 1000)
 
@@ -67,10 +205,148 @@ class GameScreen(Screen):
         self.player.node.setH(self.player.node.getH())
         self.player.camera.setP(0)
 
-        # DEBUG
-        self.base.render.ls()
+        # --- RESTORE SAVED STATE ---
+        if self.save_data:
+            self._restore(self.save_data)
+
+        self.resources.accept("f5", self.quicksave)
+        # A replay must not overwrite the player's autosave
+        if not self.base.input.replaying:
+            self.autosave = AutosaveService(self.base, self)
+            self.resources.add(self.autosave.destroy)
+
+        self.player.snap()
+        self.base.input.start(self)
+
+    def exit(self):
+        """
+        Tears the wing down completely; the screen has to be prepared again
+        before it can be entered.
+        """
+        self.resources.release()
+        self.root.removeNode()
+        self.root = NodePath(self.__class__.__name__)
+        self.player = None
+        self.autosave = None
+        self.streamer = None
+        self.doors = None
+        self.propagation = None
+        self.sight = None
+        self.minimap = None
+        self.props = None
+        self.prop_nodes = []
+        self.wing_np = None
+        self.prepared = False
+
+    def _restore(self, data):
+        player = data.get("player")
+        if player:
+            self.player.node.setPos(*player["pos"])
+            self.player.node.setH(player["h"])
+            self.player.pitch = player["pitch"]
+            self.player.node.setP(self.player.pitch)
+
+            # Doors load closed; open any the player was standing in
+            x, y = player["pos"][0], player["pos"][1]
+            for tile in self.doors.doors:
+                if self.grid.overlaps(x, y, self.player.radius, tile):
+                    self.doors.open_now(tile)
 
+        self.base.presence.level = data.get("presence", 0.0)
+        self.play_time = data.get("play_time", 0.0)
+
+    # ------------------------------------------------------------
+    # STATE CHANGES
+    # ------------------------------------------------------------
+    def set_door_unlocked(self, x, y, unlocked):
+        self.doors.get((x, y)).unlocked = unlocked
+        if self.minimap:
+            self.minimap.doors_changed()
+        if self.base.presence.field is not None:
+            self.base.presence.field.set_open(x, y, unlocked)
+        self.door_state = tuple(
+            (dx, dy, unlocked if (dx, dy) == (x, y) else u)
+            for dx, dy, u in self.door_state
+        )
+
+    def set_tile(self, x, y, char):
+        """
+        Changes the map tile at (x, y) at runtime (a door giving way, a wall
+        collapsing). Collision and the affected chunks are patched in place,
+        and a door on the tile is added or removed to match.
+        """
+        self.doors.remove(x, y)
+        self.streamer.set_tile(x, y, char)
+        self.propagation.rooms_changed()
+        self.sight.rooms_changed()
+        if char in DOOR_CHARS:
+            # Locked or not as char says; set_door_unlocked changes it after
+            self.doors.add(x, y)
+        if self.minimap:
+            self.minimap.set_tile(x, y)
+        if self.base.presence.field is not None:
+            door = self.doors.get((x, y))
+            self.base.presence.field.set_open(
+                x, y, door.unlocked if door is not None else char not in WALL_CHARS
+            )
+        self.door_state = self.doors.states()
+
+    def set_prop_state(self, index, state):
+        self.prop_nodes[index].setTag("state", str(state))
+        prop_id, pos, hpr, _ = self.prop_state[index]
+        ps = list(self.prop_state)
+        ps[index] = (prop_id, pos, hpr, state)
+        self.prop_state = tuple(ps)
+
+    # ------------------------------------------------------------
+    # SAVING
+    # ------------------------------------------------------------
+    def snapshot(self):
+        node = self.player.node
+        return GameSnapshot(
+            wing=self.wing,
+            play_time=self.play_time,
+            timestamp=time.time(),
+            presence=self.base.presence.level,
+            player_pos=tuple(self.player.pos),
+            player_h=node.getH(),
+            player_pitch=self.player.pitch,
+            doors=self.door_state,
+            props=self.prop_state,
+        )
+
+    def quicksave(self):
+        if not self.player:
+            return
+        screenshot = self.base.win.getScreenshot() if self.base.win else None
+        self.base.saves.submit(save_path(QUICKSAVE_SLOT), self.snapshot(), screenshot)
+
+    def simulate(self, dt):
+        self.play_time += dt
+        if self.player:
+            self.doors.simulate(dt)
+            self.player.simulate(dt)
+            with PROFILER.scope("Presence.update"):
+                self.base.presence.update(dt, self.player)
 
     def update(self, dt):
+        if self.sight:
+            self.sight.begin_frame()
+        if self.player:
+            with PROFILER.scope("ChunkStreamer.update"):
+                self.streamer.update(self.player.pos.x, self.player.pos.y)
+
+        for path, error in self.base.saves.poll():
+            if self.player:
+                self.player._show_message("SAVE FAILED" if error else "GAME SAVED")
+            if error:
+                print(f"Save to {path} failed: {error}")
+
         if self.player:
-            self.player.update(dt)
+            self.player.update(dt, self.base.sim.alpha)
+            with PROFILER.scope("Minimap.update"):
+                pos = self.player.node.getPos()
+                self.minimap.update(pos.x, pos.y)
+            if self.autosave:
+                with PROFILER.scope("Autosave.update"):
+                    self.autosave.update(dt)
@@ -1,32 +1,44 @@
 import os
-import json
+import threading
+import time
 from direct.gui.DirectGui import (
     DirectButton,
-    DirectLabel,
-    DirectScrolledList,
+    DirectFrame,
 )
-from panda3d.core import TransparencyAttrib
+from panda3d.core import Filename, Texture, TransparencyAttrib
 from direct.gui.OnscreenImage import OnscreenImage
-from lib.screens import UIScreen
+from lib.screens import UIScreen, ui_texture
 import direct.gui.DirectGuiGlobals as DGG
 from direct.gui.OnscreenText import OnscreenText
+from lib.saves import SAVE_DIR, SaveFormatError, load_index, read_save, reconcile_index
 
 
-SAVE_DIR = "data/saves"
+VISIBLE_ROWS = 6
+ROW_HEIGHT = 0.1
+
+ROW_COLOR = (0.15, 0.15, 0.15, 0.8)
+ROW_SELECTED_COLOR = (0.5, 0.1, 0.1, 0.9)
 
 
 class LoadScreen(UIScreen):
+    cacheable = True
+
     def __init__(self, base, manager):
         super().__init__(base)
         self.manager = manager
 
         self.selected_save = None
-        self.save_buttons = []
+        self.entries = []
+        self.scroll = 0
+        self.rows = []
+
+        self._scan_thread = None
+        self._scan_result = None
 
         # Background
         aspect = self.base.getAspectRatio()
         self.bg = OnscreenImage(
-            image="assets/images/game-logo-no-text.png",
+            image=ui_texture("assets/images/game-logo-no-text.png"),
             parent=self.root,
             pos=(0, 0, 0),
             scale=(aspect, 1, 1),
@@ -41,6 +53,16 @@ class LoadScreen(UIScreen):
             parent=self.root,
         )
 
+        # One card, retextured per selected save
+        self.preview = OnscreenImage(
+            image=ui_texture("assets/images/game-logo-no-text.png"),
+            parent=self.root,
+            pos=(0, 0, -0.38),
+            scale=(0.16, 1, 0.09),
+        )
+        self.preview.hide()
+        self._preview_tex = None
+
         self._build_save_list()
         self._build_buttons()
 
@@ -49,54 +71,159 @@ class LoadScreen(UIScreen):
     # ------------------------------------------------------------
 
     def _build_save_list(self):
-        saves = self._get_save_files()
-
-        if not saves:
-            self.title = OnscreenText(
-                text="No saves found.",
-                pos=(0, 0, 0.2),
-                scale=0.12,
-                fg=(1, 1, 1, 1),  # white
-                parent=self.root,
-            )
-            self.save_list = None
-            return
-
-        self.no_saves = None
-
-        self.save_list = DirectScrolledList(
+        """
+        Only VISIBLE_ROWS buttons ever exist; scrolling re-labels them, so
+        the widget count does not grow with the number of saves.
+        """
+        self.save_list = DirectFrame(
             parent=self.root,
-            items=[],
             frameSize=(-0.6, 0.6, -0.35, 0.35),
+            frameColor=(0, 0, 0, 0.5),
             pos=(0, 0, 0.15),
-            numItemsVisible=6,
-            forceHeight=0.1,
-            itemFrame_frameSize=(-0.55, 0.55, -0.05, 0.05),
-            itemFrame_pos=(0, 0, 0),
         )
 
-        for name in saves:
+        for i in range(VISIBLE_ROWS):
             btn = DirectButton(
-                text=name,
+                parent=self.save_list,
+                text="",
+                text_scale=0.6,
+                text_align=0,
+                text_pos=(-7.5, -0.25),
                 scale=0.07,
-                command=self._select_save,
-                extraArgs=[name],
+                frameSize=(-7.8, 7.8, -0.6, 0.6),
+                frameColor=ROW_COLOR,
+                pos=(0, 0, 0.25 - i * ROW_HEIGHT),
+                command=self._select_row,
+                extraArgs=[i],
             )
-            self.save_buttons.append(btn)
-            self.save_list.addItem(btn)
+            btn.hide()
+            self.rows.append(btn)
 
-    def _get_save_files(self):
-        if not os.path.isdir(SAVE_DIR):
-            return []
+        self.scroll_up_btn = DirectButton(
+            parent=self.save_list,
+            text="^",
+            scale=0.07,
+            pos=(0.67, 0, 0.25),
+            command=self._scroll_by,
+            extraArgs=[-1],
+        )
+        self.scroll_down_btn = DirectButton(
+            parent=self.save_list,
+            text="v",
+            scale=0.07,
+            pos=(0.67, 0, -0.25),
+            command=self._scroll_by,
+            extraArgs=[1],
+        )
 
-        return sorted(
-            f for f in os.listdir(SAVE_DIR)
-            if os.path.isfile(os.path.join(SAVE_DIR, f))
+        self.no_saves = OnscreenText(
+            text="No saves found.",
+            pos=(0, 0.2),
+            scale=0.12,
+            fg=(1, 1, 1, 1),  # white
+            parent=self.root,
         )
 
-    def _select_save(self, filename):
-        self.selected_save = filename
+    def _set_entries(self, index):
+        self.entries = sorted(index.values(), key=lambda e: e.get("timestamp", 0.0), reverse=True)
+
+        files = [e["file"] for e in self.entries]
+        if self.selected_save not in files:
+            self.selected_save = None
+            if hasattr(self, "load_btn"):
+                self.load_btn["state"] = DGG.DISABLED
+
+        self.scroll = max(0, min(self.scroll, len(self.entries) - VISIBLE_ROWS))
+
+        if self.entries:
+            self.no_saves.hide()
+            self.save_list.show()
+        else:
+            self.no_saves.show()
+            self.save_list.hide()
+
+        self._refresh_rows()
+
+    def _refresh_rows(self):
+        for i, btn in enumerate(self.rows):
+            idx = self.scroll + i
+            if idx >= len(self.entries):
+                btn.hide()
+                continue
+
+            entry = self.entries[idx]
+            btn["text"] = self._row_label(entry)
+            btn["frameColor"] = ROW_SELECTED_COLOR if entry["file"] == self.selected_save else ROW_COLOR
+            btn.show()
+
+    @staticmethod
+    def _row_label(entry):
+        name = os.path.splitext(entry["file"])[0]
+        minutes = int(entry.get("play_time", 0.0)) // 60
+        stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.get("timestamp", 0.0)))
+        return f"{name}   {entry.get('wing', '?')}   {minutes // 60}h{minutes % 60:02d}m   {stamp}"
+
+    def _scroll_by(self, delta):
+        limit = max(0, len(self.entries) - VISIBLE_ROWS)
+        scroll = max(0, min(self.scroll + delta, limit))
+        if scroll != self.scroll:
+            self.scroll = scroll
+            self._refresh_rows()
+
+    def _select_row(self, row):
+        idx = self.scroll + row
+        if idx < len(self.entries):
+            self._select_save(self.entries[idx])
+
+    def _select_save(self, entry):
+        self.selected_save = entry["file"]
         self.load_btn["state"] = DGG.NORMAL
+        self._refresh_rows()
+        self._show_preview(entry.get("thumbnail"))
+
+    def _show_preview(self, thumbnail):
+        self._release_preview()
+
+        if not thumbnail:
+            return
+        path = os.path.join(SAVE_DIR, thumbnail)
+        if not os.path.isfile(path):
+            return
+
+        # Read from disk every time: TexturePool caches by filename, and
+        # the quicksave slot rewrites the same thumbnail
+        tex = Texture(thumbnail)
+        if tex.read(Filename.fromOsSpecific(path)):
+            self._preview_tex = tex
+            self.preview.setTexture(tex, 1)
+            self.preview.show()
+
+    def _release_preview(self):
+        self.preview.hide()
+        if self._preview_tex is not None:
+            self.preview.clearTexture()
+            self._preview_tex.releaseAll()
+            self._preview_tex = None
+
+    # ------------------------------------------------------------
+    # BACKGROUND RECONCILE
+    # ------------------------------------------------------------
+
+    def _start_scan(self):
+        if self._scan_thread and self._scan_thread.is_alive():
+            return
+        self._scan_thread = threading.Thread(target=self._scan, name="SaveIndexScan", daemon=True)
+        self._scan_thread.start()
+
+    def _scan(self):
+        # Plain attribute handoff; update() picks it up on the main thread
+        self._scan_result = reconcile_index()
+
+    def update(self, dt):
+        result = self._scan_result
+        if result is not None:
+            self._scan_result = None
+            self._set_entries(result)
 
     # ------------------------------------------------------------
     # BUTTONS
@@ -126,26 +253,50 @@ class LoadScreen(UIScreen):
 
         path = os.path.join(SAVE_DIR, self.selected_save)
 
-        with open(path, "r", encoding="utf-8") as f:
-            save_data = json.load(f)
+        try:
+            save_data = read_save(path)
+        except (OSError, SaveFormatError) as e:
+            print(f"Failed to load save {path}: {e}")
+            return
 
         from screens.game import GameScreen
-        self.manager.change(GameScreen(self.base, self.manager, save_data=save_data))
+        self.manager.transition(
+            GameScreen(self.base, self.manager, save_data=save_data),
+            fallback=lambda: self.manager.screen("load", LoadScreen),
+        )
 
         print(f"Loading save: {path}")
 
     def _go_back(self):
         from screens.title import TitleScreen
-        self.manager.change(TitleScreen(self.base, self.manager))
+        self.manager.show("title", TitleScreen)
 
     def enter(self):
         super().enter()
         self.base.release_mouse()
+        self.base.accept("wheel_up", self._scroll_by, [-1])
+        self.base.accept("wheel_down", self._scroll_by, [1])
+        # Index first (instant), the reconcile scan corrects it when done
+        self._set_entries(load_index())
+        self._start_scan()
 
     def exit(self):
+        self.base.ignore("wheel_up")
+        self.base.ignore("wheel_down")
+        super().exit()
+
+    def destroy(self):
+        self._release_preview()
+        for btn in self.rows:
+            btn.destroy()
+        self.rows.clear()
+
         for attr in (
             "bg",
             "title",
+            "preview",
+            "scroll_up_btn",
+            "scroll_down_btn",
             "save_list",
             "no_saves",
             "load_btn",
@@ -156,8 +307,4 @@ class LoadScreen(UIScreen):
                 obj.destroy()
                 setattr(self, attr, None)
 
-        for btn in self.save_buttons:
-            btn.destroy()
-        self.save_buttons.clear()
-
-        super().exit()
+        super().destroy()
@@ -0,0 +1,66 @@
+# screens/loading.py
+
+from direct.gui.DirectGui import DirectButton, DirectFrame, DirectWaitBar
+from direct.gui.OnscreenText import OnscreenText
+from lib.screens import UIScreen
+
+
+class LoadingScreen(UIScreen):
+    """
+    Lightweight screen shown by ScreenManager.transition() while the next
+    screen prepares. Uses no textures so it appears instantly.
+    """
+    def __init__(self, base, on_cancel=None):
+        super().__init__(base)
+
+        aspect = self.base.getAspectRatio()
+        self.bg = DirectFrame(
+            parent=self.root,
+            frameSize=(-aspect, aspect, -1, 1),
+            frameColor=(0, 0, 0, 1),
+        )
+
+        self.text = OnscreenText(
+            text="LOADING",
+            pos=(0, 0.1),
+            scale=0.08,
+            fg=(0.85, 0.85, 0.85, 1),
+            parent=self.root,
+        )
+
+        self.bar = DirectWaitBar(
+            parent=self.root,
+            range=100,
+            value=0,
+            frameSize=(-0.6, 0.6, -0.02, 0.02),
+            frameColor=(0.15, 0.15, 0.15, 1),
+            barColor=(0.6, 0.1, 0.1, 1),
+            pos=(0, 0, -0.05),
+        )
+
+        self.cancel_btn = None
+        if on_cancel:
+            self.cancel_btn = DirectButton(
+                text="CANCEL",
+                scale=0.06,
+                pos=(0, 0, -0.3),
+                command=on_cancel,
+                parent=self.root,
+            )
+
+    def set_progress(self, progress):
+        self.bar["value"] = max(0.0, min(1.0, progress)) * 100
+
+    def exit(self):
+        for attr in (
+            "bg",
+            "text",
+            "bar",
+            "cancel_btn",
+        ):
+            obj = getattr(self, attr, None)
+            if obj:
+                obj.destroy()
+                setattr(self, attr, None)
+
+        super().exit()
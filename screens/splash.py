@@ -1,9 +1,23 @@
 # screens/splash.py
 
-from panda3d.core import TextNode
+from panda3d.core import TextNode, TexturePool
 from direct.gui.OnscreenImage import OnscreenImage
 from panda3d.core import TransparencyAttrib
-from lib.screens import UIScreen
+from lib.screens import UIScreen, ui_texture
+from lib.startup import TRACER
+
+
+# The splash stays up at least this long, and until warm-up finishes
+# (capped at SPLASH_MAX_TIME; unfinished jobs keep running afterwards).
+SPLASH_MIN_TIME = 4.0
+SPLASH_MAX_TIME = 8.0
+
+WARMUP_WING = "main_floor"
+WARMUP_PROPS = ("chair",)
+WARMUP_IMAGES = (
+    "assets/images/game-logo.png",
+    "assets/images/game-logo-no-text.png",
+)
 
 
 class SplashScreen(UIScreen):
@@ -12,12 +26,13 @@ class SplashScreen(UIScreen):
         self.manager = manager
         self.timer = 0.0
 
-        self.image = OnscreenImage(
-            image="assets/images/bluedot-logo.png",
-            parent=self.root,          # UIScreen => root will be under aspect2d
-            pos=(0, 0, 0),
-            scale=1.0,                 # 1.0 roughly fills screen width on aspect2d
-        )
+        with TRACER.span("asset", "assets/images/bluedot-logo.png"):
+            self.image = OnscreenImage(
+                image="assets/images/bluedot-logo.png",
+                parent=self.root,          # UIScreen => root will be under aspect2d
+                pos=(0, 0, 0),
+                scale=1.0,                 # 1.0 roughly fills screen width on aspect2d
+            )
         self.image.setTransparency(TransparencyAttrib.MAlpha)
 
         text = TextNode("splash")
@@ -28,14 +43,68 @@ class SplashScreen(UIScreen):
         self.text_np = self.root.attachNewNode(text)
         self.text_np.setPos(0, 0, -0.85)
 
+        self.warmup = []
+
+    def enter(self):
+        super().enter()
+        # Sort 60 runs after igLoop, so warm-up starts once the splash
+        # is actually on screen
+        self.base.taskMgr.add(self._start_warmup, "splashWarmup", sort=60)
+
+    # ------------------------------------------------------------
+    # WARM-UP
+    # ------------------------------------------------------------
+    def _start_warmup(self, task):
+        """
+        Uses the splash time to load what the title screen and "NEW" need:
+        images and model files are decoded on worker threads (into the
+        texture/model pools), the default wing is built in main-thread
+        slices and stashed on the manager as a ready GameScreen.
+        """
+        from lib.textures import TEXTURE_PATHS
+        from lib.objects import shared_registry
+
+        jobs = self.base.jobs
+
+        for path in WARMUP_IMAGES:
+            self.warmup.append(jobs.submit_thread(path, ui_texture, path))
+
+        prefix = WARMUP_WING + "_"
+        for key, path in TEXTURE_PATHS.items():
+            if key.startswith(prefix):
+                self.warmup.append(jobs.submit_thread(path, TexturePool.loadTexture, path))
+
+        registry = shared_registry(self.base.loader, "assets/objects")
+        for prop_id in WARMUP_PROPS:
+            model_path = registry.get_meta(prop_id).model_path
+            self.warmup.append(jobs.submit_thread(model_path, self.base.loader.loadModel, model_path))
+
+        self.warmup.append(jobs.submit_wait("audio", self.base.audio.ready))
+
+        from screens.game import GameScreen
+        game = GameScreen(self.base, self.manager)
+        self.warmup.append(jobs.submit_sliced(
+            f"wing {WARMUP_WING}",
+            game.prepare(),
+            on_done=lambda _: self.manager.stash("game", game),
+        ))
+        return task.done
+
+    def warmup_done(self):
+        return bool(self.warmup) and all(job.done for job in self.warmup)
+
     def update(self, dt):
         self.timer += dt
-        if self.timer > 4:
+        if self.timer > SPLASH_MIN_TIME and (self.warmup_done() or self.timer > SPLASH_MAX_TIME):
+            for line in self.base.jobs.report():
+                print(f"Warm-up {line}")
+
             from screens.title import TitleScreen
-            self.manager.change(TitleScreen(self.base, self.manager))
+            self.manager.show("title", TitleScreen)
 
     def exit(self):
+        self.base.taskMgr.remove("splashWarmup")
         if self.image:
             self.image.destroy()
             self.image = None
-        super().exit()
\ No newline at end of file
+        super().exit()
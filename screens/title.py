@@ -1,22 +1,26 @@
 from direct.gui.DirectGui import DirectButton
 from panda3d.core import TransparencyAttrib
 from direct.gui.OnscreenImage import OnscreenImage
-from lib.screens import UIScreen
+from lib.screens import UIScreen, ui_texture
 
 
 class TitleScreen(UIScreen):
+    cacheable = True
+
     def __init__(self, base, manager):
         super().__init__(base)
         self.manager = manager
 
         # Background
         self.bg = OnscreenImage(
-            image="assets/images/game-logo.png",
+            image=ui_texture("assets/images/game-logo.png"),
             parent=self.base.render2d,
             pos=(0, 0, 0),
             scale=(1, 1, 1),
         )
         self.bg.setTransparency(TransparencyAttrib.MAlpha)
+        # Lives on render2d, outside self.root; shown in enter()
+        self.bg.hide()
 
         # START BUTTON
         self.start_btn = DirectButton(
@@ -53,24 +57,35 @@ class TitleScreen(UIScreen):
 
     def load_game(self):
         from screens.load import LoadScreen
-        self.manager.change(LoadScreen(self.base, self.manager))
+        self.manager.show("load", LoadScreen)
 
     def show_credits(self):
         from screens.credits import CreditsScreen
-        self.manager.change(CreditsScreen(self.base, self.manager))
+        self.manager.show("credits", CreditsScreen)
 
     def quit_game(self):
         self.base.userExit()
 
     def new_game(self):
         from screens.game import GameScreen
-        self.manager.change(GameScreen(self.base, self.manager))
-    
+
+        # Built during the splash warm-up when it had time to finish
+        screen = self.manager.take("game") or GameScreen(self.base, self.manager)
+        self.manager.transition(
+            screen,
+            fallback=lambda: self.manager.screen("title", TitleScreen),
+        )
+
     def enter(self):
         super().enter()
+        self.bg.show()
         self.base.release_mouse()
 
     def exit(self):
+        self.bg.hide()
+        super().exit()
+
+    def destroy(self):
         for attr in (
             "bg",
             "start_btn",
@@ -83,4 +98,4 @@ class TitleScreen(UIScreen):
                 obj.destroy()
                 setattr(self, attr, None)
 
-        super().exit()
+        super().destroy()